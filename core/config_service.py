@@ -0,0 +1,285 @@
+"""Central, cached access to the YAML configuration files.
+
+Each file (settings.yaml, model_strategy.yaml, autonomy.yaml) is parsed once
+and served from memory. A watcher thread compares file mtimes and sizes and,
+when a file changed, parses it again and swaps the cached snapshot in one
+assignment, so readers see either the old or the new configuration, never a
+mix. Subscribers are notified after the swap; a file that fails to parse
+keeps its previous snapshot. A subscriber registered from a running event
+loop is called on that loop (call_soon_threadsafe), not on the watcher
+thread, so it never races the coroutines reading what it updates.
+
+The Kernel owns one ConfigService and hands it to plugins as
+``config["config_service"]``. Returned dicts are shared: treat them as
+read-only.
+"""
+import asyncio
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import yaml
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FILES: Dict[str, str] = {
+    "settings": "settings.yaml",
+    "model_strategy": "model_strategy.yaml",
+    "autonomy": "autonomy.yaml",
+}
+
+Subscriber = Callable[[str, Dict[str, Any]], None]
+
+
+@dataclass(frozen=True)
+class SettingsView:
+    """Typed access to config/settings.yaml."""
+
+    raw: Dict[str, Any]
+
+    def section(self, name: str) -> Dict[str, Any]:
+        return self.raw.get(name, {}) or {}
+
+    @property
+    def llm(self) -> Dict[str, Any]:
+        return self.section("llm")
+
+    @property
+    def kernel(self) -> Dict[str, Any]:
+        return self.section("kernel")
+
+    @property
+    def task_queue(self) -> Dict[str, Any]:
+        return self.section("task_queue")
+
+    def plugin(self, name: str) -> Dict[str, Any]:
+        return self.section("plugins").get(name, {}) or {}
+
+    @property
+    def escalation_model(self) -> Optional[str]:
+        return (self.plugin("tool_local_llm").get("local_llm", {}) or {}).get("escalation_model")
+
+
+@dataclass(frozen=True)
+class ModelStrategyView:
+    """Typed access to config/model_strategy.yaml."""
+
+    raw: Dict[str, Any]
+
+    @property
+    def task_strategies(self) -> List[Dict[str, Any]]:
+        return self.raw.get("task_strategies", []) or []
+
+    def strategy_for(self, task_type: str) -> Optional[Dict[str, Any]]:
+        for strategy in self.task_strategies:
+            if strategy.get("task_type") == task_type:
+                return strategy
+        return None
+
+
+@dataclass(frozen=True)
+class AutonomyView:
+    """Typed access to config/autonomy.yaml."""
+
+    raw: Dict[str, Any]
+
+    @property
+    def budget(self) -> Dict[str, Any]:
+        return (self.raw.get("autonomy", {}) or {}).get("budget", {}) or {}
+
+    @property
+    def resources(self) -> Dict[str, Any]:
+        return self.raw.get("resources", {}) or {}
+
+
+@dataclass(frozen=True)
+class _Subscription:
+    callback: Subscriber
+    loop: Optional[asyncio.AbstractEventLoop]
+
+
+@dataclass(frozen=True)
+class _Snapshot:
+    data: Dict[str, Any]
+    stamp: Optional[Tuple[int, int]]  # (mtime_ns, size); None if the file is missing
+
+
+class ConfigService:
+    def __init__(self, config_dir: str | Path = "config", files: Optional[Dict[str, str]] = None):
+        """
+        Args:
+            config_dir: Directory holding the YAML files.
+            files: Logical name -> file name; defaults to DEFAULT_FILES.
+        """
+        self.config_dir = Path(config_dir)
+        self.files = dict(files or DEFAULT_FILES)
+        self._snapshots: Dict[str, _Snapshot] = {}
+        self._subscribers: Dict[str, List[_Subscription]] = {}
+        self._lock = threading.RLock()
+        self._watcher: Optional[threading.Thread] = None
+        self._stop_watching = threading.Event()
+        self.parse_count = 0
+
+    def path_of(self, name: str) -> Path:
+        if name not in self.files:
+            raise KeyError(f"Unknown config file '{name}' (known: {', '.join(self.files)})")
+        return self.config_dir / self.files[name]
+
+    @staticmethod
+    def _stamp(path: Path) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _parse(self, name: str) -> Dict[str, Any]:
+        path = self.path_of(name)
+        with open(str(path), "r", encoding="utf-8") as f:
+            data = yaml.safe_load(f) or {}
+        self.parse_count += 1
+        if not isinstance(data, dict):
+            raise ValueError(f"{path} must contain a mapping at the top level")
+        return data
+
+    def get(self, name: str) -> Dict[str, Any]:
+        """Parsed contents of a config file ({} if it does not exist)."""
+        snapshot = self._snapshots.get(name)
+        if snapshot is not None:
+            return snapshot.data
+        with self._lock:
+            snapshot = self._snapshots.get(name)
+            if snapshot is None:
+                snapshot = self._load(name, previous=None)
+                self._snapshots[name] = snapshot
+            return snapshot.data
+
+    def _load(self, name: str, previous: Optional[_Snapshot]) -> _Snapshot:
+        path = self.path_of(name)
+        stamp = self._stamp(path)
+        if stamp is None:
+            if previous is None:
+                logger.warning(f"Config '{path}' not found.")
+            return _Snapshot({}, None)
+        try:
+            return _Snapshot(self._parse(name), stamp)
+        except Exception as e:
+            logger.error(f"Error loading config '{path}': {e}")
+            if previous is not None:
+                # Keep serving the last good configuration
+                return _Snapshot(previous.data, stamp)
+            return _Snapshot({}, stamp)
+
+    @property
+    def settings(self) -> SettingsView:
+        return SettingsView(self.get("settings"))
+
+    @property
+    def model_strategy(self) -> ModelStrategyView:
+        return ModelStrategyView(self.get("model_strategy"))
+
+    @property
+    def autonomy(self) -> AutonomyView:
+        return AutonomyView(self.get("autonomy"))
+
+    def subscribe(
+        self,
+        name: str,
+        callback: Subscriber,
+        loop: Optional[asyncio.AbstractEventLoop] = None,
+    ) -> Callable[[], None]:
+        """
+        Call callback(name, data) whenever the named file is reloaded.
+
+        Args:
+            loop: Event loop to run callback on; defaults to the running loop
+                (if any). Without one, callback runs on the reloading thread.
+
+        Returns:
+            A function removing the subscription.
+        """
+        self.path_of(name)  # validate the name
+        if loop is None:
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                pass
+        subscription = _Subscription(callback, loop)
+        with self._lock:
+            self._subscribers.setdefault(name, []).append(subscription)
+
+        def unsubscribe() -> None:
+            with self._lock:
+                if subscription in self._subscribers.get(name, []):
+                    self._subscribers[name].remove(subscription)
+
+        return unsubscribe
+
+    @staticmethod
+    def _notify(subscription: _Subscription, name: str, data: Dict[str, Any]) -> None:
+        def call() -> None:
+            try:
+                subscription.callback(name, data)
+            except Exception as e:
+                logger.error(f"Config subscriber for '{name}' failed: {e}")
+
+        loop = subscription.loop
+        if loop is not None:
+            try:
+                on_loop = asyncio.get_running_loop() is loop
+            except RuntimeError:
+                on_loop = False
+            if not on_loop:
+                try:
+                    loop.call_soon_threadsafe(call)
+                    return
+                except RuntimeError:
+                    pass  # Loop closed: call it here instead
+        call()
+
+    def reload(self, name: Optional[str] = None, force: bool = False) -> List[str]:
+        """
+        Re-parse files whose mtime or size changed (all files with force).
+
+        Returns:
+            Names of the files that were reloaded.
+        """
+        changed = []
+        for file_name in [name] if name else list(self.files):
+            with self._lock:
+                previous = self._snapshots.get(file_name)
+                if previous is None:
+                    # Never read yet: nothing is cached, the next get() parses it
+                    continue
+                if not force and self._stamp(self.path_of(file_name)) == previous.stamp:
+                    continue
+                snapshot = self._load(file_name, previous)
+                self._snapshots[file_name] = snapshot
+                subscribers = list(self._subscribers.get(file_name, []))
+            if snapshot.data is previous.data and not force:
+                continue
+            changed.append(file_name)
+            logger.info(f"Config '{self.path_of(file_name)}' reloaded.")
+            for subscription in subscribers:
+                self._notify(subscription, file_name, snapshot.data)
+        return changed
+
+    def start_watching(self, interval: float = 2.0) -> None:
+        """Poll file mtimes in a daemon thread and reload changed files."""
+        if self._watcher is not None and self._watcher.is_alive():
+            return
+        self._stop_watching.clear()
+
+        def watch() -> None:
+            while not self._stop_watching.wait(interval):
+                self.reload()
+
+        self._watcher = threading.Thread(target=watch, name="sophia-config-watch", daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self) -> None:
+        self._stop_watching.set()
+        self._watcher = None
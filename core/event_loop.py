@@ -13,6 +13,7 @@ Design:
 
 import asyncio
 import logging
+import time
 from typing import Optional, Dict, Any
 from datetime import datetime
 
@@ -20,6 +21,7 @@ from core.context import SharedContext
 from core.events import Event, EventType, EventPriority
 from core.event_bus import EventBus
 from core.task_queue import TaskQueue
+from core.timeouts import WEBUI_INPUT, is_timeout
 from plugins.base_plugin import PluginType
 
 logger = logging.getLogger(__name__)
@@ -89,6 +91,7 @@ class EventDrivenLoop:
         user_input = event.data.get("input")
         session_id = event.data.get("session_id", "webui-session")
         response_callback = event.data.get("response_callback")
+        stream_callback = event.data.get("stream_callback")
 
         if not user_input:
             return
@@ -110,6 +113,8 @@ class EventDrivenLoop:
                 logger=logger,
                 offline_mode=False,  # WebUI uses online mode by default
             )
+            # A user is waiting: LLM calls of this pipeline may be hedged (core/hedging.py)
+            context.payload["latency_critical"] = True
             
             # Use kernel's process_single_input (same as --once)
             if not self.kernel:
@@ -117,11 +122,29 @@ class EventDrivenLoop:
             
             logger.info(f"Calling kernel.process_single_input() - same pipeline as --once", extra={"plugin_name": "EventDrivenLoop"})
             
+            # At least 2 minutes; longer if the pipeline's learned latency needs it (core/timeouts.py)
+            timeouts = getattr(self.kernel, "timeouts", None)
+            timeout = timeouts.timeout_for(WEBUI_INPUT, 120.0, floor=120.0) if timeouts else 120.0
+            started = time.monotonic()
+
+            if stream_callback:
+                # Frames (phases, answer tokens, final response) go out as they are produced
+                await asyncio.wait_for(
+                    self._stream_input(context, stream_callback),
+                    timeout=timeout
+                )
+                if timeouts:
+                    timeouts.record(WEBUI_INPUT, time.monotonic() - started)
+                logger.info("Streamed response to user via WebUI", extra={"plugin_name": "EventDrivenLoop"})
+                return
+
             # Process through full pipeline (planner → executor → tools)
             response = await asyncio.wait_for(
                 self.kernel.process_single_input(context),
-                timeout=120.0  # 2 minutes timeout for WebUI
+                timeout=timeout
             )
+            if timeouts:
+                timeouts.record(WEBUI_INPUT, time.monotonic() - started)
             
             # Send response back to WebUI
             if response_callback:
@@ -129,10 +152,18 @@ class EventDrivenLoop:
                 logger.info(f"Response sent back to user via WebUI", extra={"plugin_name": "EventDrivenLoop"})
                 
         except Exception as e:
+            if is_timeout(e) and timeouts:
+                # Lower bound of the real latency; lets the timeout grow if inputs got slower
+                timeouts.record(WEBUI_INPUT, time.monotonic() - started)
             logger.error(f"Error handling user input: {e}", exc_info=True, extra={"plugin_name": "EventDrivenLoop"})
             if response_callback:
                 await response_callback(f"Sorry, I encountered an error: {e}")
 
+    async def _stream_input(self, context: SharedContext, stream_callback):
+        """Forward every frame of kernel.process_single_input_stream to the callback."""
+        async for frame in self.kernel.process_single_input_stream(context):
+            await stream_callback(frame)
+
     async def _handle_task_completed(self, event: Event):
         """
         Handle TASK_COMPLETED events.
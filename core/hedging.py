@@ -0,0 +1,124 @@
+"""Hedged LLM requests for latency-critical calls.
+
+A hedged call sends the request to its primary model and waits up to the
+model's learned latency quantile (p90 by default, from the latency
+histograms core/timeouts.py keeps). If no answer has come
+back by then, the same request goes out to a backup model as well; the
+first valid (non-raising) response wins and the other request is
+cancelled. A failing primary hands over to the backup at once.
+
+Configured in the ``hedging`` section of config/model_strategy.yaml; the
+backup of a model is the ``hedge_model`` of its task strategy, else
+``default_hedge_model``. Off unless ``enabled`` is set, and only used for
+calls their caller marks latency-critical.
+"""
+import asyncio
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from core.timeouts import AdaptiveTimeouts
+
+
+@dataclass
+class HedgeOutcome:
+    result: Any
+    winner: str  # "primary" or "backup"
+    hedged: bool  # whether the backup request was sent
+    delay: float  # seconds waited before hedging
+
+
+class HedgePolicy:
+    def __init__(
+        self,
+        enabled: bool = False,
+        quantile: float = 0.9,
+        min_samples: int = 20,
+        initial_delay: float = 8.0,
+        hedge_models: Optional[Dict[str, str]] = None,
+        default_hedge_model: Optional[str] = None,
+    ):
+        """
+        Args:
+            enabled: Master switch.
+            quantile: Latency quantile of the primary model after which to hedge.
+            min_samples: Samples needed before the learned quantile is used.
+            initial_delay: Seconds to wait before hedging until then.
+            hedge_models: Primary model -> backup model.
+            default_hedge_model: Backup for models without an entry in hedge_models.
+        """
+        self.enabled = enabled
+        self.quantile = quantile
+        self.min_samples = min_samples
+        self.initial_delay = initial_delay
+        self.hedge_models = dict(hedge_models or {})
+        self.default_hedge_model = default_hedge_model
+
+    @classmethod
+    def from_strategy(cls, strategy: Optional[Dict[str, Any]]) -> "HedgePolicy":
+        """Build from the contents of model_strategy.yaml."""
+        strategy = strategy or {}
+        config = strategy.get("hedging", {}) or {}
+        hedge_models = {
+            entry["model"]: entry["hedge_model"]
+            for entry in strategy.get("task_strategies", []) or []
+            if entry.get("model") and entry.get("hedge_model")
+        }
+        hedge_models.update(config.get("hedge_models", {}) or {})
+        return cls(
+            enabled=bool(config.get("enabled", False)),
+            quantile=float(config.get("quantile", 0.9)),
+            min_samples=int(config.get("min_samples", 20)),
+            initial_delay=float(config.get("initial_delay", 8.0)),
+            hedge_models=hedge_models,
+            default_hedge_model=config.get("default_hedge_model"),
+        )
+
+    def hedge_model_for(self, model: str) -> Optional[str]:
+        backup = self.hedge_models.get(model, self.default_hedge_model)
+        return backup if backup and backup != model else None
+
+    def delay_for(self, model: str, timeouts: Optional[AdaptiveTimeouts]) -> float:
+        """The model's latency quantile learned by timeouts, else initial_delay."""
+        learned = timeouts.latency_quantile(model, self.quantile, self.min_samples) if timeouts is not None else None
+        return learned if learned is not None else self.initial_delay
+
+
+async def hedged(
+    primary: Callable[[], Awaitable[Any]],
+    backup: Callable[[], Awaitable[Any]],
+    delay: float,
+) -> HedgeOutcome:
+    """
+    Race primary() against backup(), started only after delay seconds (or as
+    soon as primary fails). The loser is cancelled.
+
+    Raises:
+        The primary's exception if both calls fail.
+    """
+    tasks: Dict[asyncio.Future, str] = {asyncio.ensure_future(primary()): "primary"}
+    errors: List[BaseException] = []
+    hedged_at_all = False
+    try:
+        done, _ = await asyncio.wait(set(tasks), timeout=delay)
+        if done:
+            task = next(iter(done))
+            if task.exception() is None:
+                return HedgeOutcome(task.result(), "primary", False, delay)
+            errors.append(task.exception())
+            del tasks[task]
+        tasks[asyncio.ensure_future(backup())] = "backup"
+        hedged_at_all = True
+
+        pending = set(tasks)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            # Prefer the primary if both finished in the same step
+            for task in sorted(done, key=lambda t: tasks[t] != "primary"):
+                if task.exception() is None:
+                    return HedgeOutcome(task.result(), tasks[task], hedged_at_all, delay)
+                errors.append(task.exception())
+        raise errors[0]
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
@@ -0,0 +1,92 @@
+"""Long-lived, connection-pooled async HTTP clients for model backends.
+
+Opening an ``httpx.AsyncClient`` per request pays for a new TCP connection
+(and pool setup) on every generation, and falling back to blocking
+``requests`` stalls the event loop for the whole generation. Instead, each
+backend base URL (e.g. ``http://localhost:11434`` for Ollama) gets one
+shared client with keep-alive connections, so concurrent generations run on
+separate pooled connections without blocking each other or the loop.
+Cancelling the awaiting task aborts the request and drops its connection.
+
+Clients belong to the event loop that first used them; a call from a
+different loop (e.g. a second ``asyncio.run``) gets a fresh client.
+``aclose()`` closes them on shutdown.
+"""
+import asyncio
+import logging
+from typing import Dict, Optional, Tuple
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LIMITS = httpx.Limits(
+    max_connections=16,
+    max_keepalive_connections=8,
+    keepalive_expiry=60.0,
+)
+
+
+def _running_loop() -> Optional[asyncio.AbstractEventLoop]:
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+class AsyncClientPool:
+    """One httpx.AsyncClient per backend base URL."""
+
+    def __init__(self, limits: httpx.Limits = DEFAULT_LIMITS, timeout: Optional[float] = 120.0):
+        """
+        Args:
+            limits: Connection pool limits applied to every client.
+            timeout: Default request timeout in seconds; callers may pass
+                their own per request.
+        """
+        self.limits = limits
+        self.timeout = timeout
+        self._clients: Dict[str, Tuple[httpx.AsyncClient, Optional[asyncio.AbstractEventLoop]]] = {}
+
+    @staticmethod
+    def _key(base_url: str) -> str:
+        return base_url.rstrip("/")
+
+    def get(self, base_url: str) -> httpx.AsyncClient:
+        """Return the shared client for a backend, creating it on first use."""
+        key = self._key(base_url)
+        loop = _running_loop()
+        entry = self._clients.get(key)
+        if entry is not None:
+            client, owner = entry
+            if not client.is_closed and (owner is None or loop is None or owner is loop):
+                if owner is None and loop is not None:
+                    self._clients[key] = (client, loop)
+                return client
+            if not client.is_closed:
+                # Its connections belong to another (likely finished) event loop
+                logger.debug(f"Replacing HTTP client for {key} created on another event loop")
+        client = httpx.AsyncClient(limits=self.limits, timeout=self.timeout)
+        self._clients[key] = (client, loop)
+        return client
+
+    async def aclose(self, base_url: Optional[str] = None) -> None:
+        """Close the client of one backend, or all clients."""
+        keys = [self._key(base_url)] if base_url else list(self._clients)
+        loop = _running_loop()
+        for key in keys:
+            entry = self._clients.pop(key, None)
+            if entry is None:
+                continue
+            client, owner = entry
+            if owner is not None and owner is not loop:
+                # Cannot close connections of another loop from here
+                continue
+            try:
+                await client.aclose()
+            except Exception as e:
+                logger.warning(f"Error closing HTTP client for {key}: {e}")
+
+
+# Shared by every plugin talking to a local model runtime
+local_backends = AsyncClientPool()
@@ -1,4 +1,5 @@
 import asyncio
+import dataclasses
 import inspect
 import json
 import logging
@@ -7,15 +8,22 @@ import sys
 import uuid
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Any, cast
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional, Tuple
 
-import yaml
 from pydantic import ValidationError
 
+from core.config_service import ConfigService
 from core.context import SharedContext
+from core.llm_cache import LLMResponseCache
+from core.timeouts import AdaptiveTimeouts
 from core.logging_config import SessionIdFilter, setup_logging
+from core.plan_graph import build_dependency_graph, first_failed_step, run_plan_graph
+from core.plan_template import CompiledPlan, compile_plan
 from core.plugin_manager import PluginManager
+from core.prompt_registry import PromptRegistry, PromptTemplate
 from core.telemetry import TelemetryHub
+from core.tool_executor import ToolExecutor
+from core.tool_registry import ToolRegistry
 from plugins.base_plugin import PluginType
 
 # Get the root logger
@@ -38,10 +46,20 @@ class Kernel:
         """
         self.plugin_manager = PluginManager()
         self.is_running = False
-        self.json_repair_prompt_template = ""
+        self.prompts: Optional[PromptRegistry] = None
+        self.json_repair_prompt_template = PromptTemplate.inline("")
         self.all_plugins_map = {}
         self.memory = None  # Will be set during initialization
         self.telemetry = TelemetryHub()
+        self.tool_registry = ToolRegistry()
+        self.max_parallel_steps = 4  # Overridden by kernel.plan_execution in settings.yaml
+        self.speculative_planning = True  # Overridden by kernel.planning in settings.yaml
+        self.tool_executor = ToolExecutor()
+        self._tool_execution_config: Any = None
+        self.config = ConfigService()
+        self._unsubscribe_config: Optional[Callable[[], None]] = None
+        self.llm_cache = LLMResponseCache(telemetry=self.telemetry)  # Off until llm_cache.enabled
+        self.timeouts = AdaptiveTimeouts()  # Learned per-model request timeouts
 
         # NEW: Event-driven components (Phase 1)
         self.use_event_driven = use_event_driven
@@ -64,15 +82,17 @@ class Kernel:
         await self._check_pending_upgrade()
         
         # --- PROMPT LOADING PHASE ---
+        self.prompts = PromptRegistry()
         try:
-            with open("config/prompts/json_repair_prompt.txt", "r") as f:
-                self.json_repair_prompt_template = f.read()
-        except FileNotFoundError:
+            self.json_repair_prompt_template = self.prompts.get("json_repair_prompt")
+        except KeyError:
             logger.error(
                 "JSON repair prompt template not found. The repair loop will fail.",
                 extra={"plugin_name": "Kernel"},
             )
-            self.json_repair_prompt_template = "The JSON is invalid. Errors: {e}. Please fix it."
+            self.json_repair_prompt_template = PromptTemplate.inline(
+                "The JSON is invalid. Errors: {error}. Please fix it."
+            )
 
         # NEW: Initialize Event-Driven Architecture (if enabled)
         if self.use_event_driven:
@@ -147,19 +167,10 @@ class Kernel:
                 extra={"plugin_name": "Kernel"},
             )
 
+        # settings.yaml is parsed once by the config service and shared with plugins
+        settings = self.config.settings
         for plugin in all_plugins_list:
-            config_path = Path("config/settings.yaml")
-            if not config_path.exists():
-                logger.warning(
-                    "Config 'config/settings.yaml' not found.",
-                    extra={"plugin_name": "Kernel"},
-                )
-                main_config = {}
-            else:
-                with open(config_path, "r") as f:
-                    main_config = yaml.safe_load(f) or {}
-            plugin_configs = main_config.get("plugins", {})
-            specific_config = plugin_configs.get(plugin.name, {})
+            specific_config = settings.plugin(plugin.name)
 
             # Create plugin-specific logger
             plugin_logger = logging.getLogger(f"plugin.{plugin.name}")
@@ -173,6 +184,10 @@ class Kernel:
                 "logger": plugin_logger,  # Inject logger per Development Guidelines
                 "offline_mode": self.offline_mode,  # Pass offline mode flag
                 "telemetry": self.telemetry,
+                "config_service": self.config,
+                "prompt_registry": self.prompts,
+                "llm_cache": self.llm_cache,
+                "timeouts": self.timeouts,
             }
             try:
                 plugin.setup(full_plugin_config)
@@ -192,6 +207,21 @@ class Kernel:
             extra={"plugin_name": "Kernel"},
         )
 
+        self._apply_kernel_config("settings", self.config.get("settings"))
+        if self._unsubscribe_config is not None:
+            self._unsubscribe_config()
+        self._unsubscribe_config = self.config.subscribe("settings", self._apply_kernel_config)
+
+        # Learned timeouts survive restarts in the operation tracking store
+        operation_store = self.all_plugins_map.get("memory_sqlite")
+        if operation_store is not None and hasattr(operation_store, "load_latency_stats"):
+            self.timeouts.attach_store(operation_store)
+        self.config.start_watching()
+
+        # Compile tool validators once; plan execution only looks them up
+        self.tool_registry.invalidate()
+        self._refresh_tool_registry()
+
         # --- PHASE 3: MEMORY CONSOLIDATION INTEGRATION ---
         if self.use_event_driven and self.event_bus:
             # Find Phase 3 plugins
@@ -227,6 +257,42 @@ class Kernel:
                     extra={"plugin_name": "Kernel"},
                 )
     
+    def _apply_kernel_config(self, name: str, settings: Dict[str, Any]) -> None:
+        """Apply the kernel section of settings.yaml (at startup and on reload)."""
+        kernel_config = settings.get("kernel", {}) or {}
+        try:
+            # Parallelism cap for independent plan steps (1 = strictly sequential)
+            plan_config = kernel_config.get("plan_execution", {}) or {}
+            self.max_parallel_steps = max(
+                1, int(plan_config.get("max_parallel_steps", self.max_parallel_steps))
+            )
+            # Start planning while the task router still classifies the input
+            planning_config = kernel_config.get("planning", {}) or {}
+            self.speculative_planning = bool(
+                planning_config.get("speculative", self.speculative_planning)
+            )
+            # Pools and timeouts used to run tool methods off the event loop
+            tool_execution = kernel_config.get("tool_execution")
+            if tool_execution != self._tool_execution_config:
+                previous = self.tool_executor
+                self.tool_executor = ToolExecutor.from_config(tool_execution)
+                self._tool_execution_config = tool_execution
+                previous.shutdown(cancel_pending=False)
+            # Opt-in LLM response cache shared by tool_llm and tool_local_llm
+            self.llm_cache.configure(settings.get("llm_cache"))
+            self.timeouts.configure(settings.get("timeouts"))
+        except (TypeError, ValueError, AttributeError) as e:
+            logger.warning(
+                f"Invalid kernel config, keeping defaults: {e}",
+                extra={"plugin_name": "Kernel"},
+            )
+
+    def _refresh_tool_registry(self) -> None:
+        """Rebuild the tool registry if the loaded plugin instances changed."""
+        self.tool_registry.refresh(
+            p for pt in PluginType for p in self.plugin_manager.get_plugins_by_type(pt)
+        )
+
     async def _handle_recovery_mode(self):
         """Handle recovery from crash - load crash log and publish event."""
         try:
@@ -512,7 +578,10 @@ class Kernel:
 
                     # --- Cognitive Task Routing ---
                     router = self.all_plugins_map.get("cognitive_task_router")
-                    if router:
+
+                    async def route(context: SharedContext) -> SharedContext:
+                        if not router:
+                            return context
                         try:
                             context = await router.execute(context=context)
                             context.logger.info(
@@ -524,11 +593,12 @@ class Kernel:
                                 f"Error executing Cognitive Task Router: {e}",
                                 extra={"plugin_name": "Kernel"},
                             )
+                        return context
 
                     planner = self.all_plugins_map.get("cognitive_planner")
                     plan = []
                     if planner:
-                        context = await planner.execute(context)
+                        context = await self._route_and_plan(context, router, route, planner)
                         plan = context.payload.get("plan", [])
                         if not isinstance(plan, list):
                             context.logger.error(
@@ -537,6 +607,7 @@ class Kernel:
                             )
                             plan = []
                     else:
+                        context = await route(context)
                         context.logger.warning(
                             "Cognitive planner plugin not found.",
                             extra={"plugin_name": "Kernel"},
@@ -574,392 +645,51 @@ class Kernel:
                             extra={"plugin_name": "Kernel"},
                         )
 
-                        # --- GATHER ALL TOOL DEFINITIONS AND VALIDATION SCHEMAS ---
-                        from pydantic import Field, create_model
+                        # --- TOOL REGISTRY (validators compiled once, rebuilt on plugin change) ---
+                        self._refresh_tool_registry()
 
-                        tool_schemas = {}
-                        all_plugins_list = [
-                            p
-                            for pt in PluginType
-                            for p in self.plugin_manager.get_plugins_by_type(pt)
-                        ]
-                        all_plugins_map = {p.name: p for p in all_plugins_list}
+                        compiled_plan = compile_plan(plan)
+                        step_outputs: Dict[int, Any] = {}
+                        step_texts: Dict[int, str] = {}
+
+                        async def run_step(step_number: int) -> bool:
+                            success, text = await self._execute_plan_step(
+                                context,
+                                step_number - 1,
+                                plan[step_number - 1],
+                                compiled_plan,
+                                step_outputs,
+                                llm_tool,
+                            )
+                            step_texts[step_number] = text
+                            return success
 
-                        for plugin in all_plugins_map.values():
-                            get_tool_definitions = getattr(
-                                plugin, "get_tool_definitions", None
+                        unresolved = compiled_plan.unresolved_references()
+                        if unresolved:
+                            execution_summary = (
+                                "Plan failed before execution. Unresolved step references: "
+                                + "; ".join(unresolved)
+                            )
+                            context.logger.error(
+                                execution_summary, extra={"plugin_name": "Kernel"}
                             )
-                            if callable(get_tool_definitions):
-                                tool_defs = cast(
-                                    list[Dict[str, Any]],
-                                    get_tool_definitions() or [],
+                        else:
+                            # Independent steps run concurrently; the first failure stops the plan
+                            outcomes = await run_plan_graph(
+                                self._plan_dependency_graph(plan, compiled_plan),
+                                run_step,
+                                max_parallel=self.max_parallel_steps,
+                            )
+                            failed_step = first_failed_step(outcomes)
+                            if failed_step is not None:
+                                execution_summary = step_texts.get(
+                                    failed_step, f"Plan failed at step {failed_step}."
                                 )
-                                for tool_def in tool_defs:
-                                    function = tool_def.get("function", {})
-                                    func_name = function.get("name")
-                                    params_schema = function.get("parameters")
-                                    if func_name and params_schema:
-                                        fields = {}
-                                        required_fields = params_schema.get("required", [])
-                                        for prop_name, prop_def in params_schema.get(
-                                            "properties", {}
-                                        ).items():
-                                            field_type = {
-                                                "string": str,
-                                                "integer": int,
-                                                "number": float,
-                                                "boolean": bool,
-                                                "array": list,
-                                            }.get(prop_def.get("type"), str)
-                                            desc = prop_def.get("description")
-                                            default_value = prop_def.get("default")
-
-                                            # Use Field(...) for required, Field(default=...) for optional
-                                            if prop_name in required_fields:
-                                                fields[prop_name] = (
-                                                    field_type,
-                                                    Field(..., description=desc),
-                                                )
-                                            else:
-                                                fields[prop_name] = (
-                                                    field_type,
-                                                    Field(default=default_value, description=desc),
-                                                )
-
-                                        validation_model = create_model(
-                                            f"{func_name}ArgsModel", **fields
-                                        )
-                                        tool_schemas[func_name] = validation_model
-
-                        step_results = []
-                        step_outputs: Dict[int, Any] = {}
-                        plan_failed = False
-                        for step_index, step in enumerate(plan):
-                            tool_name = step.get("tool_name")
-                            method_name = step.get("method_name")
-                            arguments = step.get("arguments", {})
-
-                            # --- Resolve chained results (supports both old and new syntax) ---
-                            for arg_name, arg_value in list(arguments.items()):
-                                # New syntax: ${step_N.field} or ${step_N}
-                                if isinstance(arg_value, str) and "${step_" in arg_value:
-                                    import re
-
-                                    # Match ${step_N.field} or ${step_N}
-                                    pattern = r"\$\{step_(\d+)(?:\.(\w+))?\}"
-                                    matches = re.findall(pattern, arg_value)
-
-                                    replacement = arg_value
-                                    for match in matches:
-                                        source_step_index = int(match[0])
-                                        field_name = match[1] if match[1] else None
-
-                                        if source_step_index in step_outputs:
-                                            output = step_outputs[source_step_index]
-
-                                            # Extract specific field if requested
-                                            if field_name:
-                                                if hasattr(output, field_name):
-                                                    value = getattr(output, field_name)
-                                                elif (
-                                                    isinstance(output, dict)
-                                                    and field_name in output
-                                                ):
-                                                    value = output[field_name]
-                                                else:
-                                                    context.logger.warning(
-                                                        f"Field '{field_name}' not found in step {source_step_index} output",
-                                                        extra={"plugin_name": "Kernel"},
-                                                    )
-                                                    value = str(output)
-                                            else:
-                                                value = str(output)
-
-                                            # Replace in the argument value
-                                            placeholder = (
-                                                f"${{step_{source_step_index}"
-                                                + (f".{field_name}" if field_name else "")
-                                                + "}"
-                                            )
-                                            replacement = replacement.replace(
-                                                placeholder, str(value)
-                                            )
-                                        else:
-                                            context.logger.error(
-                                                f"Could not find result for step {source_step_index}",
-                                                extra={"plugin_name": "Kernel"},
-                                            )
-
-                                    arguments[arg_name] = replacement
-
-                                # Old syntax: $result.step_N (keep for backward compatibility)
-                                elif isinstance(arg_value, str) and arg_value.startswith(
-                                    "$result.step_"
-                                ):
-                                    try:
-                                        source_step_index = int(arg_value.split("_")[-1])
-                                        if source_step_index in step_outputs:
-                                            arguments[arg_name] = str(
-                                                step_outputs[source_step_index]
-                                            )
-                                        else:
-                                            context.logger.error(
-                                                f"Could not find result for step "
-                                                f"{source_step_index} in outputs.",
-                                                extra={"plugin_name": "Kernel"},
-                                            )
-                                    except (IndexError, ValueError) as e:
-                                        context.logger.error(
-                                            f"Error parsing chained result '{arg_value}': {e}",
-                                            extra={"plugin_name": "Kernel"},
-                                        )
-
-                            validation_model = tool_schemas.get(method_name)
-                            validated_args = None
-                            max_attempts = 3
-
-                            for attempt in range(max_attempts):
-                                try:
-                                    if not validation_model:
-                                        msg = (
-                                            f"No validation schema found for method "
-                                            f"'{method_name}'."
-                                        )
-                                        raise ValueError(msg)
-
-                                    current_args = arguments
-                                    if isinstance(current_args, str):
-                                        try:
-                                            current_args = json.loads(current_args)
-                                        except json.JSONDecodeError:
-                                            msg = (
-                                                f"Arguments are a non-JSON string: "
-                                                f"{current_args}"
-                                            )
-                                            raise ValueError(msg)
-
-                                    validated_args = validation_model(**current_args).model_dump()
-                                    log_message = (
-                                        f"SECOND-PHASE LOG: Validated plan step "
-                                        f"{step_index + 1}: "
-                                        f"{tool_name}.{method_name}({validated_args})"
-                                    )
-                                    context.logger.info(
-                                        log_message, extra={"plugin_name": tool_name}
-                                    )
-                                    break  # Success
-
-                                except (ValidationError, ValueError) as e:
-                                    log_message = (
-                                        f"Validation failed for step {step_index + 1} "
-                                        f"(Attempt {attempt + 1}/{max_attempts}): {e}"
-                                    )
-                                    context.logger.warning(
-                                        log_message, extra={"plugin_name": "Kernel"}
-                                    )
-                                    if attempt + 1 == max_attempts:
-                                        error_message = (
-                                            f"Plan failed at step {step_index + 1} "
-                                            f"after {max_attempts} attempts. "
-                                            f"Final error: {e}"
-                                        )
-                                        context.logger.error(
-                                            error_message, extra={"plugin_name": "Kernel"}
-                                        )
-                                        step_results.append(error_message)
-                                        plan_failed = True
-                                        break
-
-                                    if not llm_tool:
-                                        error_message = "Cannot attempt repair: LLMTool not found."
-                                        context.logger.error(
-                                            error_message, extra={"plugin_name": "Kernel"}
-                                        )
-                                        step_results.append(error_message)
-                                        plan_failed = True
-                                        break
-
-                                    # Convert step_outputs to JSON-serializable format
-                                    serializable_outputs = []
-                                    for output in step_outputs:
-                                        model_dump_fn = getattr(output, "model_dump", None)
-                                        if callable(model_dump_fn):
-                                            serializable_outputs.append(model_dump_fn())
-                                        elif isinstance(
-                                            output, (str, int, float, bool, type(None))
-                                        ):
-                                            serializable_outputs.append(output)
-                                        else:
-                                            serializable_outputs.append(str(output))
-
-                                    corrupted_json_data = {
-                                        "tool_name": tool_name,
-                                        "method_name": method_name,
-                                        "arguments": arguments,
-                                        "error": str(e),
-                                        "user_input": context.user_input,
-                                        "previous_steps": serializable_outputs,
-                                    }
-
-                                    # Get function schema for repair
-                                    function_schema: Dict[str, Any] = {}
-                                    if (
-                                        validation_model is not None
-                                        and hasattr(validation_model, "model_json_schema")
-                                    ):
-                                        function_schema = validation_model.model_json_schema()
-
-                                    repair_prompt = self.json_repair_prompt_template.format(
-                                        user_input=context.user_input or "",
-                                        tool_name=tool_name,
-                                        method_name=method_name,
-                                        error=str(e),
-                                        function_schema=json.dumps(function_schema, indent=2),
-                                        previous_steps=json.dumps(serializable_outputs, indent=2),
-                                        arguments=json.dumps(arguments, indent=2),
-                                    )
-
-                                    repair_context = await llm_tool.execute(
-                                        context=SharedContext(
-                                            session_id=context.session_id,
-                                            current_state="EXECUTING",
-                                            logger=context.logger,
-                                            user_input=repair_prompt,
-                                            history=[{"role": "user", "content": repair_prompt}],
-                                        )
-                                    )
-
-                                    repaired_args = repair_context.payload.get("llm_response")
-                                    if isinstance(repaired_args, list) and repaired_args:
-                                        arguments = repaired_args[0].get("arguments", {})
-                                    elif isinstance(repaired_args, dict):
-                                        arguments = repaired_args.get("arguments", {})
-
-                                    context.logger.info(
-                                        f"Received repaired arguments for step "
-                                        f"{step_index + 1}: {arguments}",
-                                        extra={"plugin_name": "Kernel"},
-                                    )
-
-                            if plan_failed or validated_args is None:
-                                execution_summary = f"Plan failed at step {step_index + 1}."
-                                break
-
-                            tool = all_plugins_map.get(tool_name)
-                            method = getattr(tool, method_name, None) if tool else None
-                            if method:
-                                try:
-                                    # --- Context Injection & History Propagation ---
-                                    import inspect
-
-                                    sig = inspect.signature(method)
-                                    call_args = validated_args.copy()
-
-                                    if "context" in sig.parameters:
-                                        # Create a new context for this specific step
-                                        step_history = context.history[:]
-                                        for i in range(1, step_index + 1):
-                                            if i in step_outputs:
-                                                step_history.append(
-                                                    {
-                                                        "role": "assistant",
-                                                        "content": f"Output of step {i}: "
-                                                        f"{step_outputs[i]}",
-                                                    }
-                                                )
-
-                                        step_context = SharedContext(
-                                            session_id=context.session_id,
-                                            current_state="EXECUTING",
-                                            logger=context.logger,
-                                            history=step_history,
-                                            user_input=str(call_args),
-                                        )
-                                        call_args["context"] = step_context
-
-                                    step_result = (
-                                        await method(**call_args)
-                                        if asyncio.iscoroutinefunction(method)
-                                        else method(**call_args)
-                                    )
-
-                                    # --- Result Handling & Chaining ---
-                                    output_for_chaining = ""
-                                    if isinstance(step_result, SharedContext):
-                                        context.payload.update(step_result.payload)
-                                        output_for_chaining = step_result.payload.get(
-                                            "llm_response", ""
-                                        )
-                                        step_results.append(str(output_for_chaining))
-                                    else:
-                                        output_for_chaining = step_result
-                                        step_results.append(str(step_result))
-
-                                    step_outputs[step_index + 1] = output_for_chaining
-
-                                    # Save step completion to memory for recovery
-                                    if self.memory:
-                                        try:
-                                            # Create a temporary context for memory storage
-                                            mem_context = SharedContext(
-                                                session_id=context.session_id,
-                                                current_state="EXECUTING",
-                                                logger=context.logger,
-                                                user_input=f"[STEP {step_index + 1}] {tool_name}.{method_name}",
-                                                history=context.history,
-                                            )
-                                            mem_context.payload["llm_response"] = (
-                                                f"Step {step_index + 1} completed: {tool_name}.{method_name}\n"
-                                                f"Arguments: {validated_args}\n"
-                                                f"Result: {str(output_for_chaining)[:500]}\n"
-                                                f"Timestamp: {datetime.now().isoformat()}"
-                                            )
-                                            await self.memory.execute(mem_context)
-                                        except Exception as mem_err:
-                                            context.logger.warning(
-                                                f"Failed to save step to memory: {mem_err}",
-                                                extra={"plugin_name": "Kernel"},
-                                            )
-
-                                    context.logger.info(
-                                        f"Step '{method_name}' executed. "
-                                        f"Result: {step_result}",
-                                        extra={"plugin_name": tool_name},
-                                    )
-                                except Exception as exec_err:
-                                    error_message = (
-                                        f"Error executing {tool_name}.{method_name}: "
-                                        f"{exec_err}"
-                                    )
-                                    context.logger.error(
-                                        error_message,
-                                        exc_info=True,
-                                        extra={"plugin_name": tool_name},
-                                    )
-                                    step_results.append(error_message)
-                                    execution_summary = (
-                                        f"Plan failed at step {step_index + 1}. "
-                                        f"Error: {error_message}"
-                                    )
-                                    break
                             else:
-                                error_message = (
-                                    f"Error: Tool '{tool_name}' or method "
-                                    f"'{method_name}' not found."
-                                )
-                                context.logger.error(
-                                    error_message, extra={"plugin_name": "Kernel"}
-                                )
-                                step_results.append(error_message)
                                 execution_summary = (
-                                    f"Plan failed at step {step_index + 1}. {error_message}"
+                                    "Plan executed successfully. Result: "
+                                    + " | ".join(step_texts[n] for n in sorted(step_texts))
                                 )
-                                break
-
-                        if not execution_summary:
-                            execution_summary = (
-                                "Plan executed successfully. Result: " + " | ".join(step_results)
-                            )
 
                     else:
                         if llm_tool:
@@ -1061,6 +791,272 @@ class Kernel:
         # NEW: Graceful shutdown of event-driven components
         await self._shutdown_event_system(context, session_id)
 
+    def _plan_dependency_graph(self, plan: list, compiled_plan: CompiledPlan) -> Dict[int, set]:
+        """Step dependencies from result references; context-taking steps wait for all earlier ones."""
+        barriers = []
+        for number, step in enumerate(plan, start=1):
+            tool_method = self.tool_registry.get_method(step.get("tool_name"), step.get("method_name"))
+            # Steps given the shared context see (and may change) everything before them
+            if tool_method is None or tool_method.accepts_context:
+                barriers.append(number)
+        return build_dependency_graph(compiled_plan.step_references, barrier_steps=barriers)
+
+    async def _execute_plan_step(
+        self,
+        context: SharedContext,
+        step_index: int,
+        step: Dict[str, Any],
+        compiled_plan: CompiledPlan,
+        step_outputs: Dict[int, Any],
+        llm_tool: Any,
+    ) -> Tuple[bool, str]:
+        """
+        Resolve, validate (with LLM repair) and execute one plan step.
+
+        Returns:
+            (success, text) where text is the step result on success and the
+            plan failure summary otherwise.
+        """
+        plan_failed = False
+        tool_name = step.get("tool_name")
+        method_name = step.get("method_name")
+        # --- Resolve chained results (compiled once per plan, typed substitution) ---
+        arguments = compiled_plan.resolve_arguments(step_index + 1, step_outputs)
+
+        validation_model = self.tool_registry.get_validation_model(
+            tool_name, method_name
+        )
+        if validation_model is not None and isinstance(arguments, dict):
+            # Whole-value references keep their type; string parameters still get text
+            for field_name, model_field in validation_model.model_fields.items():
+                value = arguments.get(field_name)
+                if model_field.annotation is str and value is not None and not isinstance(value, str):
+                    arguments[field_name] = str(value)
+        validated_args = None
+        max_attempts = 3
+
+        for attempt in range(max_attempts):
+            try:
+                if not validation_model:
+                    msg = (
+                        f"No validation schema found for method "
+                        f"'{method_name}'."
+                    )
+                    raise ValueError(msg)
+
+                current_args = arguments
+                if isinstance(current_args, str):
+                    try:
+                        current_args = json.loads(current_args)
+                    except json.JSONDecodeError:
+                        msg = (
+                            f"Arguments are a non-JSON string: "
+                            f"{current_args}"
+                        )
+                        raise ValueError(msg)
+
+                validated_args = validation_model(**current_args).model_dump()
+                log_message = (
+                    f"SECOND-PHASE LOG: Validated plan step "
+                    f"{step_index + 1}: "
+                    f"{tool_name}.{method_name}({validated_args})"
+                )
+                context.logger.info(
+                    log_message, extra={"plugin_name": tool_name}
+                )
+                break  # Success
+
+            except (ValidationError, ValueError) as e:
+                log_message = (
+                    f"Validation failed for step {step_index + 1} "
+                    f"(Attempt {attempt + 1}/{max_attempts}): {e}"
+                )
+                context.logger.warning(
+                    log_message, extra={"plugin_name": "Kernel"}
+                )
+                if attempt + 1 == max_attempts:
+                    error_message = (
+                        f"Plan failed at step {step_index + 1} "
+                        f"after {max_attempts} attempts. "
+                        f"Final error: {e}"
+                    )
+                    context.logger.error(
+                        error_message, extra={"plugin_name": "Kernel"}
+                    )
+                    plan_failed = True
+                    break
+
+                if not llm_tool:
+                    error_message = "Cannot attempt repair: LLMTool not found."
+                    context.logger.error(
+                        error_message, extra={"plugin_name": "Kernel"}
+                    )
+                    plan_failed = True
+                    break
+
+                # Convert step_outputs to JSON-serializable format
+                serializable_outputs = []
+                for output in step_outputs:
+                    model_dump_fn = getattr(output, "model_dump", None)
+                    if callable(model_dump_fn):
+                        serializable_outputs.append(model_dump_fn())
+                    elif isinstance(
+                        output, (str, int, float, bool, type(None))
+                    ):
+                        serializable_outputs.append(output)
+                    else:
+                        serializable_outputs.append(str(output))
+
+                corrupted_json_data = {
+                    "tool_name": tool_name,
+                    "method_name": method_name,
+                    "arguments": arguments,
+                    "error": str(e),
+                    "user_input": context.user_input,
+                    "previous_steps": serializable_outputs,
+                }
+
+                # Get function schema for repair
+                function_schema: Dict[str, Any] = {}
+                if (
+                    validation_model is not None
+                    and hasattr(validation_model, "model_json_schema")
+                ):
+                    function_schema = validation_model.model_json_schema()
+
+                repair_prompt = self.json_repair_prompt_template.render(
+                    user_input=context.user_input or "",
+                    tool_name=tool_name,
+                    method_name=method_name,
+                    error=str(e),
+                    function_schema=json.dumps(function_schema, indent=2),
+                    previous_steps=json.dumps(serializable_outputs, indent=2),
+                    arguments=json.dumps(arguments, indent=2),
+                )
+
+                repair_context = await llm_tool.execute(
+                    context=SharedContext(
+                        session_id=context.session_id,
+                        current_state="EXECUTING",
+                        logger=context.logger,
+                        user_input=repair_prompt,
+                        history=[{"role": "user", "content": repair_prompt}],
+                    )
+                )
+
+                repaired_args = repair_context.payload.get("llm_response")
+                if isinstance(repaired_args, list) and repaired_args:
+                    arguments = repaired_args[0].get("arguments", {})
+                elif isinstance(repaired_args, dict):
+                    arguments = repaired_args.get("arguments", {})
+
+                context.logger.info(
+                    f"Received repaired arguments for step "
+                    f"{step_index + 1}: {arguments}",
+                    extra={"plugin_name": "Kernel"},
+                )
+
+        if plan_failed or validated_args is None:
+            return False, f"Plan failed at step {step_index + 1}."
+
+        tool_method = self.tool_registry.get_method(tool_name, method_name)
+        if tool_method:
+            try:
+                # --- Context Injection & History Propagation ---
+                call_args = validated_args.copy()
+
+                if tool_method.accepts_context:
+                    # Create a new context for this specific step
+                    step_history = context.history[:]
+                    for i in range(1, step_index + 1):
+                        if i in step_outputs:
+                            step_history.append(
+                                {
+                                    "role": "assistant",
+                                    "content": f"Output of step {i}: "
+                                    f"{step_outputs[i]}",
+                                }
+                            )
+
+                    step_context = SharedContext(
+                        session_id=context.session_id,
+                        current_state="EXECUTING",
+                        logger=context.logger,
+                        history=step_history,
+                        user_input=str(call_args),
+                    )
+                    call_args["context"] = step_context
+
+                step_result = await self.tool_executor.call(tool_method, **call_args)
+
+                # --- Result Handling & Chaining ---
+                output_for_chaining = ""
+                if isinstance(step_result, SharedContext):
+                    context.payload.update(step_result.payload)
+                    output_for_chaining = step_result.payload.get(
+                        "llm_response", ""
+                    )
+                    result_text = str(output_for_chaining)
+                else:
+                    output_for_chaining = step_result
+                    result_text = str(step_result)
+
+                step_outputs[step_index + 1] = output_for_chaining
+
+                # Save step completion to memory for recovery
+                if self.memory:
+                    try:
+                        # Create a temporary context for memory storage
+                        mem_context = SharedContext(
+                            session_id=context.session_id,
+                            current_state="EXECUTING",
+                            logger=context.logger,
+                            user_input=f"[STEP {step_index + 1}] {tool_name}.{method_name}",
+                            history=context.history,
+                        )
+                        mem_context.payload["llm_response"] = (
+                            f"Step {step_index + 1} completed: {tool_name}.{method_name}\n"
+                            f"Arguments: {validated_args}\n"
+                            f"Result: {str(output_for_chaining)[:500]}\n"
+                            f"Timestamp: {datetime.now().isoformat()}"
+                        )
+                        await self.memory.execute(mem_context)
+                    except Exception as mem_err:
+                        context.logger.warning(
+                            f"Failed to save step to memory: {mem_err}",
+                            extra={"plugin_name": "Kernel"},
+                        )
+
+                context.logger.info(
+                    f"Step '{method_name}' executed. "
+                    f"Result: {step_result}",
+                    extra={"plugin_name": tool_name},
+                )
+                return True, result_text
+            except Exception as exec_err:
+                error_message = (
+                    f"Error executing {tool_name}.{method_name}: "
+                    f"{exec_err}"
+                )
+                context.logger.error(
+                    error_message,
+                    exc_info=True,
+                    extra={"plugin_name": tool_name},
+                )
+                return False, (
+                    f"Plan failed at step {step_index + 1}. "
+                    f"Error: {error_message}"
+                )
+        else:
+            error_message = (
+                f"Error: Tool '{tool_name}' or method "
+                f"'{method_name}' not found."
+            )
+            context.logger.error(
+                error_message, extra={"plugin_name": "Kernel"}
+            )
+            return False, f"Plan failed at step {step_index + 1}. {error_message}"
+
     async def _shutdown_event_system(self, context: SharedContext, session_id: str):
         """
         Gracefully shutdown event-driven components.
@@ -1096,6 +1092,27 @@ class Kernel:
             await self.event_bus.stop()
             context.logger.info("Event bus stopped gracefully", extra={"plugin_name": "Kernel"})
 
+        self.timeouts.save()
+        await self._shutdown_plugins()
+        self.tool_executor.shutdown()
+        self.config.stop_watching()
+
+    async def _shutdown_plugins(self) -> None:
+        """Give every plugin a chance to close its connections and tasks."""
+        for plugin in self.all_plugins_map.values():
+            shutdown = getattr(plugin, "shutdown", None)
+            if not callable(shutdown):
+                continue
+            try:
+                result = shutdown()
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                logger.warning(
+                    f"Plugin '{plugin.name}' shutdown failed: {e}",
+                    extra={"plugin_name": "Kernel"},
+                )
+
     async def process_single_input(self, context: SharedContext) -> str:
         """Handle a single user input (non-interactive mode)."""
 
@@ -1103,6 +1120,80 @@ class Kernel:
         logger.info(f"🎯 [Kernel] Input: {context.user_input}")
         logger.info(f"🎯 [Kernel] Session: {context.session_id}")
 
+        plan = await self._plan_single_input(context)
+        execution_result = await self._execute_single_input_plan(context, plan)
+        return self._respond_single_input(context, execution_result)
+
+    async def process_single_input_stream(
+        self, context: SharedContext
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Streaming variant of process_single_input for interactive front ends.
+
+        Yields frames as the input moves through the pipeline:
+        {"type": "phase", "phase": ...} when a phase starts,
+        {"type": "token", "delta": ...} for each piece of a streamed answer and
+        finally {"type": "response", "message": ...} with the complete answer
+        (the same text process_single_input would return).
+
+        Plans that consist of a single direct LLM answer are streamed from the
+        LLM as it generates; any other plan runs exactly as in
+        process_single_input and arrives in the final frame.
+        """
+        logger.info("🎯 [Kernel] ========== SINGLE INPUT STREAM START ==========")
+        logger.info(f"🎯 [Kernel] Input: {context.user_input}")
+        logger.info(f"🎯 [Kernel] Session: {context.session_id}")
+
+        yield {"type": "phase", "phase": "PLANNING"}
+        plan = await self._plan_single_input(context)
+
+        yield {"type": "phase", "phase": "EXECUTING"}
+        answer_stream = self._direct_answer_stream(context, plan)
+        if answer_stream is None:
+            execution_result = await self._execute_single_input_plan(context, plan)
+            response = self._respond_single_input(context, execution_result)
+        else:
+            logger.info("🎯 [Kernel] Streaming direct answer from %s", plan[0].get("tool_name"))
+            self.telemetry.update_phase("EXECUTING", "streaming answer")
+            context.current_state = "EXECUTING"
+            parts = []
+            async for delta in answer_stream:
+                parts.append(delta)
+                yield {"type": "token", "delta": delta}
+            response = self._respond_single_input(
+                context, {"success": True, "output": "".join(parts)}
+            )
+
+        yield {"type": "response", "message": response}
+
+    def _direct_answer_stream(
+        self, context: SharedContext, plan: list
+    ) -> Optional[AsyncIterator[str]]:
+        """
+        Token stream for a plan whose only step is an LLM writing the answer.
+
+        Returns None when the plan does anything else, or when the LLM plugin
+        cannot stream.
+        """
+        if len(plan) != 1 or not isinstance(plan[0], dict):
+            return None
+        step = plan[0]
+        if step.get("tool_name") not in ("tool_llm", "tool_local_llm"):
+            return None
+        if step.get("method_name") != "execute":
+            return None
+        tool = self.all_plugins_map.get(step["tool_name"])
+        stream = getattr(tool, "stream", None)
+        if not callable(stream):
+            return None
+        arguments = step.get("arguments") or {}
+        prompt = arguments.get("prompt")
+        if prompt is not None and not isinstance(prompt, str):
+            return None
+        return stream(context=context, prompt=prompt)
+
+    async def _plan_single_input(self, context: SharedContext) -> list:
+        """Route and plan one input; returns the (possibly escalated) plan."""
         # 1. PLANNING PHASE
         logger.info("🎯 [Kernel] Phase 1: PLANNING")
         self.telemetry.update_phase("PLANNING", context.user_input or "")
@@ -1111,47 +1202,47 @@ class Kernel:
 
         logger.info("🎯 [Kernel] Checking for task router...")
         router = self.all_plugins_map.get("cognitive_task_router")
-        if router and not context.offline_mode:
+        if context.offline_mode:
+            logger.info("🔒 [Kernel] Task router skipped in offline mode")
+            router = None
+
+        async def route(context: SharedContext) -> SharedContext:
+            if not router:
+                return context
             try:
                 context = await router.execute(context=context)
                 logger.info("🎯 [Kernel] Task router completed")
             except Exception as exc:
                 logger.error(f"❌ [Kernel] Task router error: {exc}")
-        elif context.offline_mode:
-            logger.info("🔒 [Kernel] Task router skipped in offline mode")
+            return context
 
         logger.info("🎯 [Kernel] Checking for planner...")
         planner = self.all_plugins_map.get("cognitive_planner")
+        escalation_model = self.config.settings.escalation_model or "qwen2.5:14b"
+        if planner and context.offline_mode and self._asks_for_actionable_info(context):
+            # An LLM-only plan would be escalated: load the escalation model while tier 1 plans
+            local_llm = self.all_plugins_map.get("tool_local_llm")
+            prewarm = getattr(local_llm, "prewarm", None)
+            if callable(prewarm):
+                prewarm(escalation_model)
         plan: list[Any] = []
         if planner:
-            context = await planner.execute(context)
+            context = await self._route_and_plan(context, router, route, planner)
             plan_data = context.payload.get("plan", [])
             plan = plan_data if isinstance(plan_data, list) else []
             logger.info("🎯 [Kernel] Planner returned %d steps", len(plan))
             if plan_data and not isinstance(plan_data, list):
                 logger.error("Planner returned invalid plan: %s", plan_data)
         else:
+            context = await route(context)
             logger.warning("🎯 [Kernel] No planner found")
 
         if plan and self._is_poor_quality_plan(plan, context):
             logger.warning("⚠️ [Kernel] Plan quality is poor - escalating to better model")
-            import os
-
-            escalation_model = "qwen2.5:14b"
-            try:
-                with open("config/settings.yaml", "r", encoding="utf-8") as cfg:
-                    settings = yaml.safe_load(cfg) or {}
-                    escalation_model = (
-                        settings.get("plugins", {})
-                        .get("tool_local_llm", {})
-                        .get("local_llm", {})
-                        .get("escalation_model", escalation_model)
-                    )
-            except Exception as exc:
-                logger.warning("⚠️ [Kernel] Could not read escalation model: %s", exc)
-
             logger.info("🔄 [Kernel] Tier 2: Re-planning with %s", escalation_model)
-            os.environ["LOCAL_LLM_MODEL_OVERRIDE"] = escalation_model
+            # Per-request override (read by tool_local_llm), so concurrent pipelines keep their model
+            model_config = context.payload.get("model_config")
+            context.payload["model_config"] = {**(model_config or {}), "local_model": escalation_model}
             try:
                 if planner:
                     context.payload["escalated_planning"] = True
@@ -1165,8 +1256,92 @@ class Kernel:
             except Exception as exc:
                 logger.error("❌ [Kernel] Tier 2 failed: %s", exc)
             finally:
-                os.environ.pop("LOCAL_LLM_MODEL_OVERRIDE", None)
+                if model_config is None:
+                    context.payload.pop("model_config", None)
+                else:
+                    context.payload["model_config"] = model_config
+
+        return plan
 
+    async def _route_and_plan(
+        self,
+        context: SharedContext,
+        router: Any,
+        route: Callable[[SharedContext], Awaitable[SharedContext]],
+        planner: Any,
+    ) -> SharedContext:
+        """
+        Route (route(context)) and plan one input, concurrently when possible.
+
+        The planner starts right away on a copy of the context carrying the
+        model the router is expected to select (router.speculative_model), so
+        the classification and planning round-trips overlap. If the router
+        selects another model, a finished speculative plan that validates is
+        kept; otherwise (or if routing switched to offline mode, which plans
+        with other tools) planning is cancelled and restarted with the routed
+        context.
+        """
+        predict = getattr(router, "speculative_model", None)
+        model = predict(context) if self.speculative_planning and callable(predict) else None
+        if not model:
+            return await planner.execute(await route(context))
+
+        model_config = {**(context.payload.get("model_config") or {}), "model": model}
+        speculative = dataclasses.replace(
+            context,
+            history=list(context.history),
+            payload={**context.payload, "model_config": model_config},
+        )
+        planning = asyncio.ensure_future(planner.execute(speculative))
+        try:
+            context = await route(context)
+        except BaseException:
+            planning.cancel()
+            raise
+
+        routed_model = (context.payload.get("model_config") or {}).get("model")
+        same_mode = context.offline_mode == speculative.offline_mode
+        if routed_model == model and same_mode:
+            planned = await planning
+        elif (
+            same_mode
+            and planning.done()
+            and not planning.cancelled()
+            and planning.exception() is None
+            and self._is_valid_plan(planning.result().payload.get("plan"), context)
+        ):
+            logger.info("🎯 [Kernel] Router chose %s; keeping the valid plan made with %s", routed_model, model)
+            planned = planning.result()
+        else:
+            planning.cancel()
+            try:
+                await planning
+            except (asyncio.CancelledError, Exception):
+                pass
+            logger.info("🎯 [Kernel] Router chose %s, not %s: re-planning", routed_model, model)
+            return await planner.execute(context)
+
+        # The planner's results go to the routed context (which keeps the routed model_config)
+        for key, value in planned.payload.items():
+            if key != "model_config":
+                context.payload[key] = value
+        context.offline_mode = context.offline_mode or planned.offline_mode
+        return context
+
+    def _is_valid_plan(self, plan: Any, context: SharedContext) -> bool:
+        """Non-empty plan of known tools that would not be escalated."""
+        if not plan or not isinstance(plan, list):
+            return False
+        for step in plan:
+            if not isinstance(step, dict) or not isinstance(step.get("method_name"), str):
+                return False
+            if step.get("tool_name") not in self.all_plugins_map:
+                return False
+        return not self._is_poor_quality_plan(plan, context)
+
+    async def _execute_single_input_plan(
+        self, context: SharedContext, plan: list
+    ) -> Dict[str, Any]:
         # 2. EXECUTING PHASE
         logger.info("🎯 [Kernel] Phase 2: EXECUTING")
         self.telemetry.update_phase("EXECUTING", f"steps={len(plan)}")
@@ -1175,33 +1350,24 @@ class Kernel:
 
         if plan:
             logger.info("🎯 [Kernel] Executing plan with %d steps", len(plan))
-            step_results: list[Dict[str, Any]] = []
-            for idx, step in enumerate(plan, start=1):
+            self._refresh_tool_registry()
+            compiled_plan = compile_plan(plan)
+            unresolved = compiled_plan.unresolved_references()
+            if unresolved:
+                error_msg = (
+                    "Plan failed before execution. Unresolved step references: "
+                    + "; ".join(unresolved)
+                )
+                logger.error("❌ [Kernel] %s", error_msg)
+                return {"success": False, "error": error_msg}
+            step_results_by_number: Dict[int, Dict[str, Any]] = {}
+            step_outputs: Dict[int, Any] = {}
+
+            async def run_step(idx: int) -> bool:
+                step = plan[idx - 1]
                 tool_name = step.get("tool_name")
                 method_name = step.get("method_name")
-                arguments = step.get("arguments", {}) or {}
-
-                import re
-
-                for key, value in list(arguments.items()):
-                    if isinstance(value, str):
-                        placeholders = re.findall(r"\$\{step_(\d+)\.(\w+)\}", value)
-                        for step_num, attr in placeholders:
-                            ref_index = int(step_num) - 1
-                            if 0 <= ref_index < len(step_results):
-                                prior = step_results[ref_index]
-                                if prior.get("success"):
-                                    output = prior.get("output", "")
-                                    if isinstance(output, dict) and attr in output:
-                                        replacement = str(output[attr])
-                                    elif hasattr(output, attr):
-                                        replacement = str(getattr(output, attr))
-                                    else:
-                                        replacement = str(output)
-                                    value = value.replace(
-                                        f"${{step_{step_num}.{attr}}}", replacement
-                                    )
-                        arguments[key] = value
+                arguments = compiled_plan.resolve_arguments(idx, step_outputs)
 
                 logger.info(
                     "🎯 [Kernel] Step %s/%s: %s.%s",
@@ -1215,15 +1381,13 @@ class Kernel:
                 if not tool:
                     error_msg = f"Tool '{tool_name}' not found"
                     logger.error("❌ [Kernel] %s", error_msg)
-                    step_results.append({"success": False, "error": error_msg})
-                    continue
+                    step_results_by_number[idx] = {"success": False, "error": error_msg}
+                    return False
 
                 try:
-                    if hasattr(tool, method_name):
-                        method = getattr(tool, method_name)
-                        sig = inspect.signature(method)
-                        accepts_context = "context" in sig.parameters
-                        is_async = inspect.iscoroutinefunction(method)
+                    tool_method = self.tool_registry.get_method(tool_name, method_name)
+                    if tool_method:
+                        accepts_context = tool_method.accepts_context
                         context_in_args = "context" in arguments
 
                         if context_in_args and isinstance(arguments["context"], str):
@@ -1234,30 +1398,44 @@ class Kernel:
                                 logger=logger,
                             )
 
-                        if is_async:
-                            if accepts_context and not context_in_args:
-                                result = await method(context=context, **arguments)
-                            else:
-                                result = await method(**arguments)
+                        if accepts_context and not context_in_args:
+                            result = await self.tool_executor.call(
+                                tool_method, context=context, **arguments
+                            )
                         else:
-                            if accepts_context and not context_in_args:
-                                result = method(context=context, **arguments)
-                            else:
-                                result = method(**arguments)
+                            result = await self.tool_executor.call(tool_method, **arguments)
 
-                        step_results.append({"success": True, "output": result})
+                        step_results_by_number[idx] = {"success": True, "output": result}
+                        step_outputs[idx] = result
                         logger.info("✅ [Kernel] Step %s completed", idx)
                     else:
                         result_context = await tool.execute(context)
                         result = result_context.payload.get(
                             "llm_response", str(result_context.payload)
                         )
-                        step_results.append({"success": True, "output": result})
+                        step_results_by_number[idx] = {"success": True, "output": result}
+                        step_outputs[idx] = result
                         logger.info("✅ [Kernel] Step %s completed (via execute)", idx)
                 except Exception as exc:
                     error_msg = f"Error executing {tool_name}.{method_name}: {exc}"
                     logger.error("❌ [Kernel] %s", error_msg)
-                    step_results.append({"success": False, "error": error_msg})
+                    step_results_by_number[idx] = {"success": False, "error": error_msg}
+                    return False
+                return True
+
+            # Later steps still run after a failure; dependencies only order them
+            await run_plan_graph(
+                self._plan_dependency_graph(plan, compiled_plan),
+                run_step,
+                max_parallel=self.max_parallel_steps,
+                stop_on_failure=False,
+            )
+            step_results: list[Dict[str, Any]] = [
+                step_results_by_number.get(
+                    n, {"success": False, "error": f"Step {n} did not run"}
+                )
+                for n in range(1, len(plan) + 1)
+            ]
 
             successes = [r for r in step_results if r.get("success")]
             if successes:
@@ -1282,6 +1460,11 @@ class Kernel:
             logger.warning("🎯 [Kernel] No plan, skipping execution")
             execution_result = {"success": False, "error": "No plan generated"}
 
+        return execution_result
+
+    def _respond_single_input(
+        self, context: SharedContext, execution_result: Dict[str, Any]
+    ) -> str:
         # 3. RESPONDING
         logger.info("🎯 [Kernel] Phase 3: RESPONDING")
         self.telemetry.update_phase("RESPONDING", "Delivering answer")
@@ -1332,21 +1515,24 @@ class Kernel:
             
             # If only tool is LLM, check if user asked for actionable info
             if tool_name in ["tool_local_llm", "tool_llm"]:
-                user_input_lower = context.user_input.lower() if context.user_input else ""
-                
-                # Patterns that should use real tools, not just LLM
-                actionable_patterns = [
-                    "schopnost", "capability", "plugin", "modul", "module",
-                    "kolik", "how many", "seznam", "list", "aktuální", "current",
-                    "stav", "status", "info", "informace", "information"
-                ]
-                
-                if any(pattern in user_input_lower for pattern in actionable_patterns):
+                if self._asks_for_actionable_info(context):
                     logger.info(f"🔍 [Kernel] Plan quality check: User asked for actionable info but plan only has LLM call")
                     return True
         
         return False
 
+    def _asks_for_actionable_info(self, context: SharedContext) -> bool:
+        """Whether the input asks for something real tools should answer (not just an LLM)."""
+        user_input_lower = context.user_input.lower() if context.user_input else ""
+        
+        # Patterns that should use real tools, not just LLM
+        actionable_patterns = [
+            "schopnost", "capability", "plugin", "modul", "module",
+            "kolik", "how many", "seznam", "list", "aktuální", "current",
+            "stav", "status", "info", "informace", "information"
+        ]
+        return any(pattern in user_input_lower for pattern in actionable_patterns)
+
     def start(self):
         """Starts the main consciousness loop."""
         try:
@@ -5,18 +5,31 @@ This is a thin adapter for MVP: tasks are expected to have a top-level
 """
 import asyncio
 import logging
+import time
 from typing import Any
 
-from core.simple_persistent_queue import SimplePersistentQueue
+from core.queue_backend import QueueBackend
 from core.kernel import Kernel
 from core.context import SharedContext
+from core.timeouts import WORKER_TASK, is_timeout
 
 
 class KernelWorker:
-    def __init__(self, kernel: Kernel, queue: SimplePersistentQueue, poll_interval: float = 1.0):
+    def __init__(
+        self,
+        kernel: Kernel,
+        queue: QueueBackend,
+        poll_interval: float = 1.0,
+        task_timeout: float = 300.0,
+        lease_seconds: float | None = None,
+    ):
         self.kernel = kernel
         self.queue = queue
         self.poll_interval = poll_interval
+        self.task_timeout = task_timeout
+        # Lease must outlive the task timeout, otherwise another worker could
+        # claim a task that is still running here
+        self.lease_seconds = lease_seconds if lease_seconds is not None else task_timeout + 60.0
         self.logger = logging.getLogger("sophia.kernel_worker")
         self._running = False
 
@@ -30,13 +43,14 @@ class KernelWorker:
         while self._running:
             try:
                 # Poll queue in thread to avoid blocking
-                item = await asyncio.to_thread(self.queue.dequeue_and_lock)
+                item = await asyncio.to_thread(self.queue.dequeue_and_lock, self.lease_seconds)
                 if not item:
                     await asyncio.sleep(self.poll_interval)
                     continue
 
                 task_id = item.get("id")
                 payload = item.get("payload", {})
+                lease = item.get("lease")
 
                 instruction = None
                 if isinstance(payload, dict):
@@ -67,15 +81,28 @@ class KernelWorker:
                     history=[],
                 )
 
+                # Learned from past tasks (core/timeouts.py); never below task_timeout nor past the lease
+                timeout = self.task_timeout
+                timeouts = getattr(self.kernel, "timeouts", None)
+                if timeouts is not None:
+                    timeout = min(
+                        timeouts.timeout_for(WORKER_TASK, self.task_timeout, floor=self.task_timeout),
+                        max(self.task_timeout, self.lease_seconds - 60.0),
+                    )
+                started = time.monotonic()
+
                 try:
                     # run with timeout to prevent blocking forever
                     # Use the full consciousness_loop in single-run mode so plans are
                     # fully executed (process_single_input intentionally doesn't run
                     # multi-step plan execution). The consciousness loop will exit
                     # after processing the single input.
-                    await asyncio.wait_for(self.kernel.consciousness_loop(single_run_input=instruction), timeout=300.0)
+                    await asyncio.wait_for(self.kernel.consciousness_loop(single_run_input=instruction), timeout=timeout)
+                    if timeouts is not None:
+                        timeouts.record(WORKER_TASK, time.monotonic() - started)
                     self.logger.info(f"Task {task_id} executed via consciousness_loop")
-                    await asyncio.to_thread(self.queue.mark_done, task_id)
+                    if not await asyncio.to_thread(self.queue.mark_done, task_id, lease):
+                        self.logger.warning(f"Task {task_id} finished after its lease was lost; result not recorded")
                     
                     # Log task completion to reflection journal
                     try:
@@ -85,8 +112,10 @@ class KernelWorker:
                         self.logger.debug(f"Reflection logging skipped: {refl_err}")
                         
                 except Exception as e:
+                    if timeouts is not None and is_timeout(e):
+                        timeouts.record(WORKER_TASK, time.monotonic() - started)
                     self.logger.error(f"Task {task_id} failed during execution: {e}")
-                    await asyncio.to_thread(self.queue.mark_failed, task_id, str(e))
+                    await asyncio.to_thread(self.queue.mark_failed, task_id, str(e), lease)
                     
                     # Log task failure to reflection journal
                     try:
@@ -96,7 +125,7 @@ class KernelWorker:
                         self.logger.debug(f"Reflection logging skipped: {refl_err}")
                 except Exception as e:
                     self.logger.error(f"Task {task_id} failed: {e}")
-                    await asyncio.to_thread(self.queue.mark_failed, task_id, str(e))
+                    await asyncio.to_thread(self.queue.mark_failed, task_id, str(e), lease)
 
             except asyncio.CancelledError:
                 self._running = False
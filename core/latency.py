@@ -0,0 +1,73 @@
+"""Latency statistics.
+
+LatencyHistogram is a constant-size streaming quantile estimate that can be
+persisted. core/timeouts.py keeps one per model (or pipeline) and derives
+request timeouts and hedging delays from it.
+"""
+import math
+from typing import Dict, Optional
+
+
+class LatencyHistogram:
+    """
+    Streaming quantile estimate over log-spaced buckets.
+
+    Constant memory and cheap to persist. Quantiles are bucket upper bounds,
+    so they overestimate by at most one bucket width (``GROWTH`` - 1, i.e.
+    20%). Every new sample decays the older ones by ``decay``, so the
+    estimate follows a model that got faster or slower.
+    """
+
+    MIN_SECONDS = 0.01
+    GROWTH = 1.2
+    BUCKETS = 72  # Up to ~0.01 * 1.2**72 s, i.e. about 1.4 h
+
+    def __init__(self, decay: float = 0.995):
+        self.decay = decay
+        self.counts = [0.0] * self.BUCKETS
+        self.samples = 0
+
+    @classmethod
+    def bucket_of(cls, seconds: float) -> int:
+        if seconds <= cls.MIN_SECONDS:
+            return 0
+        index = math.ceil(math.log(seconds / cls.MIN_SECONDS, cls.GROWTH))
+        return min(cls.BUCKETS - 1, index)
+
+    @classmethod
+    def upper_bound(cls, index: int) -> float:
+        return cls.MIN_SECONDS * cls.GROWTH ** index
+
+    def add(self, seconds: float) -> None:
+        if self.decay < 1.0:
+            self.counts = [count * self.decay for count in self.counts]
+        self.counts[self.bucket_of(seconds)] += 1.0
+        self.samples += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        total = sum(self.counts)
+        if total <= 0:
+            return None
+        target = q * total
+        cumulative = 0.0
+        for index, count in enumerate(self.counts):
+            cumulative += count
+            if cumulative >= target and count > 0:
+                return self.upper_bound(index)
+        return self.upper_bound(max(i for i, count in enumerate(self.counts) if count > 0))
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            "samples": self.samples,
+            "counts": {str(i): round(count, 6) for i, count in enumerate(self.counts) if count > 1e-6},
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, object], decay: float = 0.995) -> "LatencyHistogram":
+        histogram = cls(decay=decay)
+        histogram.samples = int(data.get("samples", 0))
+        for index, count in (data.get("counts") or {}).items():
+            index = int(index)
+            if 0 <= index < cls.BUCKETS:
+                histogram.counts[index] = float(count)
+        return histogram
@@ -0,0 +1,363 @@
+"""Content-addressed cache of LLM responses.
+
+The planner, task router, reflection and evaluation plugins often send the
+same request twice (re-classifying an identical prompt, retried planning).
+With the cache enabled, LLMTool and LocalLLMTool key each request on a
+SHA-256 of its canonical JSON form (provider, model, messages, tools,
+tool_choice, temperature, ...) and answer repeats from an in-memory LRU,
+backed by a SQLite store that survives restarts.
+
+Entries expire after a TTL chosen per operation type (the caller's
+``payload["cache_operation"]``, else its ``current_state``). Which requests
+are cached depends on the operation as well. A classification or plan is as
+good when repeated as when sampled again, so ``reusable_operations`` are
+cached at any temperature (including the provider's default, i.e. no
+temperature in the request). Other operations are cached only at an
+explicit temperature of 0, unless ``allow_nonzero_temperature`` is set.
+Errors are never cached.
+
+The async callers use alookup()/aput(), which read and write the SQLite
+store on a worker thread instead of the event loop.
+
+Configured in config/settings.yaml (off by default):
+
+    llm_cache:
+      enabled: true
+      db_path: ".data/llm_cache.sqlite"
+      max_entries: 512          # in-memory LRU size
+      default_ttl: 3600         # seconds; 0 disables caching for an operation
+      reusable_operations: [classification, planning]
+      ttls:
+        classification: 86400
+        planning: 900
+
+Hits, misses and bypasses are reported to the TelemetryHub.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+CACHE_NAME = "llm"
+DEFAULT_REUSABLE_OPERATIONS = ("classification", "planning")
+
+
+def canonical_key(request: Dict[str, Any]) -> str:
+    """SHA-256 of the request as canonical JSON (sorted keys, no whitespace)."""
+    encoded = json.dumps(request, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def encode_response(llm_response: Any) -> Optional[Dict[str, Any]]:
+    """
+    JSON-serialisable form of a payload["llm_response"] value.
+
+    Returns None for values that must not be cached (errors, unknown shapes).
+    """
+    if isinstance(llm_response, str):
+        return {"content": llm_response}
+    if isinstance(llm_response, list) and llm_response:
+        tool_calls = []
+        for call in llm_response:
+            function = getattr(call, "function", None)
+            name = getattr(function, "name", None)
+            if not isinstance(name, str):
+                return None
+            arguments = getattr(function, "arguments", None)
+            try:
+                json.dumps(arguments)
+            except (TypeError, ValueError):
+                return None
+            call_id = getattr(call, "id", None)
+            call_type = getattr(call, "type", None)
+            tool_calls.append(
+                {
+                    "id": call_id if isinstance(call_id, str) else None,
+                    "type": call_type if isinstance(call_type, str) else "function",
+                    "function": {"name": name, "arguments": arguments},
+                }
+            )
+        return {"tool_calls": tool_calls}
+    return None
+
+
+def decode_response(encoded: Dict[str, Any]) -> Any:
+    """Inverse of encode_response; tool calls come back with .function.name/.arguments."""
+    if "tool_calls" in encoded:
+        return [
+            SimpleNamespace(
+                id=call.get("id"),
+                type=call.get("type", "function"),
+                function=SimpleNamespace(**call["function"]),
+            )
+            for call in encoded["tool_calls"]
+        ]
+    return encoded.get("content", "")
+
+
+def cache_operation(context: Any) -> str:
+    """Operation type of an LLM call, selecting its TTL."""
+    payload = getattr(context, "payload", None) or {}
+    return str(payload.get("cache_operation") or getattr(context, "current_state", None) or "default").lower()
+
+
+class LLMResponseCache:
+    def __init__(
+        self,
+        enabled: bool = False,
+        db_path: str | Path = ".data/llm_cache.sqlite",
+        max_entries: int = 512,
+        default_ttl: float = 3600.0,
+        ttls: Optional[Dict[str, float]] = None,
+        reusable_operations: Iterable[str] = DEFAULT_REUSABLE_OPERATIONS,
+        allow_nonzero_temperature: bool = False,
+        telemetry: Any = None,
+    ):
+        """
+        Args:
+            enabled: Master switch; a disabled cache bypasses every request.
+            db_path: SQLite file of the persistent store (None keeps memory only).
+            max_entries: Size of the in-memory LRU.
+            default_ttl: Seconds an entry lives for operations without a TTL in ttls.
+            ttls: Per-operation TTLs in seconds, keyed by lower-case operation name.
+            reusable_operations: Operations cached whatever their temperature.
+            allow_nonzero_temperature: Cache every operation whatever its temperature.
+            telemetry: TelemetryHub receiving hit/miss/bypass counts.
+        """
+        self.enabled = enabled
+        self.db_path = Path(db_path) if db_path else None
+        self.max_entries = max(1, int(max_entries))
+        self.default_ttl = float(default_ttl)
+        self.ttls = {k.lower(): float(v) for k, v in (ttls or {}).items()}
+        self.reusable_operations = {op.lower() for op in reusable_operations}
+        self.allow_nonzero_temperature = allow_nonzero_temperature
+        self.telemetry = telemetry
+        self._memory: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.RLock()
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]], telemetry: Any = None) -> "LLMResponseCache":
+        """Build from the llm_cache section of settings.yaml."""
+        cache = cls(telemetry=telemetry)
+        cache.configure(config)
+        return cache
+
+    def configure(self, config: Optional[Dict[str, Any]]) -> None:
+        """Apply the llm_cache section of settings.yaml (at startup and on reload)."""
+        config = config or {}
+        with self._lock:
+            self.enabled = bool(config.get("enabled", False))
+            db_path = config.get("db_path", ".data/llm_cache.sqlite")
+            new_path = Path(db_path) if db_path else None
+            if new_path != self.db_path:
+                self._close()
+                self.db_path = new_path
+            self.max_entries = max(1, int(config.get("max_entries", 512)))
+            self.default_ttl = float(config.get("default_ttl", 3600))
+            self.ttls = {k.lower(): float(v) for k, v in (config.get("ttls", {}) or {}).items()}
+            reusable = config.get("reusable_operations", DEFAULT_REUSABLE_OPERATIONS) or ()
+            self.reusable_operations = {str(op).lower() for op in reusable}
+            self.allow_nonzero_temperature = bool(config.get("allow_nonzero_temperature", False))
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    # --- Keys -------------------------------------------------------------
+
+    def ttl_for(self, operation: str) -> float:
+        return self.ttls.get((operation or "").lower(), self.default_ttl)
+
+    def key_for(self, request: Dict[str, Any], operation: str) -> Optional[str]:
+        """
+        Cache key of a request, or None if it must bypass the cache.
+
+        Args:
+            request: Everything that determines the response (provider, model,
+                messages, tools, temperature, ...).
+            operation: Operation type selecting the TTL.
+        """
+        if not self.enabled:
+            return None
+        temperature = request.get("temperature")
+        deterministic = temperature is not None and float(temperature) <= 0
+        reusable = (operation or "").lower() in self.reusable_operations
+        if self.ttl_for(operation) <= 0 or not (deterministic or reusable or self.allow_nonzero_temperature):
+            self._record(operation, "bypass")
+            return None
+        return canonical_key(request)
+
+    def lookup(
+        self, request: Dict[str, Any], operation: str
+    ) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
+        """
+        key_for() and get() in one step.
+
+        Returns:
+            (key, entry): key is None if the request bypasses the cache;
+            entry is None on a miss.
+        """
+        key = self.key_for(request, operation)
+        if key is None:
+            return None, None
+        return key, self.get(key, operation)
+
+    async def alookup(
+        self, request: Dict[str, Any], operation: str
+    ) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
+        """lookup() for coroutines: the entry is read (SQLite store included) on a worker thread."""
+        key = self.key_for(request, operation)
+        if key is None:
+            return None, None
+        return key, await asyncio.to_thread(self.get, key, operation)
+
+    # --- Lookup / store ---------------------------------------------------
+
+    def get(self, key: str, operation: str = "") -> Optional[Dict[str, Any]]:
+        """
+        Cached entry for a key: {"llm_response": ..., "metadata": {...}}.
+
+        Returns None on a miss or when the entry expired.
+        """
+        now = time.time()
+        entry = None
+        with self._lock:
+            cached = self._memory.get(key)
+            if cached is not None:
+                expires_at, entry = cached
+                if expires_at <= now:
+                    del self._memory[key]
+                    entry = None
+                else:
+                    self._memory.move_to_end(key)
+            if entry is None:
+                loaded = self._load(key, now)
+                if loaded is not None:
+                    expires_at, entry = loaded
+                    self._remember(key, expires_at, entry)
+        self._record(operation, "hit" if entry is not None else "miss")
+        if entry is None:
+            return None
+        return {
+            "llm_response": decode_response(entry["response"]),
+            "metadata": dict(entry.get("metadata") or {}),
+        }
+
+    def put(
+        self,
+        key: str,
+        llm_response: Any,
+        metadata: Optional[Dict[str, Any]] = None,
+        operation: str = "",
+    ) -> bool:
+        """Store a successful response; returns False if it cannot be cached."""
+        encoded = encode_response(llm_response)
+        if encoded is None:
+            return False
+        entry = {"response": encoded, "metadata": metadata or {}}
+        expires_at = time.time() + self.ttl_for(operation)
+        with self._lock:
+            self._remember(key, expires_at, entry)
+            self._store(key, operation, expires_at, entry)
+        return True
+
+    async def aput(
+        self,
+        key: str,
+        llm_response: Any,
+        metadata: Optional[Dict[str, Any]] = None,
+        operation: str = "",
+    ) -> bool:
+        """put() for coroutines: the SQLite store is written on a worker thread."""
+        return await asyncio.to_thread(self.put, key, llm_response, metadata, operation)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            conn = self._connect()
+            if conn is not None:
+                conn.execute("DELETE FROM llm_cache")
+                conn.commit()
+
+    def _remember(self, key: str, expires_at: float, entry: Dict[str, Any]) -> None:
+        self._memory[key] = (expires_at, entry)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _record(self, operation: str, outcome: str) -> None:
+        record = getattr(self.telemetry, "record_cache_lookup", None)
+        if callable(record):
+            record(cache=CACHE_NAME, operation=(operation or "default").lower(), outcome=outcome)
+
+    # --- SQLite store -----------------------------------------------------
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        if self.db_path is None:
+            return None
+        if self._conn is None:
+            try:
+                self.db_path.parent.mkdir(parents=True, exist_ok=True)
+                self._conn = sqlite3.connect(str(self.db_path), timeout=5, check_same_thread=False)
+                self._conn.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS llm_cache (
+                        key TEXT PRIMARY KEY,
+                        operation TEXT,
+                        expires_at REAL,
+                        entry TEXT
+                    )
+                    """
+                )
+                self._conn.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_llm_cache_expires ON llm_cache (expires_at)"
+                )
+                self._conn.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (time.time(),))
+                self._conn.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"LLM cache store unavailable ({self.db_path}): {e}")
+                self._conn = None
+                self.db_path = None
+        return self._conn
+
+    def _load(self, key: str, now: float) -> Optional[Tuple[float, Dict[str, Any]]]:
+        conn = self._connect()
+        if conn is None:
+            return None
+        try:
+            row = conn.execute(
+                "SELECT expires_at, entry FROM llm_cache WHERE key = ? AND expires_at > ?",
+                (key, now),
+            ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"LLM cache read failed: {e}")
+            return None
+        if row is None:
+            return None
+        return row[0], json.loads(row[1])
+
+    def _store(self, key: str, operation: str, expires_at: float, entry: Dict[str, Any]) -> None:
+        conn = self._connect()
+        if conn is None:
+            return
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, operation, expires_at, entry) VALUES (?, ?, ?, ?)",
+                (key, (operation or "").lower(), expires_at, json.dumps(entry)),
+            )
+            conn.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"LLM cache write failed: {e}")
+
+    def _close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
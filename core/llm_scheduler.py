@@ -0,0 +1,177 @@
+"""Priority scheduling of local model generations.
+
+A local runtime such as Ollama effectively runs one generation per model at
+a time, so whoever asks first is served first: a benchmark run or a notes
+extraction can keep a live WebUI user waiting for minutes. The scheduler
+gives every model a number of generation slots (``max_concurrency``,
+overridable per model) and hands free slots to waiting requests by priority
+(interactive, then planning, then background) and in arrival order within
+a priority.
+
+Queued lower-priority work is therefore deferred whenever a user request
+arrives. With ``preempt`` set, an interactive request that finds all slots
+busy also cancels one running background generation; that generation goes
+back into the queue and is restarted once a slot is free again (cancelling
+the HTTP request makes Ollama stop generating).
+"""
+import asyncio
+import heapq
+import itertools
+import logging
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE = 0
+PLANNING = 1
+BACKGROUND = 2
+
+PRIORITIES = {"interactive": INTERACTIVE, "planning": PLANNING, "background": BACKGROUND}
+_PLANNING_OPERATIONS = {"planning", "classification"}
+
+
+def priority_of(context: Any) -> int:
+    """
+    Scheduling priority of an LLM call.
+
+    payload["llm_priority"] ("interactive", "planning", "background") wins;
+    otherwise calls marked latency_critical (a user is waiting) are
+    interactive, planning/classification calls are planning, and everything
+    else is background.
+    """
+    payload = getattr(context, "payload", None) or {}
+    explicit = payload.get("llm_priority")
+    if isinstance(explicit, str) and explicit.lower() in PRIORITIES:
+        return PRIORITIES[explicit.lower()]
+    if payload.get("latency_critical"):
+        return INTERACTIVE
+    operation = str(payload.get("cache_operation") or getattr(context, "current_state", "") or "")
+    if operation.lower() in _PLANNING_OPERATIONS:
+        return PLANNING
+    return BACKGROUND
+
+
+@dataclass(eq=False)
+class _Slot:
+    priority: int
+    task: Optional[asyncio.Future] = None
+    preempted: bool = False
+
+
+@dataclass(order=True)
+class _Waiter:
+    priority: int
+    seq: int
+    future: asyncio.Future = field(compare=False)
+
+
+@dataclass
+class _ModelQueue:
+    running: List[_Slot] = field(default_factory=list)
+    waiters: List[_Waiter] = field(default_factory=list)  # heap
+
+
+class GenerationScheduler:
+    def __init__(
+        self,
+        max_concurrency: int = 1,
+        model_concurrency: Optional[Dict[str, int]] = None,
+        preempt: bool = True,
+    ):
+        """
+        Args:
+            max_concurrency: Generation slots per model.
+            model_concurrency: Slots of individual models, overriding max_concurrency.
+            preempt: Let interactive requests cancel and requeue running background work.
+        """
+        self.max_concurrency = max(1, max_concurrency)
+        self.model_concurrency = dict(model_concurrency or {})
+        self.preempt = preempt
+        self.preempted = 0
+        self._queues: Dict[str, _ModelQueue] = {}
+        self._seq = itertools.count()
+
+    def limit_for(self, model: str) -> int:
+        return max(1, int(self.model_concurrency.get(model, self.max_concurrency)))
+
+    def queued(self, model: str) -> int:
+        queue = self._queues.get(model)
+        return sum(1 for w in queue.waiters if not w.future.done()) if queue else 0
+
+    def running(self, model: str) -> int:
+        queue = self._queues.get(model)
+        return len(queue.running) if queue else 0
+
+    @asynccontextmanager
+    async def slot(self, model: str, priority: int) -> AsyncIterator[None]:
+        """Hold a generation slot of model (never preempted), e.g. while streaming."""
+        slot = await self._acquire(model, priority)
+        try:
+            yield
+        finally:
+            self._release(model, slot)
+
+    async def run(self, model: str, priority: int, call: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run call() in a generation slot of model.
+
+        Background calls may be preempted by interactive ones; call() is then
+        invoked again once the call gets a slot back, so it must be safe to retry.
+        """
+        while True:
+            slot = await self._acquire(model, priority)
+            slot.task = asyncio.ensure_future(call())
+            try:
+                return await slot.task
+            except asyncio.CancelledError:
+                if not slot.preempted or asyncio.current_task().cancelling():
+                    raise
+                logger.info(f"Background generation on '{model}' preempted by an interactive request, requeued")
+            finally:
+                self._release(model, slot)
+
+    async def _acquire(self, model: str, priority: int) -> _Slot:
+        queue = self._queues.setdefault(model, _ModelQueue())
+        limit = self.limit_for(model)
+        if len(queue.running) < limit and not any(not w.future.done() for w in queue.waiters):
+            slot = _Slot(priority)
+            queue.running.append(slot)
+            return slot
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(queue.waiters, _Waiter(priority, next(self._seq), future))
+        if priority == INTERACTIVE and self.preempt:
+            self._preempt_background(model, queue)
+        try:
+            return await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Granted a slot just as the caller gave up
+                self._release(model, future.result())
+            raise
+
+    def _preempt_background(self, model: str, queue: _ModelQueue) -> None:
+        if len(queue.running) < self.limit_for(model):
+            return
+        for slot in queue.running:
+            if slot.priority == BACKGROUND and slot.task is not None and not slot.preempted:
+                slot.preempted = True
+                self.preempted += 1
+                slot.task.cancel()
+                return
+
+    def _release(self, model: str, slot: _Slot) -> None:
+        queue = self._queues.get(model)
+        if queue is None or slot not in queue.running:
+            return
+        queue.running.remove(slot)
+        limit = self.limit_for(model)
+        while queue.waiters and len(queue.running) < limit:
+            waiter = heapq.heappop(queue.waiters)
+            if waiter.future.done():
+                continue  # Caller cancelled while waiting
+            granted = _Slot(waiter.priority)
+            queue.running.append(granted)
+            waiter.future.set_result(granted)
@@ -0,0 +1,229 @@
+"""Which Ollama models are loaded, and keeping the right ones loaded.
+
+Ollama loads a model on its first request and unloads it after the
+request's ``keep_alive`` (5 minutes by default), so the first request after
+idle pays the full load time - many seconds for llama3.1:8b, far more for
+the 9 GB escalation model. ModelResidency
+
+* sends a deliberate keep_alive with every request (longer for the tier-1
+  model than for the escalation model),
+* preloads models (an empty /api/generate request loads a model without
+  generating), at startup or speculatively before an escalation,
+* tracks which models are resident (from /api/ps and its own requests) and,
+  with a RAM budget, unloads the least recently used idle models before
+  loading one that would not fit.
+"""
+import asyncio
+import logging
+import re
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, AsyncIterator, Callable, Dict, Optional, Union
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+KeepAlive = Union[str, int, float]
+
+_DURATION = re.compile(r"^\s*(-?\d+(?:\.\d+)?)\s*([smh]?)\s*$")
+_UNITS = {"": 1, "s": 1, "m": 60, "h": 3600}
+
+
+def keep_alive_seconds(keep_alive: KeepAlive) -> float:
+    """Seconds of an Ollama keep_alive ("30m", "1h", 300, -1 = forever)."""
+    if isinstance(keep_alive, (int, float)):
+        seconds = float(keep_alive)
+    else:
+        match = _DURATION.match(str(keep_alive))
+        if not match:
+            raise ValueError(f"Invalid keep_alive: {keep_alive!r}")
+        seconds = float(match.group(1)) * _UNITS[match.group(2)]
+    return float("inf") if seconds < 0 else seconds
+
+
+@dataclass
+class ResidentModel:
+    name: str
+    size_bytes: int = 0
+    expires_at: float = 0.0  # time.time()
+    last_used: float = 0.0
+    in_use: int = 0
+
+
+class ModelResidency:
+    def __init__(
+        self,
+        base_url: str,
+        client: Callable[[], httpx.AsyncClient],
+        keep_alive: KeepAlive = "30m",
+        model_keep_alive: Optional[Dict[str, KeepAlive]] = None,
+        ram_budget_gb: Optional[float] = None,
+    ):
+        """
+        Args:
+            base_url: Ollama base URL.
+            client: Returns the HTTP client to use (the plugin's pooled client).
+            keep_alive: How long Ollama keeps a model loaded after a request.
+            model_keep_alive: keep_alive of individual models.
+            ram_budget_gb: Memory resident models may use together; None leaves
+                eviction to Ollama.
+        """
+        self.base_url = base_url.rstrip("/")
+        self._client = client
+        self.keep_alive = keep_alive
+        self.model_keep_alive = dict(model_keep_alive or {})
+        self.ram_budget_bytes = int(ram_budget_gb * 1024**3) if ram_budget_gb else None
+        self._resident: Dict[str, ResidentModel] = {}
+        self._sizes: Dict[str, int] = {}  # On-disk size per model, from /api/tags
+        self._warming: Dict[str, asyncio.Task] = {}
+
+    def keep_alive_for(self, model: str) -> KeepAlive:
+        return self.model_keep_alive.get(model, self.keep_alive)
+
+    def is_resident(self, model: str) -> bool:
+        entry = self._resident.get(model)
+        return entry is not None and (entry.in_use > 0 or entry.expires_at > time.time())
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        now = time.time()
+        return {
+            name: {
+                "size_gb": round(entry.size_bytes / 1024**3, 2),
+                "in_use": entry.in_use,
+                "expires_in_seconds": None if entry.expires_at == float("inf") else round(entry.expires_at - now),
+            }
+            for name, entry in self._resident.items()
+            if self.is_resident(name)
+        }
+
+    # --- Ollama state ---------------------------------------------------------
+
+    async def refresh(self) -> None:
+        """Re-read the loaded models from Ollama (/api/ps)."""
+        response = await self._client().get(f"{self.base_url}/api/ps", timeout=10)
+        response.raise_for_status()
+        listed = set()
+        for info in response.json().get("models", []) or []:
+            name = info.get("name") or info.get("model")
+            if not name:
+                continue
+            listed.add(name)
+            # Update entries in place: use() holds on to its entry to release it
+            entry = self._resident.setdefault(name, ResidentModel(name=name))
+            entry.size_bytes = int(info.get("size") or 0)
+            entry.expires_at = _parse_expiry(info.get("expires_at"), self.keep_alive_for(name))
+        # Models we are generating with stay tracked even if Ollama has not listed them yet
+        for name in [n for n, e in self._resident.items() if n not in listed and not e.in_use]:
+            del self._resident[name]
+
+    async def _size_of(self, model: str) -> int:
+        if model not in self._sizes:
+            response = await self._client().get(f"{self.base_url}/api/tags", timeout=10)
+            response.raise_for_status()
+            for info in response.json().get("models", []) or []:
+                if info.get("name"):
+                    self._sizes[info["name"]] = int(info.get("size") or 0)
+        return self._sizes.get(model, 0)
+
+    # --- Loading / unloading --------------------------------------------------
+
+    async def ensure_room(self, model: str) -> None:
+        """Unload idle models (least recently used first) until model fits the RAM budget."""
+        if self.ram_budget_bytes is None or self.is_resident(model):
+            return
+        try:
+            await self.refresh()
+            needed = await self._size_of(model)
+        except (httpx.HTTPError, ValueError) as e:
+            logger.warning(f"Could not check loaded models before loading '{model}': {e}")
+            return
+        resident = [e for e in self._resident.values() if self.is_resident(e.name) and e.name != model]
+        used = sum(e.size_bytes for e in resident)
+        for entry in sorted(resident, key=lambda e: e.last_used):
+            if used + needed <= self.ram_budget_bytes:
+                break
+            if entry.in_use:
+                continue
+            await self.unload(entry.name)
+            used -= entry.size_bytes
+        if used + needed > self.ram_budget_bytes:
+            logger.warning(
+                f"Loading '{model}' exceeds the RAM budget "
+                f"({(used + needed) / 1024**3:.1f} of {self.ram_budget_bytes / 1024**3:.1f} GB)"
+            )
+
+    async def unload(self, model: str) -> None:
+        logger.info(f"Unloading local model '{model}'")
+        response = await self._client().post(
+            f"{self.base_url}/api/generate", json={"model": model, "keep_alive": 0}, timeout=30
+        )
+        response.raise_for_status()
+        self._resident.pop(model, None)
+
+    async def warm(self, model: str, timeout: float = 600) -> None:
+        """Load model now (no generation) so its next request does not wait for the load."""
+        task = self._warming.get(model)
+        if task is None:
+            task = asyncio.ensure_future(self._warm(model, timeout))
+            self._warming[model] = task
+            task.add_done_callback(lambda _t, model=model: self._warming.pop(model, None))
+        await asyncio.shield(task)
+
+    async def _warm(self, model: str, timeout: float) -> None:
+        if self.is_resident(model):
+            return
+        async with self.use(model) as keep_alive:
+            started = time.monotonic()
+            response = await self._client().post(
+                f"{self.base_url}/api/generate",
+                json={"model": model, "keep_alive": keep_alive},
+                timeout=timeout,
+            )
+            response.raise_for_status()
+        logger.info(f"Local model '{model}' loaded in {time.monotonic() - started:.1f}s")
+
+    def prewarm(self, model: str) -> None:
+        """Start warming model in the background (errors are only logged)."""
+        if self.is_resident(model) or model in self._warming:
+            return
+
+        async def run() -> None:
+            try:
+                await self.warm(model)
+            except Exception as e:
+                logger.warning(f"Pre-warming local model '{model}' failed: {e}")
+
+        asyncio.ensure_future(run())
+
+    @asynccontextmanager
+    async def use(self, model: str) -> AsyncIterator[KeepAlive]:
+        """
+        Wrap one request to model: makes room for it first and records it as
+        resident afterwards. Yields the keep_alive to send with the request.
+        """
+        await self.ensure_room(model)
+        entry = self._resident.setdefault(model, ResidentModel(name=model))
+        entry.in_use += 1
+        keep_alive = self.keep_alive_for(model)
+        try:
+            yield keep_alive
+        finally:
+            entry.in_use -= 1
+            entry.last_used = time.time()
+            entry.expires_at = entry.last_used + keep_alive_seconds(keep_alive)
+            if not entry.size_bytes:
+                entry.size_bytes = self._sizes.get(model, 0)
+
+
+def _parse_expiry(value: Optional[str], keep_alive: KeepAlive) -> float:
+    if value:
+        # Ollama reports nanoseconds; datetime takes at most microseconds
+        trimmed = re.sub(r"(\.\d{6})\d+", r"\1", value).replace("Z", "+00:00")
+        try:
+            return datetime.fromisoformat(trimmed).timestamp()
+        except ValueError:
+            pass
+    return time.time() + keep_alive_seconds(keep_alive)
@@ -0,0 +1,128 @@
+"""Dependency graph and concurrent scheduler for plan steps.
+
+A plan step depends on another when its arguments reference that step's
+result (``${step_N}``, ``${step_N.field}`` or the legacy ``$result.step_N``,
+see core.plan_template).
+Steps whose tool method receives the shared ``context`` also depend on every
+earlier step, because the executor feeds them the conversation history
+(including previous step outputs) and they may mutate the shared context.
+
+Independent steps are run concurrently up to a parallelism cap. With a cap
+of 1 the scheduler runs steps in plan order, exactly like the old sequential
+executor.
+"""
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set
+
+from core.plan_template import compile_template
+
+logger = logging.getLogger(__name__)
+
+
+def find_step_references(value: Any) -> Set[int]:
+    """Return the (1-based) step numbers referenced anywhere inside value."""
+    return set(compile_template(value).references)
+
+
+def build_dependency_graph(
+    step_references: List[Set[int]], barrier_steps: Iterable[int] = ()
+) -> Dict[int, Set[int]]:
+    """
+    Map each step number (1-based) to the earlier step numbers it must wait for.
+
+    Args:
+        step_references: Referenced step numbers per step, in plan order
+            (CompiledPlan.step_references).
+        barrier_steps: Step numbers that must run after all earlier steps
+            (e.g. steps whose method receives the shared context).
+    """
+    barriers = set(barrier_steps)
+    graph: Dict[int, Set[int]] = {}
+    for number, references in enumerate(step_references, start=1):
+        # Forward and self references can never be satisfied; ignore them for scheduling
+        deps = {ref for ref in references if 0 < ref < number}
+        if number in barriers:
+            deps |= set(range(1, number))
+        graph[number] = deps
+    return graph
+
+
+@dataclass
+class StepOutcome:
+    """Result of one scheduled step; skipped steps were never started."""
+
+    success: bool
+    skipped: bool = False
+
+
+async def run_plan_graph(
+    graph: Dict[int, Set[int]],
+    run_step: Callable[[int], Awaitable[bool]],
+    max_parallel: int = 1,
+    stop_on_failure: bool = True,
+) -> Dict[int, StepOutcome]:
+    """
+    Run steps as soon as their dependencies finished, at most max_parallel at once.
+
+    Args:
+        graph: Output of build_dependency_graph.
+        run_step: Coroutine executing one step number, returning success.
+        max_parallel: Upper bound on concurrently running steps.
+        stop_on_failure: Do not start further steps once any step failed
+            (the legacy executor aborts the plan at the first failure).
+
+    Returns:
+        Outcome per step number. Steps that were not started are marked skipped.
+    """
+    max_parallel = max(1, int(max_parallel))
+    outcomes: Dict[int, StepOutcome] = {}
+    running: Dict[asyncio.Task, int] = {}
+    pending = sorted(graph)
+    failed = False
+
+    try:
+        while pending or running:
+            if not (failed and stop_on_failure):
+                # Launch ready steps in plan order so a cap of 1 is strictly sequential
+                for number in list(pending):
+                    if len(running) >= max_parallel:
+                        break
+                    if graph[number] <= set(outcomes):
+                        pending.remove(number)
+                        running[asyncio.ensure_future(run_step(number))] = number
+            elif pending:
+                for number in pending:
+                    outcomes[number] = StepOutcome(success=False, skipped=True)
+                pending = []
+
+            if not running:
+                # Remaining steps wait on something that can never finish
+                for number in pending:
+                    outcomes[number] = StepOutcome(success=False, skipped=True)
+                break
+
+            done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                number = running.pop(task)
+                try:
+                    success = bool(task.result())
+                except Exception as e:
+                    logger.error(
+                        f"Plan step {number} raised: {e}", extra={"plugin_name": "Kernel"}
+                    )
+                    success = False
+                outcomes[number] = StepOutcome(success=success)
+                failed = failed or not success
+    finally:
+        for task in running:
+            task.cancel()
+
+    return outcomes
+
+
+def first_failed_step(outcomes: Dict[int, StepOutcome]) -> Optional[int]:
+    """Lowest step number that ran and failed, if any."""
+    failed = [n for n, o in outcomes.items() if not o.success and not o.skipped]
+    return min(failed) if failed else None
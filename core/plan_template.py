@@ -0,0 +1,192 @@
+"""Compiled step-reference templates for plan arguments.
+
+Plan steps can use results of earlier steps in their arguments:
+
+    ${step_N}          the whole output of step N
+    ${step_N.field}    an attribute or dict key of that output
+    $result.step_N     legacy spelling of ${step_N}
+
+Arguments are parsed once per plan into a small template tree (dicts, lists,
+literals, references and interpolated strings) that resolves in a single
+pass. A string consisting of exactly one reference resolves to the referenced
+value itself, keeping its type; references embedded in longer text are
+interpolated with str(). References that can never be satisfied (unknown,
+self or forward steps) are reported by CompiledPlan.unresolved_references()
+before execution starts.
+"""
+import logging
+import re
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+STEP_REFERENCE_PATTERN = re.compile(
+    r"\$\{step_(\d+)(?:\.(\w+))?\}|\$result\.step_(\d+)(?!\w|\.\w)"
+)
+
+_MISSING = object()
+
+
+class Template(ABC):
+    """A compiled argument value."""
+
+    references: Set[int]
+
+    @abstractmethod
+    def resolve(self, outputs: Dict[int, Any]) -> Any:
+        """The argument value with every reference replaced by its step output."""
+
+
+@dataclass
+class Literal(Template):
+    value: Any
+    references: Set[int] = field(default_factory=set)
+
+    def resolve(self, outputs: Dict[int, Any]) -> Any:
+        return self.value
+
+
+@dataclass
+class Reference(Template):
+    """A single ${step_N[.field]} reference; resolves to the typed value."""
+
+    step: int
+    field_name: Optional[str]
+    source: str
+    references: Set[int] = field(default_factory=set)
+
+    def __post_init__(self) -> None:
+        self.references = {self.step}
+
+    def lookup(self, outputs: Dict[int, Any]) -> Any:
+        """Referenced value, or _MISSING when step N has produced no output."""
+        if self.step not in outputs:
+            logger.error(
+                f"Could not find result for step {self.step}", extra={"plugin_name": "Kernel"}
+            )
+            return _MISSING
+        output = outputs[self.step]
+        if not self.field_name:
+            return output
+        if isinstance(output, dict) and self.field_name in output:
+            return output[self.field_name]
+        if hasattr(output, self.field_name):
+            return getattr(output, self.field_name)
+        logger.warning(
+            f"Field '{self.field_name}' not found in step {self.step} output",
+            extra={"plugin_name": "Kernel"},
+        )
+        return output
+
+    def resolve(self, outputs: Dict[int, Any]) -> Any:
+        value = self.lookup(outputs)
+        # Leave the placeholder in place so the failure stays visible downstream
+        return self.source if value is _MISSING else value
+
+
+@dataclass
+class Interpolation(Template):
+    """Text with embedded references; always resolves to a string."""
+
+    parts: List[Any]  # str or Reference
+    references: Set[int] = field(default_factory=set)
+
+    def __post_init__(self) -> None:
+        self.references = {p.step for p in self.parts if isinstance(p, Reference)}
+
+    def resolve(self, outputs: Dict[int, Any]) -> str:
+        chunks = []
+        for part in self.parts:
+            if isinstance(part, Reference):
+                value = part.lookup(outputs)
+                chunks.append(part.source if value is _MISSING else str(value))
+            else:
+                chunks.append(part)
+        return "".join(chunks)
+
+
+@dataclass
+class DictTemplate(Template):
+    items: List[Tuple[Any, Template]]
+    references: Set[int] = field(default_factory=set)
+
+    def __post_init__(self) -> None:
+        self.references = set().union(*(t.references for _, t in self.items))
+
+    def resolve(self, outputs: Dict[int, Any]) -> Dict[Any, Any]:
+        return {key: template.resolve(outputs) for key, template in self.items}
+
+
+@dataclass
+class ListTemplate(Template):
+    items: List[Template]
+    references: Set[int] = field(default_factory=set)
+
+    def __post_init__(self) -> None:
+        self.references = set().union(*(t.references for t in self.items))
+
+    def resolve(self, outputs: Dict[int, Any]) -> List[Any]:
+        return [template.resolve(outputs) for template in self.items]
+
+
+def compile_template(value: Any) -> Template:
+    """Parse an argument value (any JSON-like structure) into a template tree."""
+    if isinstance(value, dict):
+        return DictTemplate([(k, compile_template(v)) for k, v in value.items()])
+    if isinstance(value, (list, tuple)):
+        return ListTemplate([compile_template(v) for v in value])
+    if not isinstance(value, str) or "$" not in value:
+        return Literal(value)
+
+    parts: List[Any] = []
+    position = 0
+    for match in STEP_REFERENCE_PATTERN.finditer(value):
+        if match.start() > position:
+            parts.append(value[position : match.start()])
+        new_step, field_name, old_step = match.groups()
+        parts.append(Reference(int(new_step or old_step), field_name, match.group(0)))
+        position = match.end()
+    if not parts:
+        return Literal(value)
+    if position < len(value):
+        parts.append(value[position:])
+    if len(parts) == 1:
+        return parts[0]
+    return Interpolation(parts)
+
+
+@dataclass
+class CompiledPlan:
+    """Argument templates for every step of a plan (index 0 is step 1)."""
+
+    templates: List[Template]
+
+    @property
+    def step_references(self) -> List[Set[int]]:
+        return [t.references for t in self.templates]
+
+    def unresolved_references(self) -> List[str]:
+        """Describe references to steps that cannot have run before the referencing step."""
+        problems = []
+        for number, template in enumerate(self.templates, start=1):
+            for ref in sorted(template.references):
+                if ref < 1 or ref > len(self.templates):
+                    problems.append(f"step {number} references unknown step {ref}")
+                elif ref >= number:
+                    problems.append(f"step {number} references later step {ref}")
+        return problems
+
+    def resolve_arguments(self, step_number: int, outputs: Dict[int, Any]) -> Any:
+        return self.templates[step_number - 1].resolve(outputs)
+
+
+def compile_plan(plan: List[Dict[str, Any]]) -> CompiledPlan:
+    """Compile the arguments of every plan step once."""
+    return CompiledPlan(
+        [
+            compile_template((step.get("arguments") if isinstance(step, dict) else None) or {})
+            for step in plan
+        ]
+    )
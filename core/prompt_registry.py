@@ -0,0 +1,225 @@
+"""Registry of the prompt templates in config/prompts.
+
+Every ``config/prompts/**/*.txt`` file is read once and its ``str.format``
+fields are parsed up front, so rendering only joins precompiled segments.
+A template re-checks its file's mtime at most every ``check_interval``
+seconds when it is used and reloads itself in place when the file changed,
+so holders of a PromptTemplate always see the current text. Each template
+carries a content hash that changes with its text, for caches keyed on
+prompts.
+
+Templates are addressed by their path relative to the prompts directory
+without the ``.txt`` suffix, e.g. ``"json_repair_prompt"`` or
+``"optimized/test_task_v1"``.
+"""
+import hashlib
+import logging
+import os
+import string
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# (literal_text, field_name, format_spec, conversion) as produced by string.Formatter.parse
+Segment = Tuple[str, Optional[str], str, Optional[str]]
+
+_CONVERSIONS = {"s": str, "r": repr, "a": ascii}
+
+
+@dataclass(frozen=True)
+class _Compiled:
+    text: str
+    content_hash: str
+    segments: Optional[List[Segment]]  # None if text is not a valid format string
+    fields: Tuple[str, ...]
+    simple: bool  # every field is a plain name without nested specs
+
+
+def _compile(text: str) -> _Compiled:
+    content_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    try:
+        segments = list(string.Formatter().parse(text))
+    except ValueError:
+        return _Compiled(text, content_hash, None, (), False)
+    fields = []
+    simple = True
+    for _, field_name, format_spec, _ in segments:
+        if field_name is None:
+            continue
+        fields.append(field_name)
+        if not field_name.isidentifier() or "{" in (format_spec or ""):
+            simple = False
+    return _Compiled(text, content_hash, segments, tuple(dict.fromkeys(fields)), simple)
+
+
+class PromptTemplate:
+    """A prompt file with precompiled format fields; reloads itself when the file changes."""
+
+    def __init__(
+        self,
+        name: str,
+        text: str,
+        path: Optional[Path] = None,
+        check_interval: float = 2.0,
+    ):
+        self.name = name
+        self.path = path
+        self.check_interval = check_interval
+        self._compiled = _compile(text)
+        self._stamp = self._stat() if path else None
+        self._checked_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def inline(cls, text: str, name: str = "<inline>") -> "PromptTemplate":
+        """A template not backed by a file (e.g. a built-in fallback prompt)."""
+        return cls(name, text)
+
+    def _stat(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def refresh(self, force: bool = False) -> bool:
+        """Reload the file if it changed on disk; returns True if the text changed."""
+        if self.path is None:
+            return False
+        now = time.monotonic()
+        if not force and now - self._checked_at < self.check_interval:
+            return False
+        with self._lock:
+            self._checked_at = now
+            stamp = self._stat()
+            if stamp is None or (stamp == self._stamp and not force):
+                return False
+            try:
+                with open(str(self.path), "r", encoding="utf-8") as f:
+                    text = f.read()
+            except OSError as e:
+                logger.warning(f"Could not reload prompt '{self.path}': {e}")
+                return False
+            self._stamp = stamp
+            if text == self._compiled.text:
+                return False
+            self._compiled = _compile(text)
+        logger.info(f"Prompt '{self.name}' reloaded from {self.path}")
+        return True
+
+    @property
+    def text(self) -> str:
+        self.refresh()
+        return self._compiled.text
+
+    @property
+    def content_hash(self) -> str:
+        """SHA-256 of the current text."""
+        self.refresh()
+        return self._compiled.content_hash
+
+    @property
+    def fields(self) -> Tuple[str, ...]:
+        """Names of the str.format fields, in order of first use."""
+        self.refresh()
+        return self._compiled.fields
+
+    def render(self, **kwargs: Any) -> str:
+        """Equivalent to text.format(**kwargs), using the precompiled segments."""
+        self.refresh()
+        compiled = self._compiled
+        if compiled.segments is None:
+            raise ValueError(f"Prompt '{self.name}' is not a valid format template")
+        if not compiled.simple:
+            return compiled.text.format(**kwargs)
+        parts = []
+        for literal, field_name, format_spec, conversion in compiled.segments:
+            parts.append(literal)
+            if field_name is None:
+                continue
+            value = kwargs[field_name]
+            if conversion:
+                value = _CONVERSIONS[conversion](value)
+            parts.append(format(value, format_spec) if format_spec else str(value))
+        return "".join(parts)
+
+    def __repr__(self) -> str:
+        return f"PromptTemplate({self.name!r}, hash={self._compiled.content_hash[:12]})"
+
+
+class PromptRegistry:
+    def __init__(self, prompts_dir: str | Path = "config/prompts", check_interval: float = 2.0):
+        """
+        Args:
+            prompts_dir: Directory scanned (recursively) for *.txt prompt files.
+            check_interval: Minimum seconds between mtime checks per template.
+        """
+        self.prompts_dir = Path(prompts_dir)
+        self.check_interval = check_interval
+        self._templates: Dict[str, PromptTemplate] = {}
+        self._lock = threading.Lock()
+        self.load_all()
+
+    @staticmethod
+    def _normalize(name: str) -> str:
+        name = name.replace("\\", "/")
+        if name.startswith("config/prompts/"):
+            name = name[len("config/prompts/") :]
+        return name[:-4] if name.endswith(".txt") else name
+
+    def load_all(self) -> None:
+        """Read every prompt file under the prompts directory."""
+        if not self.prompts_dir.is_dir():
+            logger.warning(f"Prompt directory '{self.prompts_dir}' not found.")
+            return
+        for path in sorted(self.prompts_dir.rglob("*.txt")):
+            name = self._normalize(path.relative_to(self.prompts_dir).as_posix())
+            if name not in self._templates:
+                self._load(name, path)
+
+    def _load(self, name: str, path: Path) -> Optional[PromptTemplate]:
+        try:
+            with open(str(path), "r", encoding="utf-8") as f:
+                text = f.read()
+        except OSError as e:
+            logger.warning(f"Could not read prompt '{path}': {e}")
+            return None
+        template = PromptTemplate(name, text, path=path, check_interval=self.check_interval)
+        with self._lock:
+            self._templates[name] = template
+        return template
+
+    def names(self) -> List[str]:
+        return sorted(self._templates)
+
+    def get(self, name: str, default: Optional[str] = None) -> PromptTemplate:
+        """
+        Return the named template.
+
+        Args:
+            name: Template name ("json_repair_prompt", "json_repair_prompt.txt"
+                and "config/prompts/json_repair_prompt.txt" are equivalent).
+            default: Text of an inline fallback template if the file does not exist.
+
+        Raises:
+            KeyError: If the template does not exist and no default was given.
+        """
+        key = self._normalize(name)
+        template = self._templates.get(key)
+        if template is None:
+            # A prompt file added after startup
+            path = self.prompts_dir / f"{key}.txt"
+            if path.is_file():
+                template = self._load(key, path)
+        if template is not None:
+            return template
+        if default is not None:
+            return PromptTemplate.inline(default, name=key)
+        raise KeyError(f"Prompt template '{key}' not found in {self.prompts_dir}")
+
+    def render(self, name: str, **kwargs: Any) -> str:
+        return self.get(name).render(**kwargs)
@@ -0,0 +1,310 @@
+"""Per-provider rate limiting and circuit breaking for cloud LLM calls.
+
+Every provider (the prefix of a litellm model name, e.g. "openrouter" for
+"openrouter/anthropic/claude-3-haiku") gets:
+
+* an adaptive rate limiter: requests are spaced to the current rate, which
+  halves on every 429 and climbs back additively on success. A Retry-After
+  header blocks the provider until the given time instead of hammering it.
+* a circuit breaker: after ``failure_threshold`` consecutive failures
+  (timeouts, connection errors, 5xx, 429) the circuit opens and calls fail
+  immediately with ProviderUnavailable instead of waiting out a timeout.
+  After ``reset_timeout`` seconds one trial call is let through (half-open);
+  its outcome closes or re-opens the circuit.
+
+Callers route to fallback models while a provider is unavailable. Limiter
+and breaker state is published to the TelemetryHub after every change.
+
+Configured under llm.provider_health in config/settings.yaml.
+"""
+import asyncio
+import email.utils
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class ProviderUnavailable(Exception):
+    """Raised without calling the provider while its circuit is open."""
+
+
+def provider_of(model: str) -> str:
+    """Provider part of a litellm model name ("openrouter/x/y" -> "openrouter")."""
+    return model.split("/", 1)[0] if "/" in model else "default"
+
+
+def status_code_of(exc: BaseException) -> Optional[int]:
+    status = getattr(exc, "status_code", None)
+    if status is None:
+        status = getattr(getattr(exc, "response", None), "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def retry_after_of(exc: BaseException, now: Optional[float] = None) -> Optional[float]:
+    """Seconds to wait according to a Retry-After header on the error, if any."""
+    for source in (exc, getattr(exc, "response", None)):
+        headers = getattr(source, "headers", None)
+        if not headers:
+            continue
+        try:
+            value = headers.get("retry-after") or headers.get("Retry-After")
+        except AttributeError:
+            continue
+        if value is None:
+            continue
+        value = str(value).strip()
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            retry_at = email.utils.parsedate_to_datetime(value).timestamp()
+        except (TypeError, ValueError):
+            continue
+        return max(0.0, retry_at - (now if now is not None else time.time()))
+    return None
+
+
+def is_rate_limited(exc: BaseException) -> bool:
+    return status_code_of(exc) == 429 or type(exc).__name__ == "RateLimitError"
+
+
+def is_provider_failure(exc: BaseException) -> bool:
+    """True for errors that say the provider is unhealthy, not the request invalid."""
+    if isinstance(exc, (asyncio.TimeoutError, TimeoutError, ConnectionError)):
+        return True
+    if is_rate_limited(exc):
+        return True
+    name = type(exc).__name__
+    if "Timeout" in name or name in ("APIConnectionError", "ServiceUnavailableError", "InternalServerError"):
+        return True
+    status = status_code_of(exc)
+    return status is not None and status >= 500
+
+
+class AdaptiveRateLimiter:
+    """Spaces requests to an adaptive rate (AIMD) and honours Retry-After."""
+
+    def __init__(
+        self,
+        max_rate: float = 5.0,
+        min_rate: float = 0.2,
+        increase: float = 0.25,
+        default_backoff: float = 5.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Args:
+            max_rate: Requests per second when the provider is healthy.
+            min_rate: Floor the rate never drops below.
+            increase: Requests per second added back after each success.
+            default_backoff: Seconds to pause after a 429 without Retry-After.
+        """
+        self.max_rate = max_rate
+        self.min_rate = min_rate
+        self.increase = increase
+        self.default_backoff = default_backoff
+        self.rate = max_rate
+        self.blocked_until = 0.0
+        self.rate_limited = 0
+        self._next_slot = 0.0
+        self._clock = clock
+
+    def delay(self) -> float:
+        """Reserve the next request slot; returns how long to wait for it."""
+        now = self._clock()
+        start = max(now, self._next_slot, self.blocked_until)
+        self._next_slot = start + 1.0 / self.rate
+        return start - now
+
+    async def acquire(self) -> None:
+        wait = self.delay()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def on_success(self) -> None:
+        self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def on_rate_limited(self, retry_after: Optional[float] = None) -> None:
+        self.rate_limited += 1
+        self.rate = max(self.min_rate, self.rate / 2)
+        pause = retry_after if retry_after is not None else self.default_backoff
+        self.blocked_until = max(self.blocked_until, self._clock() + pause)
+
+
+class CircuitBreaker:
+    """Closed -> open after repeated failures -> half-open trial -> closed."""
+
+    def __init__(
+        self,
+        failure_threshold: int = 3,
+        reset_timeout: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self.rejected = 0
+        self._trial_in_flight = False
+        self._clock = clock
+
+    def allow(self) -> Optional[str]:
+        """
+        Admit a call: returns the state it goes out in (HALF_OPEN for the one
+        trial call, CLOSED otherwise), or None if it is rejected (counted).
+        """
+        if self.state == OPEN and self._clock() - (self.opened_at or 0.0) >= self.reset_timeout:
+            self.state = HALF_OPEN
+            self._trial_in_flight = False
+        if self.state == CLOSED:
+            return CLOSED
+        if self.state == HALF_OPEN and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return HALF_OPEN
+        self.rejected += 1
+        return None
+
+    def record_success(self) -> None:
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        self.consecutive_failures += 1
+        self._trial_in_flight = False
+        if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            self.state = OPEN
+            self.opened_at = self._clock()
+
+    def release_trial(self) -> None:
+        """Let another trial call out (the last one ended without an outcome, e.g. cancelled)."""
+        self._trial_in_flight = False
+
+
+@dataclass
+class ProviderGuard:
+    """Limiter and breaker of one provider."""
+
+    provider: str
+    limiter: AdaptiveRateLimiter
+    breaker: CircuitBreaker
+
+    def state(self) -> Dict[str, Any]:
+        return {
+            "provider": self.provider,
+            "circuit": self.breaker.state,
+            "consecutive_failures": self.breaker.consecutive_failures,
+            "rejected": self.breaker.rejected,
+            "rate_limit_rps": round(self.limiter.rate, 3),
+            "rate_limited": self.limiter.rate_limited,
+            "blocked_for_seconds": round(
+                max(0.0, self.limiter.blocked_until - self.limiter._clock()), 1
+            ),
+        }
+
+
+class ProviderHealth:
+    def __init__(self, config: Optional[Dict[str, Any]] = None, telemetry: Any = None):
+        """
+        Args:
+            config: The llm.provider_health section of settings.yaml.
+            telemetry: TelemetryHub receiving provider state changes.
+        """
+        self.telemetry = telemetry
+        self._guards: Dict[str, ProviderGuard] = {}
+        self.configure(config)
+
+    def configure(self, config: Optional[Dict[str, Any]]) -> None:
+        config = config or {}
+        self.rate_limit = dict(config.get("rate_limit", {}) or {})
+        self.circuit_breaker = dict(config.get("circuit_breaker", {}) or {})
+        for guard in self._guards.values():
+            self._apply(guard)
+
+    def _apply(self, guard: ProviderGuard) -> None:
+        limiter, breaker = guard.limiter, guard.breaker
+        limiter.max_rate = float(self.rate_limit.get("max_rps", limiter.max_rate))
+        limiter.min_rate = float(self.rate_limit.get("min_rps", limiter.min_rate))
+        limiter.default_backoff = float(self.rate_limit.get("default_backoff", limiter.default_backoff))
+        limiter.rate = min(limiter.rate, limiter.max_rate)
+        breaker.failure_threshold = max(
+            1, int(self.circuit_breaker.get("failure_threshold", breaker.failure_threshold))
+        )
+        breaker.reset_timeout = float(self.circuit_breaker.get("reset_timeout", breaker.reset_timeout))
+
+    def guard(self, provider: str) -> ProviderGuard:
+        guard = self._guards.get(provider)
+        if guard is None:
+            guard = ProviderGuard(provider, AdaptiveRateLimiter(), CircuitBreaker())
+            self._apply(guard)
+            self._guards[provider] = guard
+        return guard
+
+    def available(self, provider: str) -> bool:
+        """False while the provider's circuit is open (does not consume a trial)."""
+        breaker = self.guard(provider).breaker
+        if breaker.state != OPEN:
+            return True
+        return breaker._clock() - (breaker.opened_at or 0.0) >= breaker.reset_timeout
+
+    async def call(self, provider: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Call fn() through the provider's breaker and limiter.
+
+        Raises:
+            ProviderUnavailable: If the circuit is open.
+        """
+        guard = self.guard(provider)
+        admitted = guard.breaker.allow()
+        if admitted is None:
+            self._publish(guard)
+            raise ProviderUnavailable(f"Provider '{provider}' is unavailable (circuit open)")
+        try:
+            await guard.limiter.acquire()
+            result = await fn()
+        except Exception as e:
+            if is_rate_limited(e):
+                guard.limiter.on_rate_limited(retry_after_of(e))
+            if is_provider_failure(e):
+                previous = guard.breaker.state
+                guard.breaker.record_failure()
+                if guard.breaker.state == OPEN and previous != OPEN:
+                    logger.warning(
+                        f"Circuit for provider '{provider}' opened after "
+                        f"{guard.breaker.consecutive_failures} failures: {e}"
+                    )
+            elif guard.breaker.state == HALF_OPEN:
+                # The provider answered (the request itself was rejected): the trial succeeded
+                logger.info(f"Circuit for provider '{provider}' closed again")
+                guard.breaker.record_success()
+            self._publish(guard)
+            raise
+        finally:
+            # A cancelled trial (hedge loser, SingleFlight, wait_for) must not block the provider;
+            # calls admitted while the circuit was closed leave a later trial alone
+            if admitted == HALF_OPEN:
+                guard.breaker.release_trial()
+        if guard.breaker.state != CLOSED:
+            logger.info(f"Circuit for provider '{provider}' closed again")
+        guard.limiter.on_success()
+        guard.breaker.record_success()
+        self._publish(guard)
+        return result
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        return {name: guard.state() for name, guard in self._guards.items()}
+
+    def _publish(self, guard: ProviderGuard) -> None:
+        update = getattr(self.telemetry, "update_provider_health", None)
+        if callable(update):
+            update(guard.provider, guard.state())
@@ -0,0 +1,197 @@
+"""Backend interface for the persistent task queue.
+
+KernelWorker, the WebUI and the enqueue scripts only rely on the operations
+defined here (enqueue, claim with lease, mark done/failed, count), so the
+storage can be swapped between the single-file SQLite queue and a Redis
+server shared by workers on several hosts.
+
+The backend is selected in config/settings.yaml:
+
+    task_queue:
+      backend: "sqlite"            # sqlite | redis
+      lease_seconds: 360
+      sqlite:
+        db_path: ".data/tasks.sqlite"
+      redis:
+        url: "redis://localhost:6379/0"
+        key_prefix: "{sophia:tasks}"
+
+Priority aging (see config/autonomy.yaml, resources.task_queue.priority_aging)
+is shared by all backends: every task gets a time-invariant sort key, the
+epoch second at which its aged priority reaches zero, and backends hand out
+the task with the lowest key first. A task ages through each band at that
+band's points_per_minute: from its priority down to the band's floor (the
+previous band's max_priority), then through every lower band in full,
+
+    sort_key = enqueued_at + (priority - floor) * 60 / rate(band)
+                           + sum((max - floor) * 60 / rate) over lower bands
+
+which keeps the key increasing with priority across band boundaries.
+"""
+import logging
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import yaml
+
+logger = logging.getLogger(__name__)
+
+# (max_priority, points_per_minute); max_priority None matches everything above.
+AgingBands = List[Tuple[Optional[int], float]]
+
+DEFAULT_AGING_BANDS: AgingBands = [(10, 1.0), (100, 2.0), (None, 4.0)]
+
+
+def load_aging_bands(config_path: str | Path = "config/autonomy.yaml") -> Optional[AgingBands]:
+    """Read priority aging bands from autonomy.yaml.
+
+    Returns None when aging is disabled, and the defaults when the file or
+    section is missing.
+    """
+    path = Path(config_path)
+    if not path.exists():
+        return list(DEFAULT_AGING_BANDS)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            config = yaml.safe_load(f) or {}
+    except Exception as e:
+        logger.warning(f"Could not read priority aging config from {path}: {e}")
+        return list(DEFAULT_AGING_BANDS)
+
+    aging = config.get("resources", {}).get("task_queue", {}).get("priority_aging", {})
+    if not aging.get("enabled", True):
+        return None
+
+    bands: AgingBands = []
+    for band in aging.get("bands", []) or []:
+        rate = float(band.get("points_per_minute", 0) or 0)
+        if rate <= 0:
+            logger.warning(f"Ignoring priority aging band with non-positive rate: {band}")
+            continue
+        max_priority = band.get("max_priority")
+        bands.append((int(max_priority) if max_priority is not None else None, rate))
+    return bands or list(DEFAULT_AGING_BANDS)
+
+
+class QueueBackend(ABC):
+    """
+    Contract every persistent task queue backend must implement.
+
+    Tasks are dicts of the form {"id": int, "payload": dict}. Status values
+    are pending, running, done and failed.
+    """
+
+    def __init__(self, aging_bands: Optional[AgingBands] | str = "config"):
+        """
+        Args:
+            aging_bands: Priority aging bands as (max_priority, points_per_minute),
+                None to disable aging (strict priority order), or "config" to
+                load them from config/autonomy.yaml.
+        """
+        if aging_bands == "config":
+            aging_bands = load_aging_bands()
+        self.aging_bands: Optional[AgingBands] = (
+            sorted(aging_bands, key=lambda b: float("inf") if b[0] is None else b[0])
+            if aging_bands
+            else None
+        )
+
+    def _sort_key(self, priority: int, enqueued_at: float) -> float:
+        """Epoch second at which the task's aged priority reaches zero."""
+        if not self.aging_bands:
+            return enqueued_at
+        seconds = 0.0
+        floor = 0
+        for max_priority, rate in self.aging_bands:
+            if max_priority is None or priority <= max_priority:
+                return enqueued_at + seconds + (priority - floor) * 60.0 / rate
+            seconds += (max_priority - floor) * 60.0 / rate
+            floor = max_priority
+        # No catch-all band: priorities above the last band age at its rate
+        return enqueued_at + seconds + (priority - floor) * 60.0 / self.aging_bands[-1][1]
+
+    @abstractmethod
+    def enqueue(self, payload: Dict[str, Any], priority: int = 100) -> int:
+        """Add a pending task and return its id."""
+        pass
+
+    @abstractmethod
+    def dequeue_and_lock(self, lease_seconds: float | None = None) -> Optional[Dict[str, Any]]:
+        """
+        Atomically claim the next pending task and mark it running.
+
+        With a lease, a task whose worker neither finishes nor fails it within
+        lease_seconds is handed out again. Without one, the claim never expires.
+        The returned dict has the task's id, payload and lease, a token the
+        worker passes back to mark_done/mark_failed.
+        """
+        pass
+
+    @abstractmethod
+    def mark_done(self, task_id: int, lease: str | None = None) -> bool:
+        """
+        Mark a claimed task done. With a lease token, only if this claim still
+        holds the task (it was not re-queued after the lease expired); returns
+        whether the task was marked.
+        """
+        pass
+
+    @abstractmethod
+    def mark_failed(self, task_id: int, reason: str | None = None, lease: str | None = None) -> bool:
+        """Like mark_done, recording reason in the payload's _errors."""
+        pass
+
+    @abstractmethod
+    def count(self, status: str = "pending") -> int:
+        """Number of tasks currently in the given status."""
+        pass
+
+    def pending_count(self) -> int:
+        return self.count("pending")
+
+    def close(self) -> None:
+        """Release connections held by the backend."""
+        pass
+
+
+def load_queue_config(config_path: str | Path = "config/settings.yaml") -> Dict[str, Any]:
+    """Return the task_queue section of settings.yaml (empty if missing)."""
+    path = Path(config_path)
+    if not path.exists():
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            settings = yaml.safe_load(f) or {}
+    except Exception as e:
+        logger.warning(f"Could not read task queue config from {path}: {e}")
+        return {}
+    return settings.get("task_queue", {}) or {}
+
+
+def create_queue_backend(config: Optional[Dict[str, Any]] = None) -> QueueBackend:
+    """
+    Build the queue backend selected by the task_queue config section.
+
+    Args:
+        config: The task_queue section; loaded from config/settings.yaml if None.
+    """
+    if config is None:
+        config = load_queue_config()
+
+    backend = str(config.get("backend", "sqlite")).lower()
+    if backend == "sqlite":
+        from core.simple_persistent_queue import SimplePersistentQueue
+
+        sqlite_config = config.get("sqlite", {}) or {}
+        return SimplePersistentQueue(db_path=sqlite_config.get("db_path", ".data/tasks.sqlite"))
+    if backend == "redis":
+        from core.redis_queue import RedisQueue
+
+        redis_config = config.get("redis", {}) or {}
+        return RedisQueue(
+            url=redis_config.get("url", "redis://localhost:6379/0"),
+            key_prefix=redis_config.get("key_prefix", "{sophia:tasks}"),
+            socket_timeout=float(redis_config.get("socket_timeout", 10.0)),
+        )
+    raise ValueError(f"Unknown task queue backend: '{backend}' (expected 'sqlite' or 'redis')")
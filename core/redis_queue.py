@@ -0,0 +1,328 @@
+"""Redis-backed persistent task queue for workers running on several hosts.
+
+Speaks the Redis protocol (RESP2) directly over a socket, so it needs no
+client library and works against redis-server, KeyDB, Dragonfly or any other
+server implementing the handful of commands used below.
+
+Keys (all under ``key_prefix``):
+  {prefix}:seq           INCR counter for task ids
+  {prefix}:task:{id}     hash: created_at, priority, sort_key, status, payload,
+                         lease (token of the worker holding the claim)
+  {prefix}:pending       sorted set of pending ids scored by aging sort_key
+  {prefix}:leases        sorted set of claimed ids scored by lease expiry
+  {prefix}:running|done|failed
+                         sets of ids per status (for counting)
+
+A sorted set rather than a list holds the pending tasks so the priority
+aging order of the SQLite queue is preserved. Enqueueing, claiming (with the
+re-queue of expired leases) and finishing a task each touch several keys, so
+they run as Lua scripts: a producer or worker dying between two commands can
+neither lose a task nor leave it half enqueued or half claimed.
+
+The scripts build task hash keys from the prefix instead of declaring them
+in KEYS, which Redis Cluster only serves when every key of the queue hashes
+to the same slot. The default prefix ``{sophia:tasks}`` is a hash tag for
+exactly that; a custom prefix must keep its braces to run on a cluster.
+"""
+import json
+import logging
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Dict, Optional
+from urllib.parse import unquote, urlparse
+
+from core.queue_backend import AgingBands, QueueBackend
+
+logger = logging.getLogger(__name__)
+
+
+# KEYS: seq, pending
+# ARGV: task key prefix, created_at, priority, sort_key, payload
+# Returns the new task id
+_ENQUEUE_SCRIPT = """
+local id = redis.call('INCR', KEYS[1])
+redis.call('HSET', ARGV[1] .. id, 'created_at', ARGV[2], 'priority', ARGV[3],
+  'sort_key', ARGV[4], 'status', 'pending', 'payload', ARGV[5])
+redis.call('ZADD', KEYS[2], ARGV[4], id)
+return id
+"""
+
+# KEYS: pending, leases, running
+# ARGV: task key prefix, now, lease expiry ("" for none), lease token
+# Returns {requeued count[, task id, payload]}
+_CLAIM_SCRIPT = """
+local expired = redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', ARGV[2])
+for _, id in ipairs(expired) do
+  local task = ARGV[1] .. id
+  redis.call('ZREM', KEYS[2], id)
+  redis.call('SREM', KEYS[3], id)
+  redis.call('HDEL', task, 'lease')
+  redis.call('HSET', task, 'status', 'pending')
+  redis.call('ZADD', KEYS[1], redis.call('HGET', task, 'sort_key') or '0', id)
+end
+local popped = redis.call('ZPOPMIN', KEYS[1])
+if #popped == 0 then
+  return {#expired}
+end
+local id = popped[1]
+local task = ARGV[1] .. id
+if ARGV[3] ~= '' then
+  redis.call('ZADD', KEYS[2], ARGV[3], id)
+end
+redis.call('SADD', KEYS[3], id)
+redis.call('HSET', task, 'status', 'running', 'lease', ARGV[4])
+return {#expired, id, redis.call('HGET', task, 'payload')}
+"""
+
+# KEYS: task hash, leases, pending, running, set of the final status
+# ARGV: task id, final status, lease token ("" to skip the check)
+# Returns 1 if finished, 0 if the lease is no longer held
+_FINISH_SCRIPT = """
+if ARGV[3] ~= '' and redis.call('HGET', KEYS[1], 'lease') ~= ARGV[3] then
+  return 0
+end
+redis.call('ZREM', KEYS[2], ARGV[1])
+redis.call('ZREM', KEYS[3], ARGV[1])
+redis.call('SREM', KEYS[4], ARGV[1])
+redis.call('SADD', KEYS[5], ARGV[1])
+redis.call('HDEL', KEYS[1], 'lease')
+redis.call('HSET', KEYS[1], 'status', ARGV[2])
+return 1
+"""
+
+
+class RedisQueueError(Exception):
+    """Raised when the Redis server returns an error reply or the connection fails."""
+
+
+class _RespConnection:
+    """Minimal blocking RESP2 client (one socket, serialized by a lock)."""
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        db: int = 0,
+        password: Optional[str] = None,
+        username: Optional[str] = None,
+        timeout: float = 10.0,
+    ):
+        self.host = host
+        self.port = port
+        self.db = db
+        self.password = password
+        self.username = username
+        self.timeout = timeout
+        self._sock: Optional[socket.socket] = None
+        self._reader = None
+        self._lock = threading.Lock()
+
+    def _ensure_connected(self) -> None:
+        if self._sock is not None:
+            return
+        try:
+            self._sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        except OSError as e:
+            raise RedisQueueError(f"Cannot connect to Redis at {self.host}:{self.port}: {e}")
+        self._reader = self._sock.makefile("rb")
+        if self.password:
+            if self.username:
+                self._call("AUTH", self.username, self.password)
+            else:
+                self._call("AUTH", self.password)
+        if self.db:
+            self._call("SELECT", self.db)
+
+    def close(self) -> None:
+        with self._lock:
+            self._close_socket()
+
+    def _close_socket(self) -> None:
+        if self._reader is not None:
+            try:
+                self._reader.close()
+            except Exception:
+                pass
+            self._reader = None
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            except Exception:
+                pass
+            self._sock = None
+
+    def execute(self, *args: Any) -> Any:
+        with self._lock:
+            try:
+                self._ensure_connected()
+                return self._call(*args)
+            except (OSError, EOFError) as e:
+                # Drop the broken socket so the next command reconnects
+                self._close_socket()
+                raise RedisQueueError(f"Redis connection error during {args[0]}: {e}")
+
+    def _call(self, *args: Any) -> Any:
+        parts = [f"*{len(args)}\r\n".encode()]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode("utf-8")
+            parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        self._sock.sendall(b"".join(parts))
+        return self._read_reply()
+
+    def _read_reply(self) -> Any:
+        line = self._reader.readline()
+        if not line:
+            raise EOFError("connection closed by server")
+        prefix, body = line[:1], line[1:-2]
+        if prefix == b"+":
+            return body.decode("utf-8")
+        if prefix == b"-":
+            raise RedisQueueError(body.decode("utf-8"))
+        if prefix == b":":
+            return int(body)
+        if prefix == b"$":
+            length = int(body)
+            if length == -1:
+                return None
+            data = self._reader.read(length + 2)
+            return data[:-2].decode("utf-8")
+        if prefix == b"*":
+            length = int(body)
+            if length == -1:
+                return None
+            return [self._read_reply() for _ in range(length)]
+        raise RedisQueueError(f"Unexpected reply from server: {line!r}")
+
+
+class RedisQueue(QueueBackend):
+    def __init__(
+        self,
+        url: str = "redis://localhost:6379/0",
+        key_prefix: str = "{sophia:tasks}",
+        socket_timeout: float = 10.0,
+        aging_bands: Optional[AgingBands] | str = "config",
+    ):
+        """
+        Args:
+            url: redis://[[user]:password@]host[:port][/db]
+            key_prefix: Namespace for all queue keys (keep the {hash tag} on Redis
+                Cluster so all of them land in one slot).
+            socket_timeout: Seconds before a blocked socket operation fails.
+            aging_bands: See QueueBackend.
+        """
+        super().__init__(aging_bands=aging_bands)
+        parsed = urlparse(url)
+        if parsed.scheme not in ("redis", ""):
+            raise ValueError(f"Unsupported Redis URL scheme: '{parsed.scheme}'")
+        db_path = (parsed.path or "").lstrip("/")
+        self.key_prefix = key_prefix
+        self._conn = _RespConnection(
+            host=parsed.hostname or "localhost",
+            port=parsed.port or 6379,
+            db=int(db_path) if db_path else 0,
+            password=unquote(parsed.password) if parsed.password else None,
+            username=unquote(parsed.username) if parsed.username else None,
+            timeout=socket_timeout,
+        )
+
+    def _key(self, *parts: Any) -> str:
+        return ":".join([self.key_prefix, *(str(p) for p in parts)])
+
+    def enqueue(self, payload: Dict[str, Any], priority: int = 100) -> int:
+        sort_key = self._sort_score(int(priority), time.time())
+        return int(
+            self._conn.execute(
+                "EVAL",
+                _ENQUEUE_SCRIPT,
+                2,
+                self._key("seq"),
+                self._key("pending"),
+                self._key("task", ""),
+                datetime.utcnow().isoformat(),
+                int(priority),
+                repr(sort_key),
+                json.dumps(payload),
+            )
+        )
+
+    def _sort_score(self, priority: int, enqueued_at: float) -> float:
+        # Without aging, keep strict priority order and FIFO within a priority
+        if not self.aging_bands:
+            return priority * 1e10 + enqueued_at
+        return self._sort_key(priority, enqueued_at)
+
+    def dequeue_and_lock(self, lease_seconds: float | None = None) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        lease = uuid.uuid4().hex
+        reply = self._conn.execute(
+            "EVAL",
+            _CLAIM_SCRIPT,
+            3,
+            self._key("pending"),
+            self._key("leases"),
+            self._key("running"),
+            self._key("task", ""),
+            repr(now),
+            repr(now + lease_seconds) if lease_seconds else "",
+            lease,
+        )
+        if reply[0]:
+            logger.warning(f"Re-queued {reply[0]} task(s) with expired leases")
+        if len(reply) < 2:
+            return None
+        task_id, raw_payload = reply[1], (reply[2] if len(reply) > 2 else None)
+        try:
+            payload = json.loads(raw_payload) if raw_payload else {}
+        except json.JSONDecodeError:
+            payload = {"_raw": raw_payload}
+        return {"id": int(task_id), "payload": payload, "lease": lease}
+
+    def _finish(self, task_id: int, status: str, lease: str | None) -> bool:
+        return bool(
+            self._conn.execute(
+                "EVAL",
+                _FINISH_SCRIPT,
+                5,
+                self._key("task", task_id),
+                self._key("leases"),
+                self._key("pending"),
+                self._key("running"),
+                self._key(status),
+                task_id,
+                status,
+                lease or "",
+            )
+        )
+
+    def mark_done(self, task_id: int, lease: str | None = None) -> bool:
+        return self._finish(task_id, "done", lease)
+
+    def mark_failed(
+        self, task_id: int, reason: str | None = None, lease: str | None = None
+    ) -> bool:
+        if not self._finish(task_id, "failed", lease):
+            return False
+        if reason:
+            raw_payload = self._conn.execute("HGET", self._key("task", task_id), "payload")
+            try:
+                payload = json.loads(raw_payload) if raw_payload else {}
+            except json.JSONDecodeError:
+                payload = {"_raw": raw_payload}
+            payload.setdefault("_errors", []).append(
+                {"when": datetime.utcnow().isoformat(), "reason": str(reason)}
+            )
+            self._conn.execute(
+                "HSET", self._key("task", task_id), "payload", json.dumps(payload)
+            )
+        return True
+
+    def count(self, status: str = "pending") -> int:
+        if status == "pending":
+            return int(self._conn.execute("ZCARD", self._key("pending")) or 0)
+        return int(self._conn.execute("SCARD", self._key(status)) or 0)
+
+    def close(self) -> None:
+        self._conn.close()
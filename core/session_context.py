@@ -0,0 +1,87 @@
+"""Per-session reuse of the local runtime's conversation state.
+
+Ollama's /api/generate returns ``context``: the tokens of the conversation
+so far, prompt and answer included. Sending it back with the next prompt
+continues the conversation without re-sending (and re-templating) the
+system prompt and the whole history; the runner keeps the evaluated prefix
+in its KV cache, so only the new turn is evaluated.
+
+SessionContextCache keeps that state per session key (least recently used
+sessions are evicted). The key is any hashable value; callers that make
+different kinds of calls within one session (a chat and a planner with its
+own system prompt) key them apart so they do not clobber each other.
+
+A turn continues a session only if its messages start with exactly the
+conversation the state encodes and add nothing but user messages; anything
+else (edited or trimmed history, a different model or system prompt) is
+sent in full and starts over.
+"""
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+Message = Dict[str, Any]
+SessionKey = Hashable
+
+
+@dataclass
+class SessionState:
+    model: str
+    transcript: List[Message]  # Messages encoded by tokens, ending with the assistant's answer
+    tokens: List[int]
+
+
+class SessionContextCache:
+    def __init__(self, max_sessions: int = 32, max_tokens: Optional[int] = None):
+        """
+        Args:
+            max_sessions: Sessions kept; the least recently used one is evicted.
+            max_tokens: Drop state that no longer fits the context window (num_ctx).
+        """
+        self.max_sessions = max(1, max_sessions)
+        self.max_tokens = max_tokens
+        self._sessions: "OrderedDict[SessionKey, SessionState]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def continuation(
+        self, session_id: SessionKey, model: str, messages: List[Message]
+    ) -> Optional[Tuple[List[int], List[Message]]]:
+        """
+        (tokens, new user messages) if messages continue the session's
+        conversation, else None.
+        """
+        state = self._sessions.get(session_id)
+        if state is None or state.model != model:
+            self.misses += 1
+            return None
+        known = len(state.transcript)
+        new = messages[known:]
+        if messages[:known] != state.transcript or not new or any(m.get("role") != "user" for m in new):
+            self.misses += 1
+            self.drop(session_id)  # The conversation went elsewhere
+            return None
+        self._sessions.move_to_end(session_id)
+        self.hits += 1
+        return state.tokens, new
+
+    def store(
+        self, session_id: SessionKey, model: str, messages: List[Message], answer: str, tokens: Optional[List[int]]
+    ) -> None:
+        """Remember the conversation after a turn (messages sent plus answer)."""
+        if not tokens or (self.max_tokens is not None and len(tokens) >= self.max_tokens):
+            self.drop(session_id)
+            return
+        transcript = list(messages) + [{"role": "assistant", "content": answer}]
+        self._sessions[session_id] = SessionState(model, transcript, list(tokens))
+        self._sessions.move_to_end(session_id)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+            self.evictions += 1
+
+    def drop(self, session_id: SessionKey) -> None:
+        self._sessions.pop(session_id, None)
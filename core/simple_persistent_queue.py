@@ -5,26 +5,52 @@ provides an async-friendly API by using asyncio.to_thread for DB calls so
 it can be polled in an async worker loop.
 
 Schema:
-  tasks(id INTEGER PRIMARY KEY, created_at TEXT, priority INTEGER, status TEXT, payload TEXT)
+  tasks(id INTEGER PRIMARY KEY, created_at TEXT, priority INTEGER, status TEXT, payload TEXT,
+        sort_key REAL, lease_expires_at REAL, lease_token TEXT)
 
 Status: pending, running, done, failed
+
+Priority aging:
+  Lower priority values run first, but a task's effective priority improves
+  the longer it waits so low-priority maintenance cannot be starved by a
+  steady stream of user tasks. Rather than recomputing priorities on every
+  dequeue, each task stores a time-invariant ``sort_key`` (see
+  core/queue_backend.py) and ordering by it is served by an index.
+
+One connection is shared by every thread using the queue (workers and the
+WebUI call it through asyncio.to_thread), so each operation holds a lock.
 """
 import sqlite3
 import json
+import threading
 import time
 import logging
-from datetime import datetime
+import uuid
+from datetime import datetime, timezone
 from pathlib import Path
 from typing import Optional, Dict, Any
 
+from core.queue_backend import AgingBands, QueueBackend
+
 logger = logging.getLogger(__name__)
 
 
-class SimplePersistentQueue:
-    def __init__(self, db_path: str | Path = ".data/tasks.sqlite"):
+class SimplePersistentQueue(QueueBackend):
+    def __init__(
+        self,
+        db_path: str | Path = ".data/tasks.sqlite",
+        aging_bands: Optional[AgingBands] | str = "config",
+    ):
+        """
+        Args:
+            db_path: SQLite database file.
+            aging_bands: See QueueBackend.
+        """
+        super().__init__(aging_bands=aging_bands)
         self.db_path = Path(db_path)
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
         self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
 
     def _connect(self) -> sqlite3.Connection:
         if self._conn is None:
@@ -47,6 +73,29 @@ class SimplePersistentQueue:
             )
             """
         )
+        columns = {row["name"] for row in c.execute("PRAGMA table_info(tasks)")}
+        if "sort_key" not in columns:
+            c.execute("ALTER TABLE tasks ADD COLUMN sort_key REAL")
+        if "lease_expires_at" not in columns:
+            c.execute("ALTER TABLE tasks ADD COLUMN lease_expires_at REAL")
+        if "lease_token" not in columns:
+            c.execute("ALTER TABLE tasks ADD COLUMN lease_token TEXT")
+        c.execute(
+            "CREATE INDEX IF NOT EXISTS idx_tasks_status_sort_key ON tasks (status, sort_key, id)"
+        )
+
+        # Backfill rows written before priority aging existed
+        c.execute("SELECT id, created_at, priority FROM tasks WHERE sort_key IS NULL")
+        for row in c.fetchall():
+            try:
+                created = datetime.fromisoformat(row["created_at"])
+                enqueued_at = created.replace(tzinfo=timezone.utc).timestamp()
+            except (TypeError, ValueError):
+                enqueued_at = time.time()
+            c.execute(
+                "UPDATE tasks SET sort_key = ? WHERE id = ?",
+                (self._sort_key(int(row["priority"] or 0), enqueued_at), row["id"]),
+            )
         self._conn.commit()
 
     def enqueue(self, payload: Dict[str, Any], priority: int = 100) -> int:
@@ -56,15 +105,8 @@ class SimplePersistentQueue:
         
         for attempt in range(max_retries):
             try:
-                conn = self._connect()
-                c = conn.cursor()
-                now = datetime.utcnow().isoformat()
-                c.execute(
-                    "INSERT INTO tasks (created_at, priority, status, payload) VALUES (?, ?, 'pending', ?)",
-                    (now, int(priority), json.dumps(payload)),
-                )
-                conn.commit()
-                return c.lastrowid
+                with self._lock:
+                    return self._insert(payload, priority)
             except sqlite3.OperationalError as e:
                 if "disk I/O error" in str(e) and attempt < max_retries - 1:
                     logger.warning(
@@ -73,69 +115,123 @@ class SimplePersistentQueue:
                     )
                     time.sleep(retry_delay)
                     # Close and reopen connection on retry
-                    if self._conn:
-                        try:
-                            self._conn.close()
-                        except Exception:
-                            pass
-                        self._conn = None
+                    with self._lock:
+                        if self._conn:
+                            try:
+                                self._conn.close()
+                            except Exception:
+                                pass
+                            self._conn = None
                 else:
                     logger.error(f"❌ Failed to enqueue task after {max_retries} attempts: {e}")
                     raise
 
-    def dequeue_and_lock(self) -> Optional[Dict[str, Any]]:
-        """Atomically find one pending task, mark running, and return it."""
+    def _insert(self, payload: Dict[str, Any], priority: int) -> int:
         conn = self._connect()
         c = conn.cursor()
-
-        # Select one pending task by priority and id
+        now = datetime.utcnow().isoformat()
+        sort_key = self._sort_key(int(priority), time.time())
         c.execute(
-            "SELECT id, payload FROM tasks WHERE status = 'pending' ORDER BY priority ASC, id ASC LIMIT 1"
+            "INSERT INTO tasks (created_at, priority, status, payload, sort_key) "
+            "VALUES (?, ?, 'pending', ?, ?)",
+            (now, int(priority), json.dumps(payload), sort_key),
         )
-        row = c.fetchone()
-        if not row:
-            return None
-
-        task_id = row["id"]
-        # Attempt to mark running only if still pending
-        c.execute("UPDATE tasks SET status = 'running' WHERE id = ? AND status = 'pending'", (task_id,))
-        if c.rowcount == 0:
-            # someone else claimed it
-            conn.commit()
-            return None
-
         conn.commit()
+        return c.lastrowid
 
-        payload = json.loads(row["payload"])
-        return {"id": task_id, "payload": payload}
-
-    def mark_done(self, task_id: int) -> None:
-        conn = self._connect()
-        c = conn.cursor()
-        c.execute("UPDATE tasks SET status = 'done' WHERE id = ?", (task_id,))
-        conn.commit()
-
-    def mark_failed(self, task_id: int, reason: str | None = None) -> None:
-        conn = self._connect()
-        c = conn.cursor()
-        c.execute("UPDATE tasks SET status = 'failed' WHERE id = ?", (task_id,))
-        # Optionally append failure note to payload
-        if reason:
-            c.execute("SELECT payload FROM tasks WHERE id = ?", (task_id,))
+    def dequeue_and_lock(self, lease_seconds: float | None = None) -> Optional[Dict[str, Any]]:
+        """Atomically find one pending task, mark running, and return it."""
+        with self._lock:
+            conn = self._connect()
+            c = conn.cursor()
+            now = time.time()
+
+            # Return tasks whose worker let the lease expire to the pending pool
+            c.execute(
+                "UPDATE tasks SET status = 'pending', lease_expires_at = NULL, lease_token = NULL "
+                "WHERE status = 'running' AND lease_expires_at IS NOT NULL AND lease_expires_at < ?",
+                (now,),
+            )
+            if c.rowcount:
+                logger.warning(f"Re-queued {c.rowcount} task(s) with expired leases")
+
+            # Select one pending task by aged priority (or strict priority if aging is off)
+            if self.aging_bands:
+                order_by = "sort_key ASC, id ASC"
+            else:
+                order_by = "priority ASC, id ASC"
+            c.execute(f"SELECT id, payload FROM tasks WHERE status = 'pending' ORDER BY {order_by} LIMIT 1")
             row = c.fetchone()
-            if row:
-                try:
-                    payload = json.loads(row[0])
-                except Exception:
-                    payload = {"_raw": row[0]}
-                payload.setdefault("_errors", []).append({"when": datetime.utcnow().isoformat(), "reason": str(reason)})
-                c.execute("UPDATE tasks SET payload = ? WHERE id = ?", (json.dumps(payload), task_id))
+            if not row:
+                conn.commit()
+                return None
+
+            task_id = row["id"]
+            # Attempt to mark running only if still pending
+            lease_expires_at = now + lease_seconds if lease_seconds else None
+            lease = uuid.uuid4().hex
+            c.execute(
+                "UPDATE tasks SET status = 'running', lease_expires_at = ?, lease_token = ? "
+                "WHERE id = ? AND status = 'pending'",
+                (lease_expires_at, lease, task_id),
+            )
+            if c.rowcount == 0:
+                # someone else claimed it
+                conn.commit()
+                return None
 
-        conn.commit()
+            conn.commit()
 
-    def pending_count(self) -> int:
-        conn = self._connect()
-        c = conn.cursor()
-        c.execute("SELECT COUNT(*) as cnt FROM tasks WHERE status = 'pending'")
-        row = c.fetchone()
-        return int(row[0]) if row else 0
+        payload = json.loads(row["payload"])
+        return {"id": task_id, "payload": payload, "lease": lease}
+
+    def _finish(self, c: sqlite3.Cursor, task_id: int, status: str, lease: str | None) -> bool:
+        query = "UPDATE tasks SET status = ?, lease_expires_at = NULL, lease_token = NULL WHERE id = ?"
+        params: tuple = (status, task_id)
+        if lease is not None:
+            query += " AND status = 'running' AND lease_token = ?"
+            params += (lease,)
+        c.execute(query, params)
+        return c.rowcount > 0
+
+    def mark_done(self, task_id: int, lease: str | None = None) -> bool:
+        with self._lock:
+            conn = self._connect()
+            c = conn.cursor()
+            finished = self._finish(c, task_id, "done", lease)
+            conn.commit()
+            return finished
+
+    def mark_failed(self, task_id: int, reason: str | None = None, lease: str | None = None) -> bool:
+        with self._lock:
+            conn = self._connect()
+            c = conn.cursor()
+            finished = self._finish(c, task_id, "failed", lease)
+            # Optionally append failure note to payload
+            if finished and reason:
+                c.execute("SELECT payload FROM tasks WHERE id = ?", (task_id,))
+                row = c.fetchone()
+                if row:
+                    try:
+                        payload = json.loads(row[0])
+                    except Exception:
+                        payload = {"_raw": row[0]}
+                    payload.setdefault("_errors", []).append({"when": datetime.utcnow().isoformat(), "reason": str(reason)})
+                    c.execute("UPDATE tasks SET payload = ? WHERE id = ?", (json.dumps(payload), task_id))
+
+            conn.commit()
+            return finished
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def count(self, status: str = "pending") -> int:
+        with self._lock:
+            conn = self._connect()
+            c = conn.cursor()
+            c.execute("SELECT COUNT(*) as cnt FROM tasks WHERE status = ?", (status,))
+            row = c.fetchone()
+            return int(row[0]) if row else 0
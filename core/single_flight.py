@@ -0,0 +1,61 @@
+"""Single-flight coalescing of concurrent identical async calls.
+
+With several WebUI sessions or a multi-slot worker, the same LLM request
+(a classification prompt, a heartbeat analysis prompt) can be in flight
+more than once at the same moment. SingleFlight runs the first such call
+and lets every concurrent caller with the same key await that one call's
+result (or exception) instead of starting its own.
+
+The shared call runs as its own task: a caller that is cancelled stops
+waiting without cancelling it for the others. The task is cancelled only
+when no caller is left waiting for it. Keys are forgotten as soon as the
+call finishes, so this is not a cache; see core/llm_cache.py for that.
+"""
+import asyncio
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+
+@dataclass
+class _Flight:
+    task: asyncio.Task
+    waiters: int = 0
+
+
+class SingleFlight:
+    def __init__(self) -> None:
+        self._flights: Dict[str, _Flight] = {}
+        self.coalesced = 0  # calls that joined an in-flight call
+
+    def in_flight(self, key: str) -> bool:
+        return key in self._flights
+
+    async def do(self, key: str, call: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """
+        Run call() unless a call with the same key is already running.
+
+        Returns:
+            (result, shared): shared is True if this caller joined a call
+            started by another caller.
+        """
+        flight = self._flights.get(key)
+        shared = flight is not None
+        if flight is None:
+            flight = _Flight(asyncio.ensure_future(call()))
+            self._flights[key] = flight
+
+            def forget(_task: asyncio.Task, key: str = key, flight: _Flight = flight) -> None:
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+
+            flight.task.add_done_callback(forget)
+        else:
+            self.coalesced += 1
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task), shared
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                flight.task.cancel()
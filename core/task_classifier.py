@@ -0,0 +1,122 @@
+"""Local task-type classifier for the task router.
+
+Classifying every input with a cloud LLM costs a round trip and money
+before planning even starts. TaskClassifier learns from the LLM's own past
+decisions ((input, task_type) pairs logged by the router) and answers in
+microseconds:
+
+* features: word unigrams/bigrams and character 3-grams, hashed into a
+  fixed number of buckets and L2-normalised,
+* model: nearest centroid (one summed feature vector per task type) under
+  cosine similarity,
+* confidence: softmax over the similarities; below ``min_confidence`` (or
+  with fewer than ``min_examples`` examples) the caller asks the LLM.
+"""
+import math
+import re
+import zlib
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+SparseVector = Dict[int, float]
+
+
+@dataclass
+class Prediction:
+    task_type: str
+    confidence: float  # 0..1
+    similarity: float  # Cosine similarity to the task type's centroid
+
+
+def features(text: str, buckets: int = 1 << 18) -> SparseVector:
+    """Hashed, L2-normalised word 1-2-gram and character 3-gram counts."""
+    words = _WORD.findall(text.lower())
+    grams = list(words)
+    grams += [f"{a} {b}" for a, b in zip(words, words[1:])]
+    for word in words:
+        padded = f" {word} "
+        grams += [f"#{padded[i:i + 3]}" for i in range(len(padded) - 2)]
+    vector: SparseVector = defaultdict(float)
+    for gram in grams:
+        vector[zlib.crc32(gram.encode("utf-8")) % buckets] += 1.0
+    norm = math.sqrt(sum(v * v for v in vector.values()))
+    return {index: value / norm for index, value in vector.items()} if norm else {}
+
+
+class TaskClassifier:
+    def __init__(
+        self,
+        min_confidence: float = 0.8,
+        min_examples: int = 20,
+        temperature: float = 0.1,
+        buckets: int = 1 << 18,
+    ):
+        """
+        Args:
+            min_confidence: Predictions below this are not returned.
+            min_examples: Examples needed in total before predicting at all
+                (and at least two task types).
+            temperature: Softmax temperature over the cosine similarities.
+            buckets: Size of the hashed feature space.
+        """
+        self.min_confidence = min_confidence
+        self.min_examples = min_examples
+        self.temperature = temperature
+        self.buckets = buckets
+        self._sums: Dict[str, SparseVector] = {}
+        self._norms: Dict[str, float] = {}
+        self.examples = 0
+
+    @property
+    def labels(self) -> List[str]:
+        return list(self._sums)
+
+    def fit(self, examples: Iterable[Tuple[str, str]]) -> None:
+        """Add (text, task_type) examples."""
+        for text, task_type in examples:
+            self.learn(text, task_type)
+
+    def learn(self, text: str, task_type: str) -> None:
+        vector = features(text, self.buckets)
+        if not vector or not task_type:
+            return
+        centroid = self._sums.setdefault(task_type, {})
+        for index, value in vector.items():
+            centroid[index] = centroid.get(index, 0.0) + value
+        self._norms.pop(task_type, None)
+        self.examples += 1
+
+    def predict(self, text: str, allowed: Optional[Iterable[str]] = None) -> Optional[Prediction]:
+        """
+        Most similar task type (restricted to allowed, if given), or None when
+        untrained or not confident enough.
+        """
+        if self.examples < self.min_examples:
+            return None
+        vector = features(text, self.buckets)
+        if not vector:
+            return None
+        allowed = set(allowed) if allowed is not None else None
+        labels = [label for label in self._sums if allowed is None or label in allowed]
+        if len(labels) < 2:
+            return None  # Nothing to tell apart: a single known type would win every input
+        similarities = {label: self._similarity(label, vector) for label in labels}
+        best = max(similarities, key=similarities.get)
+        top = similarities[best]
+        total = sum(math.exp((s - top) / self.temperature) for s in similarities.values())
+        confidence = 1.0 / total
+        if confidence < self.min_confidence:
+            return None
+        return Prediction(best, confidence, top)
+
+    def _similarity(self, label: str, vector: SparseVector) -> float:
+        centroid = self._sums[label]
+        norm = self._norms.get(label)
+        if norm is None:
+            norm = self._norms[label] = math.sqrt(sum(v * v for v in centroid.values()))
+        if not norm:
+            return 0.0
+        return sum(value * centroid.get(index, 0.0) for index, value in vector.items()) / norm
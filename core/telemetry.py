@@ -11,7 +11,7 @@ from collections import deque
 from dataclasses import asdict, dataclass, field, replace
 from datetime import datetime, timezone
 from threading import Lock
-from typing import Deque, Dict, List, Literal, Optional
+from typing import Any, Deque, Dict, List, Literal, Optional
 
 from core.events import Event, EventType
 
@@ -32,6 +32,41 @@ class ProviderStats:
         return self.prompt_tokens + self.completion_tokens
 
 
+@dataclass
+class CacheStats:
+    """Lookup outcomes of one cache (e.g. the LLM response cache)."""
+
+    name: str
+    hits: int = 0
+    misses: int = 0
+    bypassed: int = 0
+    by_operation: Dict[str, Dict[str, int]] = field(default_factory=dict)
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+@dataclass
+class HedgeStats:
+    """Hedged-request outcomes for one primary model."""
+
+    model: str
+    requests: int = 0
+    hedged: int = 0
+    backup_wins: int = 0
+    extra_cost_usd: float = 0.0  # estimated cost of the requests that lost
+
+    @property
+    def hedge_rate(self) -> float:
+        return self.hedged / self.requests if self.requests else 0.0
+
+    @property
+    def backup_win_rate(self) -> float:
+        return self.backup_wins / self.hedged if self.hedged else 0.0
+
+
 @dataclass
 class TaskRecord:
     """Snapshot of a task managed by the async queue."""
@@ -81,6 +116,9 @@ class TelemetrySnapshot:
     provider_stats: List[ProviderStats]
     tasks: List[TaskRecord]
     recent_events: List[EventLogEntry]
+    cache_stats: List[CacheStats] = field(default_factory=list)
+    provider_health: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    hedge_stats: List[HedgeStats] = field(default_factory=list)
 
     def to_dict(self) -> Dict[str, object]:
         """Return a JSON-serialisable dictionary."""
@@ -126,6 +164,23 @@ class TelemetrySnapshot:
                 }
                 for entry in self.recent_events
             ],
+            "cache_stats": [
+                {
+                    **asdict(stat),
+                    "hit_rate": round(stat.hit_rate, 4),
+                }
+                for stat in self.cache_stats
+            ],
+            "provider_health": {name: dict(state) for name, state in self.provider_health.items()},
+            "hedge_stats": [
+                {
+                    **asdict(stat),
+                    "extra_cost_usd": round(stat.extra_cost_usd, 6),
+                    "hedge_rate": round(stat.hedge_rate, 4),
+                    "backup_win_rate": round(stat.backup_win_rate, 4),
+                }
+                for stat in self.hedge_stats
+            ],
         }
 
 
@@ -151,6 +206,9 @@ class TelemetryHub:
         self._last_call_at: Optional[datetime] = None
         self._mode_counts = {"online": 0, "offline": 0, "hybrid": 0}
         self._mode_tokens = {"online": 0, "offline": 0, "hybrid": 0}
+        self._cache_stats: Dict[str, CacheStats] = {}
+        self._provider_health: Dict[str, Dict[str, Any]] = {}
+        self._hedge_stats: Dict[str, HedgeStats] = {}
         self._event_bus = None
 
     def set_runtime_mode(self, mode: str) -> None:
@@ -253,6 +311,56 @@ class TelemetryHub:
                 )
             )
 
+    def record_cache_lookup(
+        self,
+        *,
+        cache: str,
+        operation: str,
+        outcome: Literal["hit", "miss", "bypass"],
+    ) -> None:
+        """Count one cache lookup (hit, miss, or bypass of the cache)."""
+        field_name = {"hit": "hits", "miss": "misses", "bypass": "bypassed"}[outcome]
+        with self._lock:
+            stats = self._cache_stats.setdefault(cache, CacheStats(name=cache))
+            setattr(stats, field_name, getattr(stats, field_name) + 1)
+            per_operation = stats.by_operation.setdefault(
+                operation, {"hits": 0, "misses": 0, "bypassed": 0}
+            )
+            per_operation[field_name] += 1
+
+    def record_hedge(
+        self,
+        *,
+        model: str,
+        hedged: bool,
+        winner: Literal["primary", "backup"],
+        extra_cost_usd: float = 0.0,
+    ) -> None:
+        """Count one hedging-eligible request of a primary model."""
+        with self._lock:
+            stats = self._hedge_stats.setdefault(model, HedgeStats(model=model))
+            stats.requests += 1
+            if hedged:
+                stats.hedged += 1
+                stats.extra_cost_usd += extra_cost_usd
+            if winner == "backup":
+                stats.backup_wins += 1
+
+    def update_provider_health(self, provider: str, state: Dict[str, Any]) -> None:
+        """Store the latest rate limiter / circuit breaker state of a provider."""
+        with self._lock:
+            previous = self._provider_health.get(provider, {}).get("circuit")
+            self._provider_health[provider] = dict(state)
+            if previous is not None and previous != state.get("circuit"):
+                self._recent_events.append(
+                    EventLogEntry(
+                        timestamp=datetime.now(timezone.utc),
+                        level="warning" if state.get("circuit") != "closed" else "info",
+                        message=f"Circuit {previous} -> {state.get('circuit')} ({provider})",
+                        source=provider,
+                    )
+                )
+
     def attach_event_bus(self, event_bus) -> None:
         """Subscribe to task-related events for richer insights."""
         if not event_bus:
@@ -327,6 +435,15 @@ class TelemetryHub:
     def get_snapshot(self) -> TelemetrySnapshot:
         with self._lock:
             providers = [replace(stat) for stat in self._provider_stats.values()]
+            caches = [
+                replace(
+                    stat,
+                    by_operation={op: dict(counts) for op, counts in stat.by_operation.items()},
+                )
+                for stat in self._cache_stats.values()
+            ]
+            health = {name: dict(state) for name, state in self._provider_health.items()}
+            hedges = [replace(stat) for stat in self._hedge_stats.values()]
             tasks = sorted(self._tasks.values(), key=lambda r: r.updated_at, reverse=True)
             recent = list(self._recent_events)
             now = datetime.now(timezone.utc)
@@ -353,4 +470,7 @@ class TelemetryHub:
                 provider_stats=providers,
                 tasks=tasks[:10],
                 recent_events=recent[-15:],
+                cache_stats=caches,
+                provider_health=health,
+                hedge_stats=hedges,
             )
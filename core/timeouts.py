@@ -0,0 +1,221 @@
+"""Request timeouts learned from observed latencies.
+
+Fixed timeouts are wrong both ways: a fast cloud model that hangs keeps a
+pipeline waiting for its full 60 s, while a large local model legitimately
+needs longer than 120 s and gets killed mid-generation. AdaptiveTimeouts
+tracks a streaming latency histogram per key (a model name, or a pipeline
+such as WEBUI_INPUT) and derives
+
+    timeout = multiplier * p99 * max(1, expected_tokens / typical_tokens)
+
+clamped to [min_timeout, max_timeout], where typical_tokens is the moving
+average output length of the key. Until ``min_samples`` latencies were seen
+the caller's fixed default is used. Whole pipelines pass their fixed default
+as a floor too: their latency depends on the input, so a run of quick
+requests must not shrink the timeout of the next long one.
+
+The same histograms give hedged requests (core/hedging.py) their delay.
+
+The statistics persist across restarts in the operation tracking store
+(the memory_sqlite plugin), saved every ``persist_every`` samples and on
+shutdown. Samples recorded on the event loop are saved in a worker thread,
+so the database write never blocks the loop. Configured in the ``timeouts``
+section of config/settings.yaml.
+"""
+import asyncio
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+from core.latency import LatencyHistogram
+
+logger = logging.getLogger(__name__)
+
+# Keys of whole pipelines (model keys are the model names)
+WEBUI_INPUT = "pipeline:webui_input"
+WORKER_TASK = "pipeline:worker_task"
+
+
+def is_timeout(exc: BaseException) -> bool:
+    """True for timeouts of asyncio, httpx, litellm and the like."""
+    return isinstance(exc, (asyncio.TimeoutError, TimeoutError)) or "Timeout" in type(exc).__name__
+
+
+@dataclass
+class _KeyStats:
+    histogram: LatencyHistogram = field(default_factory=LatencyHistogram)
+    typical_tokens: Optional[float] = None  # EWMA of output tokens
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"histogram": self.histogram.to_dict(), "typical_tokens": self.typical_tokens}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "_KeyStats":
+        return cls(
+            histogram=LatencyHistogram.from_dict(data.get("histogram") or {}),
+            typical_tokens=data.get("typical_tokens"),
+        )
+
+
+class AdaptiveTimeouts:
+    TOKENS_SMOOTHING = 0.2
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        quantile: float = 0.99,
+        multiplier: float = 3.0,
+        min_samples: int = 20,
+        min_timeout: float = 5.0,
+        max_timeout: float = 900.0,
+        persist_every: int = 20,
+    ):
+        """
+        Args:
+            enabled: Use learned timeouts; if False every caller gets its default.
+            quantile: Latency quantile the timeout is derived from.
+            multiplier: Timeout as a multiple of that quantile.
+            min_samples: Latencies needed per key before its learned timeout is used.
+            min_timeout: Lower bound of learned timeouts, in seconds.
+            max_timeout: Upper bound of learned timeouts, in seconds.
+            persist_every: Save to the attached store after this many new samples.
+        """
+        self.enabled = enabled
+        self.quantile = quantile
+        self.multiplier = multiplier
+        self.min_samples = min_samples
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.persist_every = max(1, persist_every)
+        self._stats: Dict[str, _KeyStats] = {}
+        self._store: Any = None
+        self._unsaved = 0
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()  # Writes land in snapshot order
+        self._background_save: Optional[asyncio.Task] = None
+
+    def configure(self, config: Optional[Dict[str, Any]]) -> None:
+        """Apply the timeouts section of settings.yaml (at startup and on reload)."""
+        config = config or {}
+        self.enabled = bool(config.get("enabled", True))
+        self.quantile = float(config.get("quantile", 0.99))
+        self.multiplier = float(config.get("multiplier", 3.0))
+        self.min_samples = int(config.get("min_samples", 20))
+        self.min_timeout = float(config.get("min_timeout", 5.0))
+        self.max_timeout = float(config.get("max_timeout", 900.0))
+        self.persist_every = max(1, int(config.get("persist_every", 20)))
+
+    # --- Persistence ------------------------------------------------------
+
+    def attach_store(self, store: Any) -> None:
+        """
+        Load saved statistics from store and save back to it from now on.
+
+        Args:
+            store: Object with load_latency_stats() -> {key: dict} and
+                save_latency_stats({key: dict}), e.g. the memory_sqlite plugin.
+        """
+        self._store = store
+        try:
+            saved = store.load_latency_stats()
+        except Exception as e:
+            logger.warning(f"Could not load latency statistics: {e}")
+            return
+        with self._lock:
+            for key, data in saved.items():
+                if key not in self._stats:
+                    self._stats[key] = _KeyStats.from_dict(data)
+        logger.info(f"Loaded latency statistics for {len(saved)} models/pipelines")
+
+    def save(self) -> None:
+        """Save to the attached store now (blocking; used on shutdown)."""
+        if self._store is None:
+            return
+        with self._save_lock:
+            with self._lock:
+                stats = {key: entry.to_dict() for key, entry in self._stats.items()}
+                self._unsaved = 0
+            try:
+                self._store.save_latency_stats(stats)
+            except Exception as e:
+                logger.warning(f"Could not save latency statistics: {e}")
+
+    def _save_soon(self) -> None:
+        """Save in a worker thread when called on the event loop, else right away."""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.save()
+            return
+        # One save at a time; samples recorded meanwhile go into the next one
+        if self._background_save is None or self._background_save.done():
+            self._background_save = loop.create_task(asyncio.to_thread(self.save))
+
+    # --- Recording / timeouts ---------------------------------------------
+
+    def record(self, key: str, seconds: float, output_tokens: Optional[int] = None) -> None:
+        """
+        Record the latency of a completed request (and its output length).
+
+        Callers also record requests that timed out, with the time waited: it
+        is a lower bound of the real latency, and lets the timeout of a model
+        that became slower grow instead of failing forever.
+        """
+        with self._lock:
+            entry = self._stats.setdefault(key, _KeyStats())
+            entry.histogram.add(seconds)
+            if isinstance(output_tokens, (int, float)) and output_tokens > 0:
+                if entry.typical_tokens is None:
+                    entry.typical_tokens = float(output_tokens)
+                else:
+                    entry.typical_tokens += self.TOKENS_SMOOTHING * (output_tokens - entry.typical_tokens)
+            self._unsaved += 1
+            due = self._unsaved >= self.persist_every
+        if due:
+            self._save_soon()
+
+    def latency_quantile(
+        self, key: str, q: float, min_samples: Optional[int] = None
+    ) -> Optional[float]:
+        """
+        Learned q-quantile of key's latency, or None until min_samples
+        (default: self.min_samples) latencies were recorded.
+        """
+        needed = self.min_samples if min_samples is None else min_samples
+        with self._lock:
+            entry = self._stats.get(key)
+            if entry is None or entry.histogram.samples < max(1, needed):
+                return None
+            return entry.histogram.quantile(q)
+
+    def timeout_for(
+        self,
+        key: str,
+        default: float,
+        expected_tokens: Optional[int] = None,
+        floor: Optional[float] = None,
+    ) -> float:
+        """
+        Timeout in seconds for a request to key.
+
+        Args:
+            default: Fixed timeout used until enough latencies were observed.
+            expected_tokens: Expected output length, if the caller knows it.
+            floor: Lower bound of the learned timeout (instead of min_timeout).
+        """
+        if not self.enabled:
+            return default
+        with self._lock:
+            entry = self._stats.get(key)
+            if entry is None or entry.histogram.samples < self.min_samples:
+                return default
+            learned = entry.histogram.quantile(self.quantile)
+            typical_tokens = entry.typical_tokens
+        if learned is None:
+            return default
+        timeout = self.multiplier * learned
+        if expected_tokens and typical_tokens:
+            timeout *= max(1.0, expected_tokens / typical_tokens)
+        lowest = self.min_timeout if floor is None else max(self.min_timeout, floor)
+        return max(lowest, min(self.max_timeout, timeout))
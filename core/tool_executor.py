@@ -0,0 +1,177 @@
+"""Off-loop execution of tool methods during plan execution.
+
+Many tool methods are synchronous (requests, subprocess, file I/O). Calling
+them directly from the kernel blocks the event loop, freezing the WebUI,
+heartbeats and every other coroutine until they return. The ToolExecutor
+runs sync methods on a bounded thread pool, or on a process pool for plugins
+that declare ``cpu_bound = True``, and applies timeouts: default_timeout to
+sync calls, tool_timeouts to every call of the listed tools. Async methods
+run on the loop and manage their own timeouts unless listed (an LLM tool
+streaming a long answer would otherwise be cut off).
+
+Only the function and its arguments travel to the worker process, so the
+CPU-bound methods of a cpu_bound plugin must be staticmethods (or
+module-level functions assigned to the class). A method bound to the plugin
+instance would pickle the whole plugin on every call; it runs on the thread
+pool instead, with a warning.
+
+Configured in config/settings.yaml:
+
+    kernel:
+      tool_execution:
+        max_workers: 8           # tool thread pool size
+        process_workers: 2       # process pool size for cpu_bound plugins
+        default_timeout: 300     # seconds, per sync tool call
+        tool_timeouts:
+          tool_web_search: 60
+
+A timed-out sync call cannot be interrupted; its worker thread (or process)
+finishes in the background while the plan step fails with
+ToolExecutionTimeout.
+"""
+import asyncio
+import functools
+import inspect
+import logging
+import pickle
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from core.tool_registry import ToolMethod
+
+logger = logging.getLogger(__name__)
+
+
+class ToolExecutionTimeout(Exception):
+    """Raised when a tool method does not finish within its timeout."""
+
+
+class ToolExecutor:
+    def __init__(
+        self,
+        max_workers: int = 8,
+        process_workers: int = 2,
+        default_timeout: Optional[float] = 300.0,
+        tool_timeouts: Optional[Dict[str, float]] = None,
+    ):
+        """
+        Args:
+            max_workers: Size of the thread pool for sync tool methods.
+            process_workers: Size of the process pool for CPU-bound plugins
+                (0 runs them on the thread pool as well).
+            default_timeout: Seconds a sync tool call may take; None for no limit.
+            tool_timeouts: Per-tool timeouts keyed by plugin name (sync and async).
+        """
+        self.max_workers = max(1, int(max_workers))
+        self.process_workers = max(0, int(process_workers))
+        self.default_timeout = default_timeout
+        self.tool_timeouts = dict(tool_timeouts or {})
+        self._thread_pool: Optional[ThreadPoolExecutor] = None
+        self._process_pool: Optional[ProcessPoolExecutor] = None
+        self._process_targets: Dict[Tuple[str, str], Optional[Callable[..., Any]]] = {}
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]]) -> "ToolExecutor":
+        """Build from the kernel.tool_execution section of settings.yaml."""
+        config = config or {}
+        default_timeout = config.get("default_timeout", 300.0)
+        return cls(
+            max_workers=config.get("max_workers", 8),
+            process_workers=config.get("process_workers", 2),
+            default_timeout=float(default_timeout) if default_timeout else None,
+            tool_timeouts={
+                name: float(seconds)
+                for name, seconds in (config.get("tool_timeouts", {}) or {}).items()
+            },
+        )
+
+    def timeout_for(self, tool_method: ToolMethod) -> Optional[float]:
+        default = None if tool_method.is_async else self.default_timeout
+        return self.tool_timeouts.get(tool_method.tool_name, default)
+
+    def _get_thread_pool(self) -> ThreadPoolExecutor:
+        if self._thread_pool is None:
+            self._thread_pool = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="sophia-tool"
+            )
+        return self._thread_pool
+
+    def _process_target(self, tool_method: ToolMethod) -> Optional[Callable[..., Any]]:
+        """
+        The function a cpu_bound tool method runs in the process pool, or None
+        if it must stay on the thread pool. Plain functions (staticmethods,
+        module-level functions) pickle by reference; bound methods would carry
+        the plugin instance along.
+        """
+        key = (tool_method.tool_name, tool_method.method_name)
+        if key not in self._process_targets:
+            func = tool_method.method
+            target = None
+            if inspect.ismethod(func):
+                reason = "it is bound to the plugin instance (make it a staticmethod)"
+            else:
+                try:
+                    pickle.dumps(func)
+                    target = func
+                except Exception as e:
+                    reason = f"it cannot be pickled ({e})"
+            if target is None:
+                logger.warning(
+                    f"{tool_method.tool_name}.{tool_method.method_name} is cpu_bound but cannot "
+                    f"be sent to a process: {reason}; using the thread pool instead.",
+                    extra={"plugin_name": "Kernel"},
+                )
+            self._process_targets[key] = target
+        return self._process_targets[key]
+
+    def _pool_for(
+        self, tool_method: ToolMethod, kwargs: Dict[str, Any]
+    ) -> Tuple[Executor, Callable[..., Any]]:
+        """The pool to run a sync tool call on and the callable to submit to it."""
+        if tool_method.cpu_bound and self.process_workers:
+            target = self._process_target(tool_method)
+            if target is not None:
+                try:
+                    pickle.dumps(kwargs)
+                except Exception as e:
+                    logger.warning(
+                        f"Arguments of {tool_method.tool_name}.{tool_method.method_name} cannot "
+                        f"be sent to a process ({e}); using the thread pool for this call.",
+                        extra={"plugin_name": "Kernel"},
+                    )
+                else:
+                    if self._process_pool is None:
+                        self._process_pool = ProcessPoolExecutor(max_workers=self.process_workers)
+                    return self._process_pool, functools.partial(target, **kwargs)
+        return self._get_thread_pool(), functools.partial(tool_method.method, **kwargs)
+
+    async def call(self, tool_method: ToolMethod, **kwargs: Any) -> Any:
+        """
+        Invoke a tool method without blocking the event loop.
+
+        Raises:
+            ToolExecutionTimeout: If the call exceeds the tool's timeout.
+        """
+        if tool_method.is_async:
+            awaitable = tool_method.method(**kwargs)
+        else:
+            pool, call = self._pool_for(tool_method, kwargs)
+            loop = asyncio.get_running_loop()
+            awaitable = loop.run_in_executor(pool, call)
+
+        timeout = self.timeout_for(tool_method)
+        try:
+            return await asyncio.wait_for(awaitable, timeout=timeout)
+        except asyncio.TimeoutError:
+            raise ToolExecutionTimeout(
+                f"{tool_method.tool_name}.{tool_method.method_name} timed out after {timeout}s"
+            )
+
+    def shutdown(self, cancel_pending: bool = True) -> None:
+        """Stop accepting work; running calls are not waited for."""
+        if self._thread_pool is not None:
+            self._thread_pool.shutdown(wait=False, cancel_futures=cancel_pending)
+            self._thread_pool = None
+        if self._process_pool is not None:
+            self._process_pool.shutdown(wait=False, cancel_futures=cancel_pending)
+            self._process_pool = None
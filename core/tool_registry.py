@@ -0,0 +1,162 @@
+"""Tool registry shared by the Kernel's plan executors.
+
+Building pydantic validation models from every plugin's tool definitions is
+expensive compared to executing a short plan, so the registry compiles them
+once (at Kernel.initialize) and keeps a lookup table of tool methods keyed
+by (tool_name, method_name). It only rebuilds when the set of plugin
+instances changes.
+"""
+import inspect
+import logging
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Type
+
+from pydantic import BaseModel, Field, create_model
+
+logger = logging.getLogger(__name__)
+
+JSON_TYPE_MAP: Dict[str, type] = {
+    "string": str,
+    "integer": int,
+    "number": float,
+    "boolean": bool,
+    "array": list,
+}
+
+
+@dataclass
+class ToolMethod:
+    """A resolved, callable tool method with its call characteristics precomputed."""
+
+    tool_name: str
+    method_name: str
+    method: Callable[..., Any]
+    accepts_context: bool
+    is_async: bool
+    validation_model: Optional[Type[BaseModel]] = None
+    cpu_bound: bool = False
+
+
+def build_validation_model(func_name: str, params_schema: Dict[str, Any]) -> Type[BaseModel]:
+    """Create the pydantic model validating arguments for one tool function."""
+    fields: Dict[str, Any] = {}
+    required_fields = params_schema.get("required", [])
+    for prop_name, prop_def in params_schema.get("properties", {}).items():
+        field_type = JSON_TYPE_MAP.get(prop_def.get("type"), str)
+        desc = prop_def.get("description")
+        default_value = prop_def.get("default")
+
+        # Use Field(...) for required, Field(default=...) for optional
+        if prop_name in required_fields:
+            fields[prop_name] = (field_type, Field(..., description=desc))
+        else:
+            fields[prop_name] = (field_type, Field(default=default_value, description=desc))
+
+    return create_model(f"{func_name}ArgsModel", **fields)
+
+
+class ToolRegistry:
+    """Precompiled tool validators and method lookup table."""
+
+    def __init__(self) -> None:
+        self._fingerprint: Optional[Tuple[int, ...]] = None
+        self._plugins: Dict[str, Any] = {}
+        # Validation models by (tool_name, method_name) and by bare method name;
+        # the latter keeps plans with a wrong tool_name validating as before.
+        self._models: Dict[Tuple[str, str], Type[BaseModel]] = {}
+        self._models_by_method: Dict[str, Type[BaseModel]] = {}
+        self._methods: Dict[Tuple[str, str], Optional[ToolMethod]] = {}
+        self.build_count = 0
+
+    @staticmethod
+    def _fingerprint_of(plugins: Iterable[Any]) -> Tuple[int, ...]:
+        return tuple(id(p) for p in plugins)
+
+    def build(self, plugins: Iterable[Any]) -> None:
+        """Compile validation models for every tool definition of the given plugins."""
+        plugin_list = list(plugins)
+        self._fingerprint = self._fingerprint_of(plugin_list)
+        self._plugins = {p.name: p for p in plugin_list}
+        self._models = {}
+        self._models_by_method = {}
+        self._methods = {}
+
+        for plugin in self._plugins.values():
+            get_tool_definitions = getattr(plugin, "get_tool_definitions", None)
+            if not callable(get_tool_definitions):
+                continue
+            try:
+                tool_defs: List[Dict[str, Any]] = get_tool_definitions() or []
+            except Exception as e:
+                logger.warning(
+                    f"Could not load tool definitions from '{plugin.name}': {e}",
+                    extra={"plugin_name": "Kernel"},
+                )
+                continue
+            for tool_def in tool_defs:
+                function = tool_def.get("function", {})
+                func_name = function.get("name")
+                params_schema = function.get("parameters")
+                if func_name and params_schema:
+                    model = build_validation_model(func_name, params_schema)
+                    self._models[(plugin.name, func_name)] = model
+                    self._models_by_method[func_name] = model
+
+        self.build_count += 1
+        logger.info(
+            f"Tool registry built: {len(self._models)} tool methods from "
+            f"{len(self._plugins)} plugins.",
+            extra={"plugin_name": "Kernel"},
+        )
+
+    def refresh(self, plugins: Iterable[Any]) -> bool:
+        """Rebuild only if the plugin instances differ from the last build."""
+        plugin_list = list(plugins)
+        if self._fingerprint_of(plugin_list) == self._fingerprint:
+            return False
+        self.build(plugin_list)
+        return True
+
+    def invalidate(self) -> None:
+        """Force the next refresh() to rebuild (e.g. after plugins were reloaded)."""
+        self._fingerprint = None
+
+    def get_validation_model(
+        self, tool_name: Optional[str], method_name: Optional[str]
+    ) -> Optional[Type[BaseModel]]:
+        if not method_name:
+            return None
+        model = self._models.get((tool_name or "", method_name))
+        if model is None:
+            model = self._models_by_method.get(method_name)
+        return model
+
+    def get_method(
+        self, tool_name: Optional[str], method_name: Optional[str]
+    ) -> Optional[ToolMethod]:
+        """Resolve tool_name.method_name, caching the signature inspection."""
+        if not tool_name or not method_name:
+            return None
+        key = (tool_name, method_name)
+        if key in self._methods:
+            return self._methods[key]
+
+        tool = self._plugins.get(tool_name)
+        method = getattr(tool, method_name, None) if tool else None
+        entry = None
+        if callable(method):
+            try:
+                accepts_context = "context" in inspect.signature(method).parameters
+            except (TypeError, ValueError):
+                accepts_context = False
+            entry = ToolMethod(
+                tool_name=tool_name,
+                method_name=method_name,
+                method=method,
+                accepts_context=accepts_context,
+                is_async=inspect.iscoroutinefunction(method),
+                validation_model=self.get_validation_model(tool_name, method_name),
+                cpu_bound=getattr(tool, "cpu_bound", False) is True,
+            )
+        self._methods[key] = entry
+        return entry
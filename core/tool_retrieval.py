@@ -0,0 +1,100 @@
+"""Relevance-ranked tool subset for planner prompts.
+
+The planner used to list every tool method of every plugin in its prompt:
+with 50+ plugins that is thousands of tokens per request, most of them
+irrelevant to the input. ToolIndex is a BM25 index over the tool
+descriptions, built once per set of plugins; at planning time it ranks the
+tools against the user input and the planner lists only the top-k (plus
+essential tools that are always listed).
+
+Terms are lower-cased words (identifiers split at underscores and
+camelCase, function words dropped) plus their first five characters, a crude stem that matches
+inflected forms in both English and Czech ("files"/"file",
+"soubory"/"souboru").
+"""
+import math
+import re
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Sequence
+
+_WORD = re.compile(r"[^\W_]+", re.UNICODE)
+_CAMEL = re.compile(r"(?<=[a-z])(?=[A-Z])")
+_STEM = 5
+# Function words match nearly every description (English and Czech)
+_STOP_WORDS = frozenset(
+    "a an and are as at be by do for from how in is it me my of on or the this to what with "
+    "co je jak k na o se si to v ve z za".split()
+)
+
+
+@dataclass(frozen=True)
+class ToolEntry:
+    tool_name: str
+    method_name: str
+    description: str
+
+
+def terms(text: str) -> List[str]:
+    words = [w for w in _WORD.findall(_CAMEL.sub(" ", text).lower()) if w not in _STOP_WORDS]
+    return words + [word[:_STEM] for word in words if len(word) > _STEM]
+
+
+class ToolIndex:
+    def __init__(self, entries: Iterable[ToolEntry], k1: float = 1.5, b: float = 0.75):
+        """
+        Args:
+            entries: The tool methods to index (the full tool catalog).
+            k1, b: BM25 term-frequency saturation and length normalisation.
+        """
+        self.entries: List[ToolEntry] = list(entries)
+        self.k1 = k1
+        self.b = b
+        self._documents: List[Counter] = [
+            Counter(terms(f"{e.tool_name} {e.method_name} {e.description}")) for e in self.entries
+        ]
+        self._lengths = [sum(doc.values()) for doc in self._documents]
+        self._average_length = (sum(self._lengths) / len(self._lengths)) if self._lengths else 0.0
+        document_frequency: Counter = Counter()
+        for doc in self._documents:
+            document_frequency.update(doc.keys())
+        count = len(self._documents)
+        self._idf: Dict[str, float] = {
+            term: math.log(1 + (count - df + 0.5) / (df + 0.5)) for term, df in document_frequency.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def scores(self, query: str) -> List[float]:
+        """BM25 score of every entry for query, in catalog order."""
+        query_terms = set(terms(query))
+        results = []
+        for doc, length in zip(self._documents, self._lengths):
+            score = 0.0
+            norm = self.k1 * (1 - self.b + self.b * length / self._average_length) if self._average_length else self.k1
+            for term in query_terms:
+                tf = doc.get(term)
+                if tf:
+                    score += self._idf[term] * tf * (self.k1 + 1) / (tf + norm)
+            results.append(score)
+        return results
+
+    def select(self, query: str, top_k: int, essential: Sequence[str] = ()) -> List[ToolEntry]:
+        """
+        The top_k entries most relevant to query plus every entry of an
+        essential tool, in catalog order (so the prompt stays stable across
+        requests selecting the same tools). Entries that do not match the
+        query at all are not selected; if nothing matches, every entry is
+        returned (there is nothing to filter on, e.g. the input is in another
+        language than the descriptions).
+        """
+        scores = self.scores(query)
+        ranked = sorted(
+            (i for i, score in enumerate(scores) if score > 0), key=lambda i: scores[i], reverse=True
+        )
+        if not ranked:
+            return list(self.entries)
+        chosen = set(ranked[:top_k])
+        chosen.update(i for i, e in enumerate(self.entries) if e.tool_name in essential)
+        return [e for i, e in enumerate(self.entries) if i in chosen]
@@ -16,6 +16,12 @@ class BasePlugin(ABC):
     Abstract class defining the strict contract that every plugin must adhere to.
     """
 
+    # Tool plugins whose synchronous methods are CPU-bound set this to True so the
+    # Kernel runs them in a process pool instead of the tool thread pool. Those
+    # methods must be staticmethods: only the function and its arguments are
+    # sent to the worker process, never the plugin instance.
+    cpu_bound: bool = False
+
     @property
     @abstractmethod
     def name(self) -> str:
@@ -50,3 +56,10 @@ class BasePlugin(ABC):
         after its work is complete.
         """
         pass
+
+    async def shutdown(self) -> None:
+        """
+        Called once when the Kernel stops.
+        Plugins holding connections, pools or background tasks release them here.
+        """
+        pass
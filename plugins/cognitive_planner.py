@@ -2,11 +2,49 @@ import logging
 import json
 import re
 import os
+import time
 from plugins.base_plugin import BasePlugin, PluginType
 from core.context import SharedContext
+from core.prompt_registry import PromptRegistry, PromptTemplate
+from core.tool_retrieval import ToolEntry, ToolIndex
 
 logger = logging.getLogger(__name__)
 
+# One plan step, as the kernel executes it
+PLAN_STEP_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "tool_name": {"type": "string"},
+        "method_name": {"type": "string"},
+        "arguments": {"type": "object"},
+    },
+    "required": ["tool_name", "method_name", "arguments"],
+}
+# The whole plan; local runtimes constrain their output to it in structured mode
+PLAN_SCHEMA = {"type": "array", "items": PLAN_STEP_SCHEMA}
+# Arguments of the create_plan function the cloud planner calls
+CREATE_PLAN_PARAMETERS = {
+    "type": "object",
+    "properties": {
+        "plan": {
+            "type": "array",
+            "description": "An array of tool call objects.",
+            "items": PLAN_STEP_SCHEMA,
+        }
+    },
+    "required": ["plan"],
+}
+# Plugins whose tools offline (local model) planning may use
+OFFLINE_TOOLS = frozenset(
+    {
+        "tool_local_llm",
+        "tool_code_workspace",
+        "tool_file_system",
+        "tool_datetime",
+        "tool_terminal",
+    }
+)
+
 
 def _extract_json_from_text(text: str):
     """
@@ -170,26 +208,49 @@ class Planner(BasePlugin):
     def version(self) -> str:
         return "1.0.0"
 
+    @property
+    def prompt_template(self) -> PromptTemplate:
+        return self._prompt_template
+
+    @prompt_template.setter
+    def prompt_template(self, value) -> None:
+        # Plain strings are accepted for ad-hoc prompts
+        self._prompt_template = PromptTemplate.inline(value) if isinstance(value, str) else value
+
     def setup(self, config: dict) -> None:
         """This plugin requires the LLM tool to function."""
         self.prompt_template = ""
         offline_mode = config.get("offline_mode", False)
+        prompts = config.get("prompt_registry") or PromptRegistry()
         
         # Use simplified prompt in offline mode (smaller context for 8B models)
-        prompt_file = "config/prompts/planner_offline_prompt.txt" if offline_mode else "config/prompts/planner_prompt_template.txt"
+        prompt_name = "planner_offline_prompt" if offline_mode else "planner_prompt_template"
         
         try:
-            with open(prompt_file, "r") as f:
-                self.prompt_template = f.read()
+            self.prompt_template = prompts.get(prompt_name)
             if offline_mode:
                 logger.info("Using simplified offline planner prompt")
-        except FileNotFoundError:
+        except KeyError:
             logger.error(
-                f"Planner prompt template not found: {prompt_file}",
+                f"Planner prompt template not found: config/prompts/{prompt_name}.txt",
                 extra={"plugin_name": "cognitive_planner"},
             )
             self.prompt_template = "Create a plan. Available tools: {tool_list}"
 
+        # Local planning passes PLAN_SCHEMA to the runtime as an output constraint
+        # instead of relying on function calling and JSON repair
+        self.structured_output = bool(config.get("structured_output", True))
+
+        # Online, only the tools most relevant to the input are listed in the prompt
+        retrieval_config = config.get("tool_retrieval", {}) or {}
+        self.tool_retrieval = bool(retrieval_config.get("enabled", True))
+        self.tool_top_k = int(retrieval_config.get("top_k", 12))
+        self.essential_tools = list(retrieval_config.get("essential_tools", ["tool_llm", "tool_local_llm"]))
+        self._tool_index = None
+        self._tool_index_key = None
+        self._tool_lines = {}
+        self._tool_lists = {}
+
         self.plugins = config.get("all_plugins", {})
         # Use local LLM in offline mode, cloud LLM otherwise
         offline_mode = config.get("offline_mode", False)
@@ -208,6 +269,38 @@ class Planner(BasePlugin):
                 extra={"plugin_name": "cognitive_planner"},
             )
 
+    def _tool_catalog(self) -> ToolIndex:
+        """
+        Every tool method of the loaded plugins, indexed and rendered once per
+        set of plugins (on first use, so every plugin has been set up): the
+        prompt line of each method and the full online and offline tool lists.
+        """
+        key = tuple(id(plugin) for plugin in self.plugins.values())
+        if self._tool_index is None or key != self._tool_index_key:
+            entries = []
+            for plugin in self.plugins.values():
+                if plugin.name == "tool_langfuse" or not hasattr(plugin, "get_tool_definitions"):
+                    continue
+                for tool_def in plugin.get_tool_definitions():
+                    func = tool_def.get("function", {})
+                    if "name" in func and "description" in func:
+                        entries.append(ToolEntry(plugin.name, func["name"], func["description"]))
+            self._tool_lines = {
+                entry: (
+                    f"- tool_name: '{entry.tool_name}', "
+                    f"method_name: '{entry.method_name}', "
+                    f"description: '{entry.description}'"
+                )
+                for entry in entries
+            }
+            self._tool_lists = {
+                "online": "\n".join(self._tool_lines[e] for e in entries),
+                "offline": "\n".join(self._tool_lines[e] for e in entries if e.tool_name in OFFLINE_TOOLS),
+            }
+            self._tool_index = ToolIndex(entries)
+            self._tool_index_key = key
+        return self._tool_index
+
     async def execute(self, context: SharedContext) -> SharedContext:
         """
         Takes user input and generates a plan by instructing the LLM to call a
@@ -259,37 +352,20 @@ class Planner(BasePlugin):
         if not context.user_input or not llm_tool:
             return context
 
-        # --- Dynamically discover available tools ---
-        available_tools = []
+        # --- Available tools (rendered once per plugin set, see _tool_catalog) ---
+        tool_index = self._tool_catalog()
         if context.offline_mode:
-            essential_tool_names = {
-                "tool_local_llm",
-                "tool_code_workspace",
-                "tool_file_system",
-                "tool_datetime",
-                "tool_terminal",
-            }
+            tool_list_str = self._tool_lists["offline"]
+        elif self.tool_retrieval and len(tool_index) > self.tool_top_k:
+            entries = tool_index.select(context.user_input, self.tool_top_k, self.essential_tools)
+            tool_list_str = "\n".join(self._tool_lines[entry] for entry in entries)
+            context.logger.debug(
+                f"Listing {len(entries)} of {len(tool_index)} tool methods in the planner prompt",
+                extra={"plugin_name": "cognitive_planner"},
+            )
         else:
-            essential_tool_names = None
-
-        for plugin in self.plugins.values():
-            if essential_tool_names and plugin.name not in essential_tool_names:
-                continue
-            if plugin.name == "tool_langfuse":
-                continue
-            if hasattr(plugin, "get_tool_definitions"):
-                for tool_def in plugin.get_tool_definitions():
-                    func = tool_def.get("function", {})
-                    if "name" in func and "description" in func:
-                        tool_string = (
-                            f"- tool_name: '{plugin.name}', "
-                            f"method_name: '{func['name']}', "
-                            f"description: '{func['description']}'"
-                        )
-                        available_tools.append(tool_string)
-
-        tool_list_str = "\n".join(available_tools)
-        tool_description = self.prompt_template.format(
+            tool_list_str = self._tool_lists["online"]
+        tool_description = self.prompt_template.render(
             tool_list=tool_list_str, user_input=context.user_input
         )
 
@@ -299,25 +375,7 @@ class Planner(BasePlugin):
                 "function": {
                     "name": "create_plan",
                     "description": tool_description,
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "plan": {
-                                "type": "array",
-                                "description": "An array of tool call objects.",
-                                "items": {
-                                    "type": "object",
-                                    "properties": {
-                                        "tool_name": {"type": "string"},
-                                        "method_name": {"type": "string"},
-                                        "arguments": {"type": "object"},
-                                    },
-                                    "required": ["tool_name", "method_name", "arguments"],
-                                },
-                            }
-                        },
-                        "required": ["plan"],
-                    },
+                    "parameters": CREATE_PLAN_PARAMETERS,
                 },
             }
         ]
@@ -345,8 +403,18 @@ class Planner(BasePlugin):
             history=[],
             payload=context.payload.copy(),
         )
-        planning_context.payload["tools"] = planner_tool
-        planning_context.payload["tool_choice"] = "auto"
+        structured = bool(context.offline_mode and self.structured_output)
+        if structured:
+            # Decoding is constrained to PLAN_SCHEMA, so the first answer is a valid plan;
+            # the tool list goes into the system prompt instead of a function definition
+            planning_context.payload.pop("tools", None)
+            planning_context.payload.pop("tool_choice", None)
+            planning_context.payload["response_format"] = PLAN_SCHEMA
+            strict_instructions = tool_description
+        else:
+            planning_context.payload["tools"] = planner_tool
+            planning_context.payload["tool_choice"] = "auto"
+        started = time.monotonic()
         # Loop: try initial planning + repair attempts. If the LLM output isn't valid JSON matching
         # the schema, we retry and provide the last output as context so the model can correct itself.
         while attempt <= max_retries:
@@ -509,6 +577,13 @@ class Planner(BasePlugin):
                 if plan_data:
                     context.payload["plan"] = plan_data
                     context.payload["planner_failed"] = False
+                    context.payload["planner_attempts"] = attempt + 1
+                    context.logger.info(
+                        f"Plan produced after {attempt + 1} attempt(s) in "
+                        f"{time.monotonic() - started:.1f}s"
+                        + (" (structured output)" if structured else ""),
+                        extra={"plugin_name": "cognitive_planner"},
+                    )
                     return context
                 else:
                     context.logger.warning(
@@ -531,6 +606,7 @@ class Planner(BasePlugin):
         )
         context.payload["plan"] = []
         context.payload["planner_failed"] = True
+        context.payload["planner_attempts"] = max_retries + 1
         context.payload["planner_error_message"] = (
             f"Planner failed after {max_retries+1} attempts. Last exception: {last_exception}"
             if last_exception else "Planner failed to generate a plan."
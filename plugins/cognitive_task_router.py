@@ -1,17 +1,20 @@
 # plugins/cognitive_task_router.py
 import logging
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional
 from datetime import datetime, timedelta
-from pathlib import Path
 import calendar
 
-import yaml
 import os
+from core.config_service import ConfigService
 from core.context import SharedContext
+from core.prompt_registry import PromptRegistry
+from core.task_classifier import Prediction, TaskClassifier
 from plugins.base_plugin import BasePlugin, PluginType
 
 logger = logging.getLogger(__name__)
 
+CLASSIFICATION_MODEL = "openrouter/anthropic/claude-3-haiku"
+
 
 class CognitiveTaskRouter(BasePlugin):
     """
@@ -65,6 +68,13 @@ class CognitiveTaskRouter(BasePlugin):
         
         # Event bus (optional)
         self.event_bus = None
+        self._config_subscriptions: List[Callable[[], None]] = []
+
+        # Local task classifier, trained on the LLM's logged classifications
+        self.classifier = TaskClassifier()
+        self.classifier_enabled = True
+        self.classifier_max_examples = 5000
+        self._classifier_loaded = False
 
     def setup(self, config: Dict[str, Any]) -> None:
         """
@@ -79,39 +89,61 @@ class CognitiveTaskRouter(BasePlugin):
         # Get event bus if available
         self.event_bus = config.get("event_bus")
         
-        # Load routing strategies
-        strategy_path = "config/model_strategy.yaml"
-        try:
-            with open(strategy_path, "r", encoding="utf-8") as f:
-                strategy_config = yaml.safe_load(f)
-            self.strategies = strategy_config.get("task_strategies", [])
-            # Set the default strategy to the one for 'plan_generation'
-            for strategy in self.strategies:
-                if strategy.get("task_type") == "plan_generation":
-                    self.default_strategy = strategy
-                    break
-            if not self.default_strategy and self.strategies:
-                # Fallback to the first strategy if 'generovani_planu' is not found
-                self.default_strategy = self.strategies[0]
+        # model_strategy.yaml and autonomy.yaml are parsed once by the config service
+        # and re-applied whenever the files change on disk
+        self.config_service = config.get("config_service") or ConfigService()
+        self.prompts = config.get("prompt_registry") or PromptRegistry()
+        self._load_strategies(self.config_service.get("model_strategy"))
+        self._load_budget_config(self.config_service.get("autonomy"))
+        # setup() may run again (plugin reload): drop the previous subscriptions first
+        for unsubscribe in self._config_subscriptions:
+            unsubscribe()
+        self._config_subscriptions = [
+            self.config_service.subscribe("model_strategy", lambda _, data: self._load_strategies(data)),
+            self.config_service.subscribe("autonomy", lambda _, data: self._load_budget_config(data)),
+        ]
 
-        except FileNotFoundError:
+        classifier_config = config.get("local_classifier", {}) or {}
+        self.classifier_enabled = bool(classifier_config.get("enabled", True))
+        self.classifier_max_examples = int(classifier_config.get("max_examples", 5000))
+        self.classifier = TaskClassifier(
+            min_confidence=float(classifier_config.get("min_confidence", 0.8)),
+            min_examples=int(classifier_config.get("min_examples", 20)),
+        )
+
+    def _load_strategies(self, strategy_config: Dict[str, Any]) -> None:
+        """Load the model routing strategies from model_strategy.yaml contents."""
+        strategy_path = self.config_service.path_of("model_strategy")
+        if not strategy_config:
             logger.error(
                 f"Model strategy file not found at {strategy_path}",
                 extra={"plugin_name": self.name},
             )
+            return
+        try:
+            strategies = strategy_config.get("task_strategies", [])
+            default_strategy = None
+            # Set the default strategy to the one for 'plan_generation'
+            for strategy in strategies:
+                if strategy.get("task_type") == "plan_generation":
+                    default_strategy = strategy
+                    break
+            if not default_strategy and strategies:
+                # Fallback to the first strategy if 'generovani_planu' is not found
+                default_strategy = strategies[0]
+            self.strategies = strategies
+            self.default_strategy = default_strategy
         except Exception as e:
             logger.error(
                 f"Error loading model strategies: {e}",
                 extra={"plugin_name": self.name},
             )
-        
-        # Load budget configuration from autonomy.yaml
-        autonomy_path = "config/autonomy.yaml"
+
+    def _load_budget_config(self, autonomy_config: Dict[str, Any]) -> None:
+        """Load budget limits and pacing from autonomy.yaml contents."""
+        autonomy_path = self.config_service.path_of("autonomy")
         try:
-            if Path(autonomy_path).exists():
-                with open(autonomy_path, "r", encoding="utf-8") as f:
-                    autonomy_config = yaml.safe_load(f)
-                
+            if autonomy_config:
                 budget_config = autonomy_config.get("autonomy", {}).get("budget", {})
                 self.monthly_limit = budget_config.get("monthly_limit_usd", 30.0)
                 
@@ -211,17 +243,7 @@ class CognitiveTaskRouter(BasePlugin):
             )
             context.offline_mode = True  # Force offline routing
         
-        # Decide offline/local-only policy. Honor explicit payload flags
-        force_local = os.getenv("SOPHIA_FORCE_LOCAL_ONLY", "false").lower() == "true"
-        allow_cloud_payload = False
-        try:
-            allow_cloud_payload = bool(context.payload.get("allow_cloud", False))
-        except Exception:
-            allow_cloud_payload = False
-
-        # If forced local-only and not explicitly allowed by payload or a user-originated task,
-        # treat this as offline mode for routing decisions.
-        if force_local and not allow_cloud_payload and context.payload.get("origin") != "user_input":
+        if self._force_local_only(context):
             context.offline_mode = True
 
         # Select LLM based on offline mode
@@ -257,17 +279,30 @@ class CognitiveTaskRouter(BasePlugin):
                 return context
 
         try:
-            # Dynamically build the prompt for the LLM
-            prompt = self._build_classification_prompt(context.user_input)
-            llm_context = SharedContext(
-                session_id=context.session_id,
-                current_state=context.current_state,
-                logger=context.logger,
-                user_input=prompt,
-                payload={"model_config": {"model": "openrouter/anthropic/claude-3-haiku"}},
-            )
-            classification_response = await llm_tool.execute(context=llm_context)
-            classified_task_type = classification_response.payload.get("llm_response", "").strip()
+            # The local classifier answers in microseconds; the LLM only gets what it is unsure of
+            prediction = self._classify_locally(context.user_input)
+            if prediction is not None:
+                classified_task_type = prediction.task_type
+                context.logger.info(
+                    f"Task classified locally as '{classified_task_type}' "
+                    f"(confidence {prediction.confidence:.2f})",
+                    extra={"plugin_name": self.name},
+                )
+            else:
+                # Dynamically build the prompt for the LLM
+                prompt = self._build_classification_prompt(context.user_input)
+                llm_context = SharedContext(
+                    session_id=context.session_id,
+                    current_state=context.current_state,
+                    logger=context.logger,
+                    user_input=prompt,
+                    payload={
+                        "model_config": {"model": CLASSIFICATION_MODEL},
+                        "cache_operation": "classification",
+                    },
+                )
+                classification_response = await llm_tool.execute(context=llm_context)
+                classified_task_type = classification_response.payload.get("llm_response", "").strip()
 
             # Find the strategy for the classified task type
             selected_strategy = next(
@@ -282,6 +317,8 @@ class CognitiveTaskRouter(BasePlugin):
                     extra={"plugin_name": self.name},
                 )
                 model_to_use = selected_strategy["model"]
+                if prediction is None:
+                    self._remember_classification(context, classified_task_type)
             else:
                 context.logger.warning(
                     f"Could not classify task. Defaulting to high-quality model. "
@@ -305,6 +342,102 @@ class CognitiveTaskRouter(BasePlugin):
 
         return context
 
+    def speculative_model(self, context: SharedContext) -> Optional[str]:
+        """
+        The model execute() will most likely select, without calling an LLM:
+        the locally classified task type's model, else the default strategy's.
+        Lets the kernel start planning while the classification runs.
+
+        None when execute() would route to the local LLM anyway (offline
+        mode, budget limits or SOPHIA_FORCE_LOCAL_ONLY).
+        """
+        if not context.user_input or not self.default_strategy:
+            return None
+        if context.offline_mode or self._force_local_only(context) or self._budget_forces_local():
+            return None
+        prediction = self._classify_locally(context.user_input)
+        if prediction is not None:
+            for strategy in self.strategies:
+                if strategy.get("task_type") == prediction.task_type:
+                    return strategy["model"]
+        return self.default_strategy["model"]
+
+    def _force_local_only(self, context: SharedContext) -> bool:
+        """
+        SOPHIA_FORCE_LOCAL_ONLY policy: local routing unless the payload
+        explicitly allows the cloud or the task came from the user.
+        """
+        force_local = os.getenv("SOPHIA_FORCE_LOCAL_ONLY", "false").lower() == "true"
+        allow_cloud_payload = False
+        try:
+            allow_cloud_payload = bool(context.payload.get("allow_cloud", False))
+        except Exception:
+            allow_cloud_payload = False
+        return force_local and not allow_cloud_payload and context.payload.get("origin") != "user_input"
+
+    def _budget_forces_local(self) -> bool:
+        """
+        Whether execute()'s budget checks (80% of the monthly budget, daily
+        overspend) would force the local LLM, without their logging and events.
+        """
+        memory_plugin = self.plugins.get("memory_sqlite")
+        if not memory_plugin:
+            # No spend tracking: execute() relies on what it last saw
+            return self.monthly_limit > 0 and self.monthly_spent / self.monthly_limit >= 0.8
+        try:
+            now = datetime.now()
+            monthly_spent = self._estimate_cost(memory_plugin.get_cloud_tokens(now.strftime("%Y-%m")))
+            today_spent = self._estimate_cost(memory_plugin.get_cloud_tokens(now.strftime("%Y-%m-%d")))
+        except Exception:
+            return True  # Unknown spend: let execute() decide before planning
+        if self.monthly_limit > 0 and monthly_spent / self.monthly_limit >= 0.8:
+            return True
+        if not self.pacing_enabled:
+            return False
+        today = self.daily_budget_cache.get(now.strftime("%Y-%m-%d"))
+        daily_limit = today["limit"] if today else self._calculate_daily_budget_limit()
+        return today_spent > daily_limit * 1.5
+
+    def _classify_locally(self, user_input: str) -> Optional[Prediction]:
+        """Confident local prediction of the task type, else None (ask the LLM)."""
+        if not self.classifier_enabled:
+            return None
+        if not self._classifier_loaded:
+            self._classifier_loaded = True
+            memory_plugin = self.plugins.get("memory_sqlite")
+            load = getattr(memory_plugin, "load_task_classifications", None)
+            if callable(load):
+                try:
+                    self.classifier.fit(load(self.classifier_max_examples))
+                    logger.info(
+                        f"[TaskRouter] Local classifier trained on {self.classifier.examples} examples",
+                        extra={"plugin_name": self.name},
+                    )
+                except Exception as e:
+                    logger.warning(
+                        f"[TaskRouter] Could not load logged classifications: {e}",
+                        extra={"plugin_name": self.name},
+                    )
+        return self.classifier.predict(
+            user_input, allowed=[s.get("task_type") for s in self.strategies]
+        )
+
+    def _remember_classification(self, context: SharedContext, task_type: str) -> None:
+        """Learn from (and log) a classification the LLM made."""
+        if not self.classifier_enabled:
+            return
+        self.classifier.learn(context.user_input, task_type)
+        memory_plugin = self.plugins.get("memory_sqlite")
+        save = getattr(memory_plugin, "save_task_classification", None)
+        if callable(save):
+            try:
+                save(context.user_input, task_type, CLASSIFICATION_MODEL)
+            except Exception as e:
+                context.logger.warning(
+                    f"[TaskRouter] Could not log classification: {e}",
+                    extra={"plugin_name": self.name},
+                )
+
     async def _check_monthly_budget(self, context: SharedContext) -> None:
         """
         Check monthly budget usage from operation_tracking table.
@@ -334,89 +467,69 @@ class CognitiveTaskRouter(BasePlugin):
                 )
                 return
             
-            # Calculate start of current month
-            first_day_of_month = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-            cutoff_date = first_day_of_month.isoformat()
+            # Running cloud token total of this month, maintained by save_operation
+            # NOTE: Cost is estimated from token counts (rough approximation)
+            month_tokens = memory_plugin.get_cloud_tokens(now.strftime("%Y-%m"))
+            self.monthly_spent = self._estimate_cost(month_tokens)
+            
+            context.logger.info(
+                f"[TaskRouter] 💰 Monthly budget: ${self.monthly_spent:.2f}/${self.monthly_limit:.2f} "
+                f"({(self.monthly_spent/self.monthly_limit*100):.1f}% used)",
+                extra={"plugin_name": self.name}
+            )
             
-            # Query operation_tracking for this month's operations
-            # NOTE: This assumes cost tracking is implemented in operation_metadata
-            # For now, we estimate based on token counts (rough approximation)
-            from sqlalchemy import select, and_
+            # Check thresholds and emit warnings
+            usage_percent = self.monthly_spent / self.monthly_limit if self.monthly_limit > 0 else 0
             
-            with memory_plugin.engine.connect() as conn:
-                stmt = select(memory_plugin.operation_tracking_table).where(
-                    and_(
-                        memory_plugin.operation_tracking_table.c.timestamp >= cutoff_date,
-                        memory_plugin.operation_tracking_table.c.offline_mode == False  # Only cloud calls cost money
+            for threshold in self.budget_warning_thresholds:
+                if usage_percent >= threshold and threshold not in self.warned_thresholds:
+                    self.warned_thresholds.add(threshold)
+                    
+                    warning_msg = (
+                        f"Budget warning: {usage_percent*100:.1f}% used "
+                        f"(${self.monthly_spent:.2f}/${self.monthly_limit:.2f})"
                     )
-                )
-                
-                operations = conn.execute(stmt).fetchall()
-                
-                # Estimate cost: ~$0.15 per 1M tokens for cheap models
-                # This is VERY rough - real cost tracking should use actual model prices
-                total_tokens = 0
-                for op in operations:
-                    # op[12] = prompt_tokens, op[13] = completion_tokens
-                    prompt_tokens = op[12] if op[12] else 0
-                    completion_tokens = op[13] if op[13] else 0
-                    total_tokens += prompt_tokens + completion_tokens
-                
-                # Rough cost estimate (will be replaced with real tracking later)
-                estimated_cost = (total_tokens / 1_000_000) * 0.15  # $0.15 per 1M tokens avg
-                
-                self.monthly_spent = estimated_cost
-                
-                context.logger.info(
-                    f"[TaskRouter] 💰 Monthly budget: ${self.monthly_spent:.2f}/${self.monthly_limit:.2f} "
-                    f"({(self.monthly_spent/self.monthly_limit*100):.1f}% used)",
-                    extra={"plugin_name": self.name}
-                )
-                
-                # Check thresholds and emit warnings
-                usage_percent = self.monthly_spent / self.monthly_limit if self.monthly_limit > 0 else 0
-                
-                for threshold in self.budget_warning_thresholds:
-                    if usage_percent >= threshold and threshold not in self.warned_thresholds:
-                        self.warned_thresholds.add(threshold)
-                        
-                        warning_msg = (
-                            f"Budget warning: {usage_percent*100:.1f}% used "
-                            f"(${self.monthly_spent:.2f}/${self.monthly_limit:.2f})"
-                        )
-                        
-                        context.logger.warning(
-                            f"[TaskRouter] 🚨 {warning_msg}",
+                    
+                    context.logger.warning(
+                        f"[TaskRouter] 🚨 {warning_msg}",
+                        extra={"plugin_name": self.name}
+                    )
+                    
+                    # Emit BUDGET_WARNING event if event bus available
+                    if self.event_bus:
+                        from core.events import Event, EventType
+                        self.event_bus.publish(Event(
+                            event_type=EventType.BUDGET_WARNING,
+                            data={
+                                "threshold": threshold,
+                                "spent": self.monthly_spent,
+                                "limit": self.monthly_limit,
+                                "usage_percent": usage_percent,
+                                "message": warning_msg
+                            }
+                        ))
+                    
+                    # Auto-pause expensive operations at 100%
+                    if usage_percent >= 1.0:
+                        context.logger.error(
+                            f"[TaskRouter] 🛑 BUDGET LIMIT REACHED - forcing local-only mode",
                             extra={"plugin_name": self.name}
                         )
-                        
-                        # Emit BUDGET_WARNING event if event bus available
-                        if self.event_bus:
-                            from core.events import Event, EventType
-                            self.event_bus.publish(Event(
-                                event_type=EventType.BUDGET_WARNING,
-                                data={
-                                    "threshold": threshold,
-                                    "spent": self.monthly_spent,
-                                    "limit": self.monthly_limit,
-                                    "usage_percent": usage_percent,
-                                    "message": warning_msg
-                                }
-                            ))
-                        
-                        # Auto-pause expensive operations at 100%
-                        if usage_percent >= 1.0:
-                            context.logger.error(
-                                f"[TaskRouter] 🛑 BUDGET LIMIT REACHED - forcing local-only mode",
-                                extra={"plugin_name": self.name}
-                            )
-                
+            
         except Exception as e:
             context.logger.error(
                 f"[TaskRouter] Error checking budget: {e}",
                 extra={"plugin_name": self.name}
             )
 
+    @staticmethod
+    def _estimate_cost(tokens: int) -> float:
+        """
+        Rough cost of cloud tokens: ~$0.15 per 1M tokens for cheap models.
+        (Real cost tracking should use actual model prices.)
+        """
+        return (tokens / 1_000_000) * 0.15
+
     def _calculate_daily_budget_limit(self) -> float:
         """
         Calculate recommended daily budget based on remaining days in month.
@@ -478,67 +591,44 @@ class CognitiveTaskRouter(BasePlugin):
             if not memory_plugin:
                 return (0.0, today_cache["limit"], False)
             
-            # Calculate start of today
-            today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
-            cutoff_date = today_start.isoformat()
+            # Today's running cloud token total
+            today_spent = self._estimate_cost(memory_plugin.get_cloud_tokens(today_str))
             
-            # Query today's operations
-            from sqlalchemy import select, and_
+            # Update cache
+            today_cache["spent"] = today_spent
             
-            with memory_plugin.engine.connect() as conn:
-                stmt = select(memory_plugin.operation_tracking_table).where(
-                    and_(
-                        memory_plugin.operation_tracking_table.c.timestamp >= cutoff_date,
-                        memory_plugin.operation_tracking_table.c.offline_mode == False
-                    )
-                )
-                
-                today_ops = conn.execute(stmt).fetchall()
-                
-                # Calculate today's spend
-                total_tokens = 0
-                for op in today_ops:
-                    prompt_tokens = op[12] if op[12] else 0
-                    completion_tokens = op[13] if op[13] else 0
-                    total_tokens += prompt_tokens + completion_tokens
-                
-                today_spent = (total_tokens / 1_000_000) * 0.15  # Rough estimate
-                
-                # Update cache
-                today_cache["spent"] = today_spent
-                
-                # Check if overspending
-                overspent = today_spent > (today_cache["limit"] * 1.5)  # 150% threshold
+            # Check if overspending
+            overspent = today_spent > (today_cache["limit"] * 1.5)  # 150% threshold
+            
+            # Emit warning if needed
+            if overspent and not today_cache["warned"]:
+                today_cache["warned"] = True
                 
-                # Emit warning if needed
-                if overspent and not today_cache["warned"]:
-                    today_cache["warned"] = True
-                    
-                    warning_msg = (
-                        f"Daily budget overspend: ${today_spent:.2f} spent "
-                        f"(recommended: ${today_cache['limit']:.2f})"
-                    )
-                    
-                    context.logger.warning(
-                        f"[TaskRouter] ⚠️ {warning_msg}",
-                        extra={"plugin_name": self.name}
-                    )
-                    
-                    # Emit BUDGET_PACE_WARNING event
-                    if self.event_bus:
-                        from core.events import Event, EventType
-                        self.event_bus.publish(Event(
-                            event_type=EventType.BUDGET_PACE_WARNING,
-                            data={
-                                "today_spent": today_spent,
-                                "daily_limit": today_cache["limit"],
-                                "overspend_pct": (today_spent / today_cache["limit"] - 1) * 100,
-                                "message": warning_msg
-                            }
-                        ))
+                warning_msg = (
+                    f"Daily budget overspend: ${today_spent:.2f} spent "
+                    f"(recommended: ${today_cache['limit']:.2f})"
+                )
                 
-                return (today_spent, today_cache["limit"], overspent)
+                context.logger.warning(
+                    f"[TaskRouter] ⚠️ {warning_msg}",
+                    extra={"plugin_name": self.name}
+                )
                 
+                # Emit BUDGET_PACE_WARNING event
+                if self.event_bus:
+                    from core.events import Event, EventType
+                    self.event_bus.publish(Event(
+                        event_type=EventType.BUDGET_PACE_WARNING,
+                        data={
+                            "today_spent": today_spent,
+                            "daily_limit": today_cache["limit"],
+                            "overspend_pct": (today_spent / today_cache["limit"] - 1) * 100,
+                            "message": warning_msg
+                        }
+                    ))
+            
+            return (today_spent, today_cache["limit"], overspent)
+            
         except Exception as e:
             context.logger.error(
                 f"[TaskRouter] Error checking daily pacing: {e}",
@@ -570,14 +660,12 @@ class CognitiveTaskRouter(BasePlugin):
 
     def _build_classification_prompt(self, user_input: str) -> str:
         """Builds the prompt for the classification LLM."""
-        prompt_path = "config/prompts/classify_task_prompt.txt"
-        with open(prompt_path, "r", encoding="utf-8") as f:
-            prompt_template = f.read()
-
         strategy_descriptions = "\n".join(
             [f"- {s['task_type']}: {s['description']}" for s in self.strategies]
         )
-        return prompt_template.format(strategies=strategy_descriptions, user_input=user_input)
+        return self.prompts.render(
+            "classify_task_prompt", strategies=strategy_descriptions, user_input=user_input
+        )
 
     def get_model_for_task(self, task_type: str) -> str:
         """Gets the model for a given task type."""
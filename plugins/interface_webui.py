@@ -6,10 +6,10 @@ from uvicorn import Config, Server
 from typing import Dict, Optional
 from plugins.base_plugin import BasePlugin, PluginType
 from core.context import SharedContext
+from core.queue_backend import create_queue_backend
 import sqlite3
 import json
 from pathlib import Path
-from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
@@ -44,6 +44,8 @@ class WebUIInterface(BasePlugin):
         self.port = config.get("port", 8000)
         self.connections: Dict[str, WebSocket] = {}
         self.input_queue: asyncio.Queue = asyncio.Queue()
+        # Persistent task queue backend (sqlite/redis) from task_queue in settings.yaml
+        self.task_queue = create_queue_backend(config.get("task_queue"))
 
         @self.app.get("/")
         async def get_dashboard():
@@ -67,7 +69,10 @@ class WebUIInterface(BasePlugin):
                     async def response_callback(message: str):
                         await self.send_response(session_id, message)
 
-                    await self.input_queue.put((user_message, response_callback))
+                    async def stream_callback(frame: dict):
+                        await self.send_frame(session_id, frame)
+
+                    await self.input_queue.put((user_message, response_callback, stream_callback))
             except WebSocketDisconnect:
                 del self.connections[session_id]
                 logger.info(f"WebUI client {session_id} disconnected.")
@@ -109,22 +114,11 @@ class WebUIInterface(BasePlugin):
                 elif self.all_plugins:
                     stats["plugin_count"] = len(self.all_plugins)
                 
-                # Count tasks by status from SQLite
-                db_path = Path(".data") / "tasks.sqlite"
-                if db_path.exists():
-                    conn = sqlite3.connect(str(db_path))
-                    cur = conn.cursor()
-                    
-                    cur.execute("SELECT COUNT(*) FROM tasks WHERE status = 'pending'")
-                    stats["pending_count"] = cur.fetchone()[0]
-                    
-                    cur.execute("SELECT COUNT(*) FROM tasks WHERE status = 'done'")
-                    stats["done_count"] = cur.fetchone()[0]
-                    
-                    cur.execute("SELECT COUNT(*) FROM tasks WHERE status = 'failed'")
-                    stats["failed_count"] = cur.fetchone()[0]
-                    
-                    conn.close()
+                # Count tasks by status from the persistent queue backend
+                for status in ("pending", "done", "failed"):
+                    stats[f"{status}_count"] = await asyncio.to_thread(
+                        self.task_queue.count, status
+                    )
             except Exception as e:
                 logger.error(f"Error fetching stats: {e}")
 
@@ -244,34 +238,10 @@ class WebUIInterface(BasePlugin):
             if not instruction:
                 raise HTTPException(status_code=400, detail="instruction field is required")
             
-            # Insert into database
-            db_path = Path(".data") / "tasks.sqlite"
-            db_path.parent.mkdir(parents=True, exist_ok=True)
-            
             try:
-                conn = sqlite3.connect(str(db_path))
-                cur = conn.cursor()
-                
-                # Ensure table exists (in case it's first run)
-                cur.execute("""
-                    CREATE TABLE IF NOT EXISTS tasks (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        created_at TEXT DEFAULT (datetime('now')),
-                        priority INTEGER DEFAULT 100,
-                        status TEXT DEFAULT 'pending',
-                        payload TEXT
-                    )
-                """)
-                
-                payload_json = json.dumps({"instruction": instruction})
-                
-                cur.execute(
-                    "INSERT INTO tasks (priority, status, payload, created_at) VALUES (?, 'pending', ?, ?)",
-                    (int(priority), payload_json, datetime.utcnow().isoformat())
+                task_id = await asyncio.to_thread(
+                    self.task_queue.enqueue, {"instruction": instruction}, int(priority)
                 )
-                conn.commit()
-                task_id = cur.lastrowid
-                conn.close()
                 
                 logger.info(f"Task #{task_id} enqueued via WebUI: {instruction[:50]}...")
                 return {"success": True, "task_id": task_id}
@@ -946,9 +916,12 @@ class WebUIInterface(BasePlugin):
 
         # Non-blocking check for messages
         try:
-            user_input, response_callback = self.input_queue.get_nowait()
+            user_input, response_callback, *rest = self.input_queue.get_nowait()
+            stream_callback = rest[0] if rest else None
             context.user_input = user_input
             context.payload["_response_callback"] = response_callback
+            if stream_callback:
+                context.payload["_stream_callback"] = stream_callback
             logger.info(f"[WebUI] Received message: {user_input}", extra={"plugin_name": "interface_webui"})
             
             # Publish USER_INPUT event to trigger processing
@@ -959,7 +932,11 @@ class WebUIInterface(BasePlugin):
                         event_type=EventType.USER_INPUT,
                         source="interface_webui",
                         priority=EventPriority.HIGH,
-                        data={"input": user_input, "response_callback": response_callback}
+                        data={
+                            "input": user_input,
+                            "response_callback": response_callback,
+                            "stream_callback": stream_callback,
+                        }
                     )
                 )
                 logger.info(f"[WebUI] USER_INPUT event published", extra={"plugin_name": "interface_webui"})
@@ -975,3 +952,8 @@ class WebUIInterface(BasePlugin):
             # Send as JSON for Dashboard compatibility
             response = json.dumps({"type": "response", "message": message})
             await self.connections[session_id].send_text(response)
+
+    async def send_frame(self, session_id: str, frame: dict):
+        """Sends one incremental frame (phase change, answer token, final response) to a web client."""
+        if session_id in self.connections:
+            await self.connections[session_id].send_text(json.dumps(frame))
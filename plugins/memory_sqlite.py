@@ -2,8 +2,9 @@ from pathlib import Path
 from plugins.base_plugin import BasePlugin, PluginType
 from core.context import SharedContext
 from core.operation_metadata import OperationMetadata
-from sqlalchemy import create_engine, Table, Column, Integer, String, Float, Boolean, MetaData, insert, select, and_
-from typing import List, Dict, Optional
+from sqlalchemy import create_engine, Table, Column, Integer, String, Float, Boolean, MetaData, insert, select, and_, delete, func, inspect
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from typing import List, Dict, Optional, Tuple
 import json
 import logging
 
@@ -92,7 +93,41 @@ class SQLiteMemory(BasePlugin):
             Column("deployed_at", String),  # Timestamp of deployment
         )
         
+        # Latency statistics per model/pipeline (core/timeouts.py), kept across restarts
+        self.latency_stats_table = Table(
+            "latency_stats",
+            self.metadata,
+            Column("key", String, primary_key=True),
+            Column("stats", String, nullable=False),  # JSON histogram + typical output length
+            Column("updated_at", String, nullable=False),
+        )
+
+        # Inputs and the task type the router's LLM gave them; trains the local classifier
+        self.task_classifications_table = Table(
+            "task_classifications",
+            self.metadata,
+            Column("id", Integer, primary_key=True),
+            Column("timestamp", String, nullable=False),
+            Column("user_input", String, nullable=False),
+            Column("task_type", String, nullable=False),
+            Column("model_used", String),
+        )
+
+        # Running cloud token totals per month ("YYYY-MM") and day ("YYYY-MM-DD"),
+        # kept up to date by save_operation so budget checks need not scan operation_tracking
+        self.spend_totals_table = Table(
+            "spend_totals",
+            self.metadata,
+            Column("period", String, primary_key=True),
+            Column("prompt_tokens", Integer, nullable=False, default=0),
+            Column("completion_tokens", Integer, nullable=False, default=0),
+            Column("operations", Integer, nullable=False, default=0),
+        )
+
+        needs_spend_totals = not inspect(self.engine).has_table("spend_totals")
         self.metadata.create_all(self.engine)
+        if needs_spend_totals:
+            self.rebuild_spend_totals()  # Existing database: totals start from its history
         logger.info(f"SQLite memory initialized: {db_path_str}")
 
     async def execute(self, context: SharedContext) -> SharedContext:
@@ -165,9 +200,72 @@ class SQLiteMemory(BasePlugin):
                     raw_metadata=metadata.to_json(),
                 )
             )
+            if not metadata.offline_mode:  # Only cloud calls cost money
+                self._add_to_spend_totals(
+                    conn, metadata.timestamp, metadata.prompt_tokens or 0, metadata.completion_tokens or 0
+                )
             conn.commit()
             logger.debug(f"Saved operation {metadata.operation_id} to tracking table")
     
+    def _add_to_spend_totals(self, conn, timestamp: str, prompt_tokens: int, completion_tokens: int) -> None:
+        table = self.spend_totals_table
+        rows = [
+            {"period": period, "prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens, "operations": 1}
+            for period in (timestamp[:7], timestamp[:10])
+        ]
+        statement = sqlite_insert(table)
+        statement = statement.on_conflict_do_update(
+            index_elements=["period"],
+            set_={
+                "prompt_tokens": table.c.prompt_tokens + statement.excluded.prompt_tokens,
+                "completion_tokens": table.c.completion_tokens + statement.excluded.completion_tokens,
+                "operations": table.c.operations + 1,
+            },
+        )
+        conn.execute(statement, rows)
+
+    def get_cloud_tokens(self, period: str) -> int:
+        """
+        Cloud (non-offline) tokens used in a month ("YYYY-MM") or day ("YYYY-MM-DD").
+
+        A primary-key lookup in spend_totals, independent of how many operations
+        are tracked.
+        """
+        table = self.spend_totals_table
+        with self.engine.connect() as conn:
+            row = conn.execute(
+                select(table.c.prompt_tokens, table.c.completion_tokens).where(table.c.period == period)
+            ).first()
+        return (row.prompt_tokens + row.completion_tokens) if row else 0
+
+    def rebuild_spend_totals(self) -> int:
+        """
+        Recompute spend_totals from operation_tracking (e.g. after editing it by
+        hand). Periods whose operations were already consolidated away lose their
+        totals. Returns the number of periods written.
+        """
+        ops = self.operation_tracking_table
+        with self.engine.connect() as conn:
+            conn.execute(delete(self.spend_totals_table))
+            for length in (7, 10):  # Months, days
+                period = func.substr(ops.c.timestamp, 1, length)
+                rows = conn.execute(
+                    select(
+                        period.label("period"),
+                        func.coalesce(func.sum(ops.c.prompt_tokens), 0).label("prompt_tokens"),
+                        func.coalesce(func.sum(ops.c.completion_tokens), 0).label("completion_tokens"),
+                        func.count().label("operations"),
+                    )
+                    .where(ops.c.offline_mode == False)
+                    .group_by(period)
+                ).fetchall()
+                if rows:
+                    conn.execute(insert(self.spend_totals_table), [dict(row._mapping) for row in rows])
+            written = conn.execute(select(func.count()).select_from(self.spend_totals_table)).scalar()
+            conn.commit()
+        logger.info(f"Rebuilt spend totals for {written} periods")
+        return written
+
     def get_unevaluated_offline_operations(self, limit: Optional[int] = None) -> List[OperationMetadata]:
         """
         Get all offline operations that haven't been evaluated yet.
@@ -236,6 +334,53 @@ class SQLiteMemory(BasePlugin):
             conn.commit()
             logger.debug(f"Updated operation {operation_id} with quality score {quality_score:.2f}")
     
+    def load_latency_stats(self) -> Dict[str, Dict]:
+        """Saved latency statistics, keyed by model or pipeline."""
+        with self.engine.connect() as conn:
+            rows = conn.execute(select(self.latency_stats_table)).fetchall()
+        return {row.key: json.loads(row.stats) for row in rows}
+
+    def save_latency_stats(self, stats: Dict[str, Dict]) -> None:
+        """Insert or replace the latency statistics of each key."""
+        if not stats:
+            return
+        from datetime import datetime
+
+        now = datetime.now().isoformat()
+        rows = [{"key": key, "stats": json.dumps(data), "updated_at": now} for key, data in stats.items()]
+        statement = sqlite_insert(self.latency_stats_table)
+        statement = statement.on_conflict_do_update(
+            index_elements=["key"],
+            set_={"stats": statement.excluded.stats, "updated_at": statement.excluded.updated_at},
+        )
+        with self.engine.connect() as conn:
+            conn.execute(statement, rows)
+            conn.commit()
+
+    def save_task_classification(self, user_input: str, task_type: str, model_used: Optional[str] = None) -> None:
+        """Log the task type an LLM classified an input as."""
+        from datetime import datetime
+
+        with self.engine.connect() as conn:
+            conn.execute(
+                insert(self.task_classifications_table).values(
+                    timestamp=datetime.now().isoformat(),
+                    user_input=user_input,
+                    task_type=task_type,
+                    model_used=model_used,
+                )
+            )
+            conn.commit()
+
+    def load_task_classifications(self, limit: int = 5000) -> List[Tuple[str, str]]:
+        """The most recent (user_input, task_type) pairs, oldest first."""
+        table = self.task_classifications_table
+        with self.engine.connect() as conn:
+            rows = conn.execute(
+                select(table.c.user_input, table.c.task_type).order_by(table.c.id.desc()).limit(limit)
+            ).fetchall()
+        return [(row.user_input, row.task_type) for row in reversed(rows)]
+
     def get_operation_statistics(self, days: int = 7) -> Dict:
         """
         Get statistics about operations over the last N days.
@@ -1,11 +1,32 @@
 import os
-import yaml
+import asyncio
 import logging
+import time
+from functools import partial
 from plugins.base_plugin import BasePlugin, PluginType
+from core.config_service import ConfigService
 from core.context import SharedContext
+from core.hedging import HedgeOutcome, HedgePolicy, hedged
+from core.llm_cache import cache_operation, canonical_key
+from core.prompt_registry import PromptRegistry, PromptTemplate
+from core.provider_health import ProviderHealth, ProviderUnavailable, is_provider_failure, provider_of
 from core.logging_filter import SessionIdFilter
+from core.single_flight import SingleFlight
+from core.timeouts import is_timeout
+from typing import AsyncIterator
 import litellm
 
+# Request timeout in seconds until enough latencies were observed (core/timeouts.py)
+DEFAULT_TIMEOUT = 60
+
+# Usage reported for responses that cost nothing (cache hits, coalesced calls)
+NO_USAGE_METADATA = {
+    "input_tokens": 0,
+    "output_tokens": 0,
+    "total_tokens": 0,
+    "cost_usd": 0.0,
+}
+
 
 class LLMTool(BasePlugin):
     """A tool plugin that uses an LLM to generate a response."""
@@ -13,14 +34,45 @@ class LLMTool(BasePlugin):
     def __init__(self):
         super().__init__()
         self.model = "mistralai/mistral-7b-instruct"  # A default fallback
-        self.system_prompt = "You are a helpful assistant."
+        self._system_prompt = PromptTemplate.inline("You are a helpful assistant.")
         self.api_key = None
+        self.llm_cache = None  # Shared LLMResponseCache, injected by the Kernel
+        self._single_flight = SingleFlight()
+        self.provider_health = ProviderHealth()
+        self.fallback_models: list[str] = []
+        self.hedging = HedgePolicy()  # From model_strategy.yaml; off by default
+        self.telemetry = None
+        self.timeouts = None  # Shared AdaptiveTimeouts, injected by the Kernel
+        self._config_subscriptions: list = []
         self.logger = None  # Will be injected in setup()
 
     @property
     def name(self) -> str:
         return "tool_llm"
 
+    @property
+    def system_prompt(self) -> str:
+        # Follows edits to sophia_dna.txt without re-reading it per call
+        return self._system_prompt.text
+
+    def _apply_settings(self, name: str, settings: dict) -> None:
+        """Pick up the LLM model from settings.yaml contents."""
+        if not settings:
+            # Keep default model if config file is not found
+            self.logger.warning("config/settings.yaml not found - using default model")
+            return
+        llm_settings = settings.get("llm", {}) or {}
+        self.fallback_models = list(llm_settings.get("fallback_models", []) or [])
+        self.provider_health.configure(llm_settings.get("provider_health"))
+        model = llm_settings.get("model", self.model)
+        if model != self.model:
+            self.model = model
+            self.logger.info(f"LLM model configured: {self.model}")
+
+    def _apply_strategy(self, name: str, strategy: dict) -> None:
+        """Pick up the hedging policy from model_strategy.yaml contents."""
+        self.hedging = HedgePolicy.from_strategy(strategy)
+
     @property
     def plugin_type(self) -> PluginType:
         return PluginType.TOOL
@@ -36,17 +88,21 @@ class LLMTool(BasePlugin):
         if not self.logger:
             raise ValueError("Logger must be provided in config")
 
-        try:
-            with open("config/settings.yaml", "r") as f:
-                config_data = yaml.safe_load(f)
-                self.model = config_data.get("llm", {}).get("model", self.model)
-                self.logger.info(f"LLM model configured: {self.model}")
-        except FileNotFoundError:
-            # Keep default model if config file is not found
-            self.logger.warning("config/settings.yaml not found - using default model")
-        except Exception as e:
-            # Handle other potential errors like parsing errors
-            self.logger.error(f"Error loading config: {e}")
+        # settings.yaml comes from the Kernel's config service (parsed once, hot-reloaded)
+        self.llm_cache = config.get("llm_cache")
+        self.telemetry = config.get("telemetry")
+        self.timeouts = config.get("timeouts")
+        self.provider_health.telemetry = self.telemetry
+        self.config_service = config.get("config_service") or ConfigService()
+        self._apply_settings("settings", self.config_service.get("settings"))
+        self._apply_strategy("model_strategy", self.config_service.get("model_strategy"))
+        # setup() may run again (plugin reload): drop the previous subscriptions first
+        for unsubscribe in self._config_subscriptions:
+            unsubscribe()
+        self._config_subscriptions = [
+            self.config_service.subscribe("settings", self._apply_settings),
+            self.config_service.subscribe("model_strategy", self._apply_strategy),
+        ]
 
         # --- Logging fix for litellm ---
         # litellm uses the root logger, which can cause issues with structured
@@ -71,11 +127,11 @@ class LLMTool(BasePlugin):
         console_handler.setFormatter(simple_formatter)
         litellm_logger.addHandler(console_handler)
 
+        prompts = config.get("prompt_registry") or PromptRegistry()
         try:
-            with open("config/prompts/sophia_dna.txt", "r") as f:
-                self.system_prompt = f.read()
-                self.logger.info("System prompt loaded from sophia_dna.txt")
-        except FileNotFoundError:
+            self._system_prompt = prompts.get("sophia_dna")
+            self.logger.info("System prompt loaded from sophia_dna.txt")
+        except KeyError:
             # Keep default system prompt if file not found
             self.logger.warning("sophia_dna.txt not found - using default system prompt")
 
@@ -123,6 +179,8 @@ class LLMTool(BasePlugin):
             prompt: Text to process. If not provided, falls back to context.payload["prompt"] or context.user_input
         
         Accepts an optional 'model_config' in the payload to override the default model.
+        Calls whose payload sets 'latency_critical' are hedged if model_strategy.yaml
+        enables hedging for the model.
         """
         # Priority: direct parameter > payload > user_input
         if prompt is None:
@@ -131,71 +189,302 @@ class LLMTool(BasePlugin):
         tools = context.payload.get("tools")
         tool_choice = context.payload.get("tool_choice")
         model_config = context.payload.get("model_config", {})
+        hedge = bool(context.payload.get("latency_critical"))
 
         # Determine the model to use: payload override > default
         model_to_use = model_config.get("model", self.model)
+        temperature = model_config.get("temperature")  # Provider default unless the caller sets one
 
         if not prompt:
             context.payload["llm_response"] = "Error: No input provided to LLMTool."
             return context
 
-        messages = [{"role": "system", "content": self.system_prompt}, *context.history]
-        if not any(msg["role"] == "user" and msg["content"] == prompt for msg in messages):
-            messages.append({"role": "user", "content": prompt})
+        messages = self._build_messages(context, prompt)
+
+        request = {
+            "provider": self.name,
+            "model": model_to_use,
+            "messages": messages,
+            "tools": tools,
+            "tool_choice": tool_choice,
+            "temperature": temperature,
+        }
+        operation = cache_operation(context)
+        cache_key = None
+        if self.llm_cache is not None:
+            cache_key, cached = await self.llm_cache.alookup(request, operation)
+            if cached is not None:
+                context.payload["llm_response"] = cached["llm_response"]
+                context.payload["llm_response_metadata"] = {
+                    **NO_USAGE_METADATA,
+                    "cached": True,
+                }
+                context.logger.info(
+                    f"LLM response for '{model_to_use}' served from cache ({operation}).",
+                    extra={"plugin_name": self.name},
+                )
+                return context
 
         context.logger.info(
             f"Calling LLM '{model_to_use}' with {len(messages)} messages.",
             extra={"plugin_name": self.name},
         )
         try:
-            completion_kwargs = {
+            # Concurrent identical requests share one upstream call
+            (llm_response, metadata), shared = await self._single_flight.do(
+                canonical_key(request),
+                lambda: self._complete(context, request, cache_key, operation, hedge),
+            )
+            context.payload["llm_response"] = llm_response
+            if shared:
+                # The tokens were paid for by the caller that made the call
+                context.payload["llm_response_metadata"] = {
+                    **NO_USAGE_METADATA,
+                    "coalesced": True,
+                }
+                context.logger.info(
+                    f"LLM response for '{model_to_use}' shared with a concurrent identical request.",
+                    extra={"plugin_name": self.name},
+                )
+            else:
+                context.payload["llm_response_metadata"] = metadata
+                context.logger.info(
+                    "LLM response received successfully.", extra={"plugin_name": self.name}
+                )
+        except Exception as e:
+            context.logger.error(
+                f"Error calling LLM '{model_to_use}': {e}",
+                exc_info=True,
+                extra={"plugin_name": self.name},
+            )
+            context.payload["llm_response"] = f"I am having trouble thinking right now. Error: {e}"
+            context.payload["llm_response_metadata"] = {}
+
+        return context
+
+    async def stream(
+        self,
+        *,
+        context: SharedContext,
+        prompt: str | None = None
+    ) -> AsyncIterator[str]:
+        """
+        Stream a plain-text answer token by token.
+
+        Same inputs as execute() but without tool calling. Yields text deltas
+        as the provider sends them; when the stream ends, the full text is in
+        context.payload["llm_response"] and usage/cost in
+        context.payload["llm_response_metadata"], as after execute().
+        """
+        if prompt is None:
+            prompt = context.payload.get("prompt", context.user_input)
+        model_config = context.payload.get("model_config", {})
+        model_to_use = model_config.get("model", self.model)
+        temperature = model_config.get("temperature")  # Provider default unless the caller sets one
+
+        if not prompt:
+            context.payload["llm_response"] = "Error: No input provided to LLMTool."
+            yield context.payload["llm_response"]
+            return
+
+        messages = self._build_messages(context, prompt)
+        context.logger.info(
+            f"Streaming LLM '{model_to_use}' with {len(messages)} messages.",
+            extra={"plugin_name": self.name},
+        )
+        chunks = []
+        parts: list[str] = []
+        try:
+            stream_kwargs = {
                 "model": model_to_use,
                 "messages": messages,
-                "tools": tools,
                 "api_key": self.api_key,
-                "timeout": 60,  # Add a timeout
+                "timeout": DEFAULT_TIMEOUT,
+                "stream": True,
             }
-            if tool_choice:
-                completion_kwargs["tool_choice"] = tool_choice
+            if temperature is not None:
+                stream_kwargs["temperature"] = temperature
+            response, _ = await self._acompletion(stream_kwargs)
+            async for chunk in response:
+                chunks.append(chunk)
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    parts.append(delta)
+                    yield delta
+        except Exception as e:
+            context.logger.error(
+                f"Error streaming LLM '{model_to_use}': {e}",
+                exc_info=True,
+                extra={"plugin_name": self.name},
+            )
+            error_text = f"I am having trouble thinking right now. Error: {e}"
+            if not parts:
+                context.payload["llm_response"] = error_text
+                context.payload["llm_response_metadata"] = {}
+                yield error_text
+                return
+
+        context.payload["llm_response"] = "".join(parts)
+        try:
+            # Rebuild a regular response from the chunks for usage and cost
+            context.payload["llm_response_metadata"] = self._response_metadata(
+                context, litellm.stream_chunk_builder(chunks, messages=messages), model_to_use
+            )
+        except Exception as e:
+            context.logger.warning(
+                f"Could not compute usage for streamed response: {e}",
+                extra={"plugin_name": self.name},
+            )
+            context.payload["llm_response_metadata"] = {}
+        context.logger.info(
+            "LLM stream completed successfully.", extra={"plugin_name": self.name}
+        )
+
+    async def _complete(
+        self,
+        context: SharedContext,
+        request: dict,
+        cache_key: str | None,
+        operation: str,
+        hedge: bool = False,
+    ) -> tuple:
+        """One upstream completion; returns (llm_response, metadata)."""
+        completion_kwargs = {
+            "model": request["model"],
+            "messages": request["messages"],
+            "tools": request["tools"],
+            "api_key": self.api_key,
+            "timeout": DEFAULT_TIMEOUT,
+        }
+        if request["tool_choice"]:
+            completion_kwargs["tool_choice"] = request["tool_choice"]
+        if request["temperature"] is not None:
+            completion_kwargs["temperature"] = request["temperature"]
 
-            response = await litellm.acompletion(**completion_kwargs)
-            message = response.choices[0].message
+        backup_model = None
+        if hedge and self.hedging.enabled:
+            backup_model = self.hedging.hedge_model_for(request["model"])
+        outcome = None
+        if backup_model:
+            outcome = await self._hedged_acompletion(completion_kwargs, backup_model)
+            response, model_used = outcome.result
+        else:
+            response, model_used = await self._acompletion(completion_kwargs)
+        message = response.choices[0].message
+        metadata = self._response_metadata(context, response, model_used)
+        llm_response = message.tool_calls if message.tool_calls else message.content
+        if outcome is not None:
+            self._record_hedge(request["model"], outcome, metadata)
 
-            # Store metadata
-            usage = response.usage
+        if model_used != request["model"]:
+            # Not the requested model's answer: report it, but do not cache it
+            if outcome is not None and outcome.winner == "backup":
+                metadata["hedged_from"] = request["model"]
+            else:
+                metadata["fallback_from"] = request["model"]
+            metadata["model"] = model_used
+        elif cache_key:
+            await self.llm_cache.aput(cache_key, llm_response, metadata, operation)
+        return llm_response, metadata
 
-            # Try to calculate cost, but don't fail if model isn't in price database
+    async def _hedged_acompletion(self, completion_kwargs: dict, backup_model: str) -> HedgeOutcome:
+        """
+        Race the primary model against backup_model, sent once the primary is
+        slower than its learned latency quantile. The result is (response, model_used).
+        """
+        delay = self.hedging.delay_for(completion_kwargs["model"], self.timeouts)
+        return await hedged(
+            partial(self._acompletion, completion_kwargs),
+            partial(self._acompletion, {**completion_kwargs, "model": backup_model}, fallbacks=False),
+            delay,
+        )
+
+    def _record_hedge(self, model: str, outcome: HedgeOutcome, metadata: dict) -> None:
+        metadata["hedged"] = outcome.hedged
+        extra_cost = 0.0
+        if outcome.hedged and metadata.get("total_tokens"):
+            # The losing request was cancelled mid-flight; estimate what it cost
+            # as the prompt share of the winner's cost.
+            extra_cost = metadata["cost_usd"] * metadata["input_tokens"] / metadata["total_tokens"]
+        if self.telemetry is not None:
+            self.telemetry.record_hedge(
+                model=model, hedged=outcome.hedged, winner=outcome.winner, extra_cost_usd=extra_cost
+            )
+
+    async def _acompletion(self, completion_kwargs: dict, fallbacks: bool = True) -> tuple:
+        """
+        litellm.acompletion through the per-provider rate limiter and circuit
+        breaker, moving on to llm.fallback_models while a provider is failing.
+
+        Returns:
+            (response, model_used)
+        """
+        requested = completion_kwargs["model"]
+        candidates = [requested]
+        if fallbacks:
+            candidates += [m for m in self.fallback_models if m != requested]
+        timed = not completion_kwargs.get("stream")
+        last_error = None
+        for model in candidates:
+            provider = provider_of(model)
+            timeout = completion_kwargs.get("timeout", DEFAULT_TIMEOUT)
+            if self.timeouts is not None:
+                timeout = self.timeouts.timeout_for(model, timeout)
+            started = time.monotonic()
             try:
-                cost = litellm.completion_cost(completion_response=response)
-            except Exception as cost_error:
-                context.logger.warning(
-                    f"Could not calculate cost for model '{model_to_use}': {cost_error}",
-                    extra={"plugin_name": self.name},
+                response = await self.provider_health.call(
+                    provider,
+                    partial(litellm.acompletion, **{**completion_kwargs, "model": model, "timeout": timeout}),
                 )
-                cost = 0.0  # Unknown cost
+            except asyncio.CancelledError:
+                if timed and self.timeouts is not None:
+                    # Lost a hedge race: the elapsed time is a lower bound of its latency
+                    self.timeouts.record(model, time.monotonic() - started)
+                raise
+            except ProviderUnavailable as e:
+                last_error = e
+            except Exception as e:
+                if timed and self.timeouts is not None and is_timeout(e):
+                    self.timeouts.record(model, time.monotonic() - started)
+                if not is_provider_failure(e):
+                    raise
+                last_error = e
+            else:
+                if timed and self.timeouts is not None:
+                    usage = getattr(response, "usage", None)
+                    self.timeouts.record(
+                        model, time.monotonic() - started, getattr(usage, "completion_tokens", None)
+                    )
+                if model != requested:
+                    self.logger.warning(f"LLM '{requested}' unavailable, answered by fallback '{model}'")
+                return response, model
+            self.logger.warning(f"LLM provider '{provider}' failed for '{model}': {last_error}")
+        raise last_error
 
-            context.payload["llm_response_metadata"] = {
-                "input_tokens": usage.prompt_tokens,
-                "output_tokens": usage.completion_tokens,
-                "total_tokens": usage.total_tokens,
-                "cost_usd": cost,
-            }
+    def _build_messages(self, context: SharedContext, prompt: str) -> list[dict]:
+        messages = [{"role": "system", "content": self.system_prompt}, *context.history]
+        if not any(msg["role"] == "user" and msg["content"] == prompt for msg in messages):
+            messages.append({"role": "user", "content": prompt})
+        return messages
 
-            if message.tool_calls:
-                context.payload["llm_response"] = message.tool_calls
-            else:
-                context.payload["llm_response"] = message.content
+    def _response_metadata(self, context: SharedContext, response, model_to_use: str) -> dict:
+        usage = response.usage
 
-            context.logger.info(
-                "LLM response received successfully.", extra={"plugin_name": self.name}
-            )
-        except Exception as e:
-            context.logger.error(
-                f"Error calling LLM '{model_to_use}': {e}",
-                exc_info=True,
+        # Try to calculate cost, but don't fail if model isn't in price database
+        try:
+            cost = litellm.completion_cost(completion_response=response)
+        except Exception as cost_error:
+            context.logger.warning(
+                f"Could not calculate cost for model '{model_to_use}': {cost_error}",
                 extra={"plugin_name": self.name},
             )
-            context.payload["llm_response"] = f"I am having trouble thinking right now. Error: {e}"
-            context.payload["llm_response_metadata"] = {}
+            cost = 0.0  # Unknown cost
 
-        return context
+        return {
+            "input_tokens": usage.prompt_tokens,
+            "output_tokens": usage.completion_tokens,
+            "total_tokens": usage.total_tokens,
+            "cost_usd": cost,
+        }
@@ -16,16 +16,26 @@ Supports models like:
 Version: 1.1.0 - Function calling support added
 """
 
+import asyncio
 import logging
+import time
 import httpx
-import requests  # Sync HTTP for Ollama (avoids httpx async lock issues in Sophia event loop)
+import requests  # Sync startup probe only; generation uses the pooled async client
 import json
-from typing import Dict, Any, List, Optional
+from typing import AsyncIterator, Dict, Any, List, Optional, Tuple
 from types import SimpleNamespace
 from pydantic import BaseModel, Field
 
 from plugins.base_plugin import BasePlugin, PluginType
 from core.context import SharedContext
+from core.http_clients import local_backends
+from core.llm_cache import cache_operation, canonical_key
+from core.llm_scheduler import BACKGROUND, GenerationScheduler, priority_of
+from core.model_residency import ModelResidency
+from core.session_context import SessionContextCache
+from core.prompt_registry import PromptRegistry
+from core.single_flight import SingleFlight
+from core.timeouts import is_timeout
 
 logger = logging.getLogger(__name__)
 
@@ -50,6 +60,27 @@ class LocalModelConfig(BaseModel):
     top_p: Optional[float] = Field(None, description="Nucleus sampling threshold")
     escalation_model: Optional[str] = Field(None, description="Model for Tier 2 escalation")
 
+    # Generation scheduling (core/llm_scheduler.py)
+    max_concurrency: int = Field(1, description="Concurrent generations per model")
+    model_concurrency: Dict[str, int] = Field(
+        default_factory=dict, description="Concurrent generations of individual models"
+    )
+    preempt_background: bool = Field(
+        True, description="Interactive requests requeue running background generations"
+    )
+
+    # Model residency, Ollama only (core/model_residency.py)
+    keep_alive: str = Field("30m", description="How long Ollama keeps a model loaded after use")
+    escalation_keep_alive: str = Field("10m", description="keep_alive of the escalation model")
+    ram_budget_gb: Optional[float] = Field(
+        None, description="Memory loaded models may use together; idle models are unloaded to stay within it"
+    )
+    preload: bool = Field(True, description="Load the configured model at startup")
+
+    # Conversation state reuse per session, Ollama only (core/session_context.py)
+    session_context: bool = Field(True, description="Continue session turns from the runtime's returned context")
+    session_cache_size: int = Field(32, description="Sessions whose conversation state is kept (LRU)")
+
 
 class LocalLLMTool(BasePlugin):
     """
@@ -77,6 +108,28 @@ class LocalLLMTool(BasePlugin):
         """Returns the version of the plugin."""
         return "1.0.0"
 
+    @property
+    def system_prompt(self) -> str:
+        return self._system_prompt.text
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Pooled keep-alive client for the configured runtime (shared per base URL)."""
+        if self._client is not None:
+            return self._client
+        return local_backends.get(self.config.base_url)
+
+    @client.setter
+    def client(self, client: Optional[httpx.AsyncClient]) -> None:
+        # Injected clients (e.g. with a mock transport) replace the shared one
+        self._client = client
+
+    async def shutdown(self) -> None:
+        """Close the pooled connections to the runtime."""
+        if self._preload_task is not None and not self._preload_task.done():
+            self._preload_task.cancel()
+        await local_backends.aclose(self.config.base_url)
+
     def setup(self, config: Dict[str, Any]) -> None:
         """
         Initialize local LLM configuration.
@@ -85,30 +138,47 @@ class LocalLLMTool(BasePlugin):
             config: Plugin configuration
         """
         self.config = LocalModelConfig(**config.get("local_llm", {}))
-        # Don't create shared client here - create fresh client per request to avoid connection issues
-        # self.client = httpx.AsyncClient(timeout=self.config.timeout)
-        # Expose a `client` attribute so tests and callers can monkeypatch or inspect it.
-        # Clients should be created per call to avoid event-loop conflicts, but
-        # having this attribute present avoids AttributeErrors in tests.
-        # Provide a lightweight client object so tests can patch .post/.get methods
-        # Default client placeholders - leave .post/.get as None so the
-        # implementation falls back to the synchronous `requests` library.
-        self.client = SimpleNamespace(post=None, get=None)
+        self.llm_cache = config.get("llm_cache")  # Shared LLMResponseCache, injected by the Kernel
+        self.timeouts = config.get("timeouts")  # Shared AdaptiveTimeouts, injected by the Kernel
+        self._single_flight = SingleFlight()
+        # Interactive generations go before planning, planning before background work
+        self.scheduler = GenerationScheduler(
+            max_concurrency=self.config.max_concurrency,
+            model_concurrency=self.config.model_concurrency,
+            preempt=self.config.preempt_background,
+        )
+        # HTTP goes through the shared pooled client (see `client`), created on first use
+        self._client: Optional[httpx.AsyncClient] = None
+        # Loaded Ollama models and their keep_alive; the escalation model is unloaded sooner
+        model_keep_alive = {self.config.model: self.config.keep_alive}
+        if self.config.escalation_model:
+            model_keep_alive[self.config.escalation_model] = self.config.escalation_keep_alive
+        self.residency = ModelResidency(
+            self.config.base_url,
+            lambda: self.client,
+            keep_alive=self.config.keep_alive,
+            model_keep_alive=model_keep_alive,
+            ram_budget_gb=self.config.ram_budget_gb,
+        )
+        self._preload_task: Optional[asyncio.Task] = None
+        # Conversation state per session, so a turn does not re-evaluate the whole history
+        self.sessions: Optional[SessionContextCache] = None
+        if self.config.session_context:
+            self.sessions = SessionContextCache(
+                self.config.session_cache_size, max_tokens=self.config.num_ctx
+            )
 
         # Use offline-specific prompt if offline_mode is set in config
         offline_mode = config.get("offline_mode", False)
-        if offline_mode:
-            prompt_path = "config/prompts/sophia_dna_offline.txt"
+        prompt_name = "sophia_dna_offline" if offline_mode else "sophia_dna"
+        prompts = config.get("prompt_registry") or PromptRegistry()
+        self._system_prompt = prompts.get(
+            prompt_name, default="You are Sophia, a helpful AI assistant."
+        )
+        if self._system_prompt.path:
+            logger.info(f"System prompt loaded from {self._system_prompt.path}")
         else:
-            prompt_path = "config/prompts/sophia_dna.txt"
-
-        self.system_prompt = "You are Sophia, a helpful AI assistant."
-        try:
-            with open(prompt_path, "r", encoding="utf-8") as f:
-                self.system_prompt = f.read()
-                logger.info(f"System prompt loaded from {prompt_path}")
-        except FileNotFoundError:
-            logger.warning(f"{prompt_path} not found - using default system prompt")
+            logger.warning(f"config/prompts/{prompt_name}.txt not found - using default system prompt")
 
         logger.info(
             f"Local LLM initialized: {self.config.runtime} @ {self.config.base_url}, "
@@ -144,11 +214,36 @@ class LocalLLMTool(BasePlugin):
                             )
                         else:
                             logger.info(f"Local model '{self.config.model}' is present", extra={"plugin_name": self.name})
+                            if self.config.preload:
+                                self._start_preload()
                 except Exception:
                     # Non-fatal; best-effort only
                     logger.debug("Local LLM probe returned non-JSON response", extra={"plugin_name": self.name})
         except Exception as e:
             logger.warning(f"Local LLM probe failed: {e}", extra={"plugin_name": self.name})
+    def _start_preload(self) -> None:
+        """Load the tier-1 model in the background so the first request does not wait for it."""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return  # Set up outside an event loop; the first request loads the model
+        self._preload_task = loop.create_task(self._preload(self.config.model))
+
+    async def _preload(self, model: str) -> None:
+        try:
+            await self.residency.warm(model, timeout=self.config.timeout)
+        except Exception as e:
+            logger.warning(f"Preloading local model '{model}' failed: {e}", extra={"plugin_name": self.name})
+
+    def prewarm(self, model: Optional[str] = None) -> None:
+        """
+        Start loading model (default: the escalation model) in the background,
+        e.g. when an escalation looks likely. No-op for runtimes other than Ollama.
+        """
+        model = model or self.config.escalation_model
+        if self.config.runtime == "ollama" and model:
+            self.residency.prewarm(model)
+
     async def execute(self, context: SharedContext) -> SharedContext:
         """
         Generate a response using local LLM with function calling support.
@@ -163,74 +258,61 @@ class LocalLLMTool(BasePlugin):
         prompt = context.payload.get("prompt", context.user_input)
         tools = context.payload.get("tools")  # Function calling tools (NOW SUPPORTED!)
         tool_choice = context.payload.get("tool_choice")
+        # JSON schema the answer must match (structured output), or "json" for any JSON
+        response_format = context.payload.get("response_format")
         
         if not prompt:
             context.payload["llm_response"] = {"content": "Error: No input provided to LocalLLMTool."}
             return context
         
-        # Build messages from history (keep as array!)
-        messages = []
-        if self.system_prompt:
-            messages.append({"role": "system", "content": self.system_prompt})
-        messages.extend(context.history)
-        
-        # Add current prompt if not in history
-        if not any(msg["role"] == "user" and msg["content"] == prompt for msg in messages):
-            messages.append({"role": "user", "content": prompt})
+        messages = self._build_messages(context, prompt)
+        model = self._model_for(context)
+
+        request = {
+            "provider": self.name,
+            "runtime": self.config.runtime,
+            "model": model,
+            "messages": messages,
+            "tools": tools,
+            "tool_choice": tool_choice,
+            "response_format": response_format,
+            "temperature": self.config.temperature,
+            "max_tokens": self.config.max_tokens,
+        }
+        operation = cache_operation(context)
+        cache_key = None
+        if self.llm_cache is not None:
+            cache_key, cached = await self.llm_cache.alookup(request, operation)
+            if cached is not None:
+                context.payload["llm_response"] = cached["llm_response"]
+                context.logger.info(
+                    f"Local LLM response served from cache ({operation})",
+                    extra={"plugin_name": self.name},
+                )
+                return context
         
         context.logger.info(
-            f"Calling local LLM '{self.config.model}' with {len(messages)} messages"
+            f"Calling local LLM '{model}' with {len(messages)} messages"
             + (f" and {len(tools)} tools" if tools else ""),
             extra={"plugin_name": self.name},
         )
         
         try:
-            # Use Ollama /api/chat with function calling support
-            if self.config.runtime == "ollama":
-                response_message = await self._generate_ollama(
-                    messages=messages,
-                    tools=tools,
-                    tool_choice=tool_choice,
-                    temperature=self.config.temperature,
-                    max_tokens=self.config.max_tokens
-                )
-            else:
-                # Fallback for other runtimes (LM Studio, llamafile)
-                # They also support OpenAI-compatible /chat/completions
-                response_message = await self._generate_lmstudio_chat(
-                    messages=messages,
-                    tools=tools,
-                    tool_choice=tool_choice,
-                    temperature=self.config.temperature,
-                    max_tokens=self.config.max_tokens
-                )
-            
-            # Store response matching tool_llm format:
-            # - If tool_calls present, convert to LiteLLM-compatible objects
-            # - Otherwise store content string
-            if response_message.get("tool_calls"):
-                # Convert Ollama tool_calls (dict) to LiteLLM format (objects)
-                tool_calls = []
-                for tc in response_message["tool_calls"]:
-                    # Ollama format: {"function": {"name": "...", "arguments": {...}}}
-                    # LiteLLM format: object with .function.name and .function.arguments
-                    tool_call_obj = SimpleNamespace(
-                        function=SimpleNamespace(
-                            name=tc["function"]["name"],
-                            arguments=tc["function"]["arguments"]
-                        )
-                    )
-                    tool_calls.append(tool_call_obj)
-                
-                context.payload["llm_response"] = tool_calls
-                context.logger.info(
-                    f"LLM response with {len(tool_calls)} tool calls",
-                    extra={"plugin_name": self.name},
-                )
-            else:
-                context.payload["llm_response"] = response_message.get("content", "")
+            # Concurrent identical requests share one generation (and one Ollama slot)
+            llm_response, shared = await self._single_flight.do(
+                canonical_key(request),
+                lambda: self.scheduler.run(
+                    model,
+                    priority_of(context),
+                    lambda: self._chat(
+                        context, model, messages, tools, tool_choice, cache_key, operation, response_format
+                    ),
+                ),
+            )
+            context.payload["llm_response"] = llm_response
+            if shared:
                 context.logger.info(
-                    "LLM response received successfully",
+                    "LLM response shared with a concurrent identical request",
                     extra={"plugin_name": self.name},
                 )
             
@@ -241,12 +323,137 @@ class LocalLLMTool(BasePlugin):
         
         return context
 
+    async def stream(
+        self, *, context: SharedContext, prompt: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """
+        Stream a plain-text answer token by token (no function calling).
+
+        Ollama streams from /api/chat; other runtimes yield their whole answer
+        as a single chunk. When the stream ends, the full text is in
+        context.payload["llm_response"], as after execute().
+        """
+        if prompt is None:
+            prompt = context.payload.get("prompt", context.user_input)
+        if not prompt:
+            context.payload["llm_response"] = "Error: No input provided to LocalLLMTool."
+            yield context.payload["llm_response"]
+            return
+
+        if self.config.runtime != "ollama":
+            context.payload["prompt"] = prompt
+            context = await self.execute(context)
+            response = context.payload.get("llm_response")
+            text = response.get("content", "") if isinstance(response, dict) else str(response)
+            context.payload["llm_response"] = text
+            yield text
+            return
+
+        messages = self._build_messages(context, prompt)
+        model = self._model_for(context)
+        parts: List[str] = []
+        try:
+            async with self.scheduler.slot(model, priority_of(context)):
+                async for delta in self._stream_ollama(messages, model=model, session_id=context.session_id):
+                    parts.append(delta)
+                    yield delta
+        except Exception as e:
+            error_msg = f"Error calling local LLM: {e}"
+            context.logger.error(error_msg, extra={"plugin_name": self.name})
+            if not parts:
+                context.payload["llm_response"] = f"Error: {error_msg}"
+                yield context.payload["llm_response"]
+                return
+        context.payload["llm_response"] = "".join(parts)
+
+    async def _chat(
+        self,
+        context: SharedContext,
+        model: str,
+        messages: List[Dict[str, Any]],
+        tools: Optional[List[Dict]],
+        tool_choice: Optional[str],
+        cache_key: Optional[str],
+        operation: str,
+        response_format: Any = None,
+    ) -> Any:
+        """One generation; returns the llm_response value (text or tool calls)."""
+        # Use Ollama /api/chat with function calling support
+        if self.config.runtime == "ollama":
+            response_message = await self._generate_ollama(
+                messages=messages,
+                tools=tools,
+                tool_choice=tool_choice,
+                temperature=self.config.temperature,
+                max_tokens=self.config.max_tokens,
+                model=model,
+                session_id=context.session_id,
+                response_format=response_format,
+            )
+        else:
+            # Fallback for other runtimes (LM Studio, llamafile)
+            # They also support OpenAI-compatible /chat/completions
+            response_message = await self._generate_lmstudio_chat(
+                messages=messages,
+                tools=tools,
+                tool_choice=tool_choice,
+                temperature=self.config.temperature,
+                max_tokens=self.config.max_tokens,
+                model=model,
+                response_format=response_format,
+            )
+        
+        # Store response matching tool_llm format:
+        # - If tool_calls present, convert to LiteLLM-compatible objects
+        # - Otherwise store content string
+        if response_message.get("tool_calls"):
+            # Convert Ollama tool_calls (dict) to LiteLLM format (objects)
+            tool_calls = []
+            for tc in response_message["tool_calls"]:
+                # Ollama format: {"function": {"name": "...", "arguments": {...}}}
+                # LiteLLM format: object with .function.name and .function.arguments
+                tool_call_obj = SimpleNamespace(
+                    function=SimpleNamespace(
+                        name=tc["function"]["name"],
+                        arguments=tc["function"]["arguments"]
+                    )
+                )
+                tool_calls.append(tool_call_obj)
+            
+            llm_response = tool_calls
+            context.logger.info(
+                f"LLM response with {len(tool_calls)} tool calls",
+                extra={"plugin_name": self.name},
+            )
+        else:
+            llm_response = response_message.get("content", "")
+            context.logger.info(
+                "LLM response received successfully",
+                extra={"plugin_name": self.name},
+            )
+        if cache_key:
+            await self.llm_cache.aput(cache_key, llm_response, operation=operation)
+        return llm_response
+
+    def _build_messages(self, context: SharedContext, prompt: str) -> List[Dict[str, Any]]:
+        # Build messages from history (keep as array!)
+        messages = []
+        if self.system_prompt:
+            messages.append({"role": "system", "content": self.system_prompt})
+        messages.extend(context.history)
+        
+        # Add current prompt if not in history
+        if not any(msg["role"] == "user" and msg["content"] == prompt for msg in messages):
+            messages.append({"role": "user", "content": prompt})
+        return messages
+
     async def generate(
         self,
         prompt: str,
         system_prompt: Optional[str] = None,
         temperature: Optional[float] = None,
         max_tokens: Optional[int] = None,
+        priority: int = BACKGROUND,
     ) -> str:
         """
         LEGACY METHOD: Generate text using local LLM (simple string-based interface).
@@ -259,10 +466,25 @@ class LocalLLMTool(BasePlugin):
             system_prompt: Optional system prompt
             temperature: Override default temperature
             max_tokens: Override default max tokens
+            priority: Scheduling priority (core/llm_scheduler.py); direct
+                callers such as benchmarks run as background work
 
         Returns:
             Generated text (string only, no tool calls)
         """
+        return await self.scheduler.run(
+            self.config.model,
+            priority,
+            lambda: self._generate_text(prompt, system_prompt, temperature, max_tokens),
+        )
+
+    async def _generate_text(
+        self,
+        prompt: str,
+        system_prompt: Optional[str],
+        temperature: Optional[float],
+        max_tokens: Optional[int],
+    ) -> str:
         # Build messages for new API
         messages = []
         if system_prompt:
@@ -294,11 +516,15 @@ class LocalLLMTool(BasePlugin):
         tool_choice: Optional[str] = None,
         temperature: Optional[float] = None,
         max_tokens: Optional[int] = None,
+        model: Optional[str] = None,
+        session_id: Optional[str] = None,
+        response_format: Any = None,
     ) -> Dict[str, Any]:
         """
         Generate using Ollama runtime with function calling support.
 
-        Ollama API: POST /api/chat
+        Ollama API: POST /api/chat; text turns of a session go to /api/generate
+        to continue the session's conversation state (see _session_request).
         
         Args:
             messages: List of message dicts with 'role' and 'content'
@@ -306,90 +532,50 @@ class LocalLLMTool(BasePlugin):
             tool_choice: Optional tool choice strategy
             temperature: Sampling temperature
             max_tokens: Maximum output tokens
+            model: Model of this request (default: local_llm.model)
+            session_id: Session whose conversation state to continue
+            response_format: JSON schema (or "json") the output is constrained to
             
         Returns:
             Full message object with content and/or tool_calls
         """
-        url = f"{self.config.base_url}/api/chat"
-
-        # Allow model override via environment variable (for model escalation)
-        import os
-        model_to_use = os.getenv("LOCAL_LLM_MODEL_OVERRIDE") or self.config.model
-        
-        # Build base options with temperature and token limits
-        options = {
-            "temperature": temperature or self.config.temperature,
-            "num_predict": max_tokens or self.config.max_tokens,
-        }
-        
-        # Add advanced Ollama parameters if configured (for maximum quality)
-        if self.config.num_ctx is not None:
-            options["num_ctx"] = self.config.num_ctx
-        if self.config.num_predict is not None and max_tokens is None:
-            options["num_predict"] = self.config.num_predict
-        if self.config.num_gpu is not None:
-            options["num_gpu"] = self.config.num_gpu
-        if self.config.num_thread is not None:
-            options["num_thread"] = self.config.num_thread
-        if self.config.repeat_penalty is not None:
-            options["repeat_penalty"] = self.config.repeat_penalty
-        if self.config.top_k is not None:
-            options["top_k"] = self.config.top_k
-        if self.config.top_p is not None:
-            options["top_p"] = self.config.top_p
-        
-        # Build request
-        request = {
-            "model": model_to_use,
-            "messages": messages,
-            "stream": False,
-            "options": options,
-        }
-        
-        # Add JSON format requirement if prompt asks for JSON
-        if messages and len(messages) > 0:
-            last_message = messages[-1].get("content", "")
-            if "JSON" in last_message or "json" in last_message:
-                request["format"] = "json"
-                logger.info("🔧 Ollama JSON mode enabled (detected JSON keyword in prompt)")
-        
-        # Add tools if provided (function calling)
-        if tools:
-            request["tools"] = tools
+        request = self._build_ollama_request(
+            messages, tools, temperature, max_tokens, model, response_format
+        )
+        model_to_use = request["model"]
+        timeout = self._request_timeout(model_to_use, max_tokens)
 
         max_attempts = 3
         backoff_base = 0.6
         last_exception = None
 
+        session_key = self._session_key(session_id, messages)
         for attempt in range(1, max_attempts + 1):
+            started = time.monotonic()
+            session_request = self._session_request(session_key, request)
+            endpoint = "/api/generate" if session_request is not None else "/api/chat"
+            url = f"{self.config.base_url}{endpoint}"
+            body = session_request if session_request is not None else request
             try:
                 logger.info(
-                    f"🤖 Calling Ollama /api/chat: model={model_to_use}, "
+                    f"🤖 Calling Ollama {endpoint}: model={model_to_use}, "
                     f"messages={len(messages)}"
                     + (f", tools={len(tools)}" if tools else "")
+                    + (", continuing session context" if "context" in body else "")
                 )
 
                 # Debug: Log request size
-                request_json = json.dumps(request)
+                request_json = json.dumps(body)
                 logger.debug(f"Request size: {len(request_json)} bytes")
                 logger.debug(f"Request preview: {request_json[:500]}")
 
                 # CRITICAL DEBUG: Log before HTTP call
                 logger.info(f"🔍 DEBUG: About to POST to {url}")
 
-                # Prefer an injected client (useful for tests/mocking). If not present,
-                # fall back to synchronous requests.post.
-                import asyncio
-
-                if hasattr(self, "client") and getattr(self.client, "post", None):
-                    post_fn = getattr(self.client, "post")
-                    if asyncio.iscoroutinefunction(post_fn) or asyncio.iscoroutine(post_fn):
-                        response = await post_fn(url, json=request, timeout=self.config.timeout)
-                    else:
-                        response = post_fn(url, json=request, timeout=self.config.timeout)
-                else:
-                    # Use sync requests library instead of httpx (avoids async event loop conflicts)
-                    response = requests.post(url, json=request, timeout=self.config.timeout)
+                # Pooled async client: the loop keeps running during generation and
+                # cancelling the caller aborts the request
+                async with self.residency.use(model_to_use):
+                    response = await self.client.post(url, json=body, timeout=timeout)
 
                 # Basic response validation
                 if response is None:
@@ -432,6 +618,16 @@ class LocalLLMTool(BasePlugin):
                         message = choice.get("message", {}) if isinstance(choice, dict) else message
                 else:
                     message = {"content": message}
+                eval_count = result.get("eval_count") if isinstance(result, dict) else None
+                self._record_latency(model_to_use, started, eval_count)
+                if session_request is not None:
+                    self.sessions.store(
+                        session_key,
+                        model_to_use,
+                        messages,
+                        message.get("content") or "",
+                        result.get("context") if isinstance(result, dict) else None,
+                    )
 
                 # Log response details
                 tool_calls_list = message.get("tool_calls") or []
@@ -446,13 +642,15 @@ class LocalLLMTool(BasePlugin):
 
             except Exception as e:
                 last_exception = e
+                if is_timeout(e):
+                    self._record_latency(model_to_use, started)
+                if session_request is not None:
+                    self.sessions.drop(session_key)  # Retry with the full conversation
                 logger.warning(f"Attempt {attempt}/{max_attempts} failed calling Ollama: {e}", extra={"plugin_name": self.name})
                 if attempt < max_attempts:
                     sleep_for = backoff_base * (2 ** (attempt - 1))
                     logger.info(f"Retrying Ollama call in {sleep_for:.1f}s (attempt {attempt+1})", extra={"plugin_name": self.name})
-                    import asyncio as _asyncio
-
-                    await _asyncio.sleep(sleep_for)
+                    await asyncio.sleep(sleep_for)
                     continue
                 else:
                     logger.error(f"All {max_attempts} Ollama attempts failed. Last error: {last_exception}", extra={"plugin_name": self.name})
@@ -463,6 +661,182 @@ class LocalLLMTool(BasePlugin):
             raise last_exception
         raise RuntimeError("Ollama call failed without exception")
 
+    async def _stream_ollama(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        model: Optional[str] = None,
+        session_id: Optional[str] = None,
+    ) -> AsyncIterator[str]:
+        """
+        Stream content deltas from Ollama /api/chat (or /api/generate for a
+        session turn, see _session_request) with "stream": true.
+
+        Ollama answers with one JSON object per line; each carries the next
+        piece of message.content (response for /api/generate) and the last
+        one has "done": true.
+        """
+        request = self._build_ollama_request(messages, None, temperature, max_tokens, model)
+        request["stream"] = True
+        session_key = self._session_key(session_id, messages)
+        session_request = self._session_request(session_key, request)
+        endpoint = "/api/generate" if session_request is not None else "/api/chat"
+        body = session_request if session_request is not None else request
+        logger.info(f"🤖 Streaming Ollama {endpoint}: model={request['model']}, messages={len(messages)}")
+
+        parts: List[str] = []
+        async with self.residency.use(request["model"]):
+            started = time.monotonic()
+            async with self.client.stream(
+                "POST",
+                f"{self.config.base_url}{endpoint}",
+                json=body,
+                timeout=self._request_timeout(request["model"], max_tokens),
+            ) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if not line.strip():
+                        continue
+                    chunk = json.loads(line)
+                    if chunk.get("error"):
+                        raise RuntimeError(f"Ollama stream error: {chunk['error']}")
+                    if session_request is not None:
+                        delta = chunk.get("response")
+                    else:
+                        delta = (chunk.get("message") or {}).get("content")
+                    if delta:
+                        parts.append(delta)
+                        yield delta
+                    if chunk.get("done"):
+                        self._record_latency(request["model"], started, chunk.get("eval_count"))
+                        if session_request is not None:
+                            self.sessions.store(
+                                session_key, request["model"], messages, "".join(parts), chunk.get("context")
+                            )
+                        break
+
+    @staticmethod
+    def _session_key(
+        session_id: Optional[str], messages: List[Dict[str, Any]]
+    ) -> Optional[Tuple[str, str]]:
+        """
+        Conversation state key: the session and its system prompt, so a
+        session's chat and its structured calls (e.g. the offline planner)
+        keep separate states instead of replacing each other's.
+        """
+        if not session_id:
+            return None
+        system = messages[0].get("content") if messages and messages[0].get("role") == "system" else ""
+        return (session_id, str(system or ""))
+
+    def _session_request(
+        self, session_key: Optional[Tuple[str, str]], request: Dict[str, Any]
+    ) -> Optional[Dict[str, Any]]:
+        """
+        /api/generate body for a text turn of a session, or None to send the
+        request to /api/chat in full.
+
+        A turn that only adds user messages to the session's previous turn
+        sends just those, with the context returned last time; a fresh
+        conversation (system prompt and user messages) starts the state.
+        """
+        if self.sessions is None or session_key is None or request.get("tools"):
+            return None
+        messages = request["messages"]
+        body = {key: value for key, value in request.items() if key not in ("messages", "tools")}
+        continued = self.sessions.continuation(session_key, request["model"], messages)
+        if continued is not None:
+            body["context"], new = continued
+        else:
+            system = [m for m in messages[:1] if m.get("role") == "system"]
+            new = messages[len(system):]
+            if not new or any(m.get("role") != "user" for m in new):
+                return None
+            if system:
+                body["system"] = system[0]["content"]
+        body["prompt"] = "\n\n".join(str(m.get("content") or "") for m in new)
+        return body
+
+    def _model_for(self, context: Optional[SharedContext]) -> str:
+        """
+        Model of one request: payload["model_config"]["local_model"] (set e.g. by
+        the kernel's model escalation), else local_llm.model. Carried per request,
+        so concurrent pipelines do not change each other's model.
+        """
+        model_config = (context.payload.get("model_config") if context is not None else None) or {}
+        return model_config.get("local_model") or self.config.model
+
+    def _request_timeout(self, model: str, max_tokens: Optional[int] = None) -> float:
+        """Timeout learned from the model's latencies (core/timeouts.py), else local_llm.timeout."""
+        if self.timeouts is None:
+            return self.config.timeout
+        # The configured cap is no estimate of the answer's length; an explicit max_tokens is
+        expected_tokens = max_tokens if max_tokens != self.config.max_tokens else None
+        return self.timeouts.timeout_for(model, self.config.timeout, expected_tokens=expected_tokens)
+
+    def _record_latency(self, model: str, started: float, output_tokens: Optional[int] = None) -> None:
+        if self.timeouts is not None:
+            self.timeouts.record(model, time.monotonic() - started, output_tokens)
+
+    def _build_ollama_request(
+        self,
+        messages: List[Dict[str, str]],
+        tools: Optional[List[Dict]] = None,
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        model: Optional[str] = None,
+        response_format: Any = None,
+    ) -> Dict[str, Any]:
+        """Build the (non-streaming) /api/chat request body."""
+        model_to_use = model or self.config.model
+        
+        # Build base options with temperature and token limits
+        options = {
+            "temperature": temperature or self.config.temperature,
+            "num_predict": max_tokens or self.config.max_tokens,
+        }
+        
+        # Add advanced Ollama parameters if configured (for maximum quality)
+        if self.config.num_ctx is not None:
+            options["num_ctx"] = self.config.num_ctx
+        if self.config.num_predict is not None and max_tokens is None:
+            options["num_predict"] = self.config.num_predict
+        if self.config.num_gpu is not None:
+            options["num_gpu"] = self.config.num_gpu
+        if self.config.num_thread is not None:
+            options["num_thread"] = self.config.num_thread
+        if self.config.repeat_penalty is not None:
+            options["repeat_penalty"] = self.config.repeat_penalty
+        if self.config.top_k is not None:
+            options["top_k"] = self.config.top_k
+        if self.config.top_p is not None:
+            options["top_p"] = self.config.top_p
+        
+        # Build request
+        request = {
+            "model": model_to_use,
+            "messages": messages,
+            "stream": False,
+            "options": options,
+            "keep_alive": self.residency.keep_alive_for(model_to_use),
+        }
+        
+        if response_format:
+            # Ollama turns a JSON schema into a grammar that constrains decoding
+            request["format"] = response_format
+        # Add JSON format requirement if prompt asks for JSON
+        elif messages and len(messages) > 0:
+            last_message = messages[-1].get("content", "")
+            if "JSON" in last_message or "json" in last_message:
+                request["format"] = "json"
+                logger.info("🔧 Ollama JSON mode enabled (detected JSON keyword in prompt)")
+        
+        # Add tools if provided (function calling)
+        if tools:
+            request["tools"] = tools
+        return request
+
     async def _generate_lmstudio(
         self,
         prompt: str,
@@ -494,16 +868,21 @@ class LocalLLMTool(BasePlugin):
         try:
             logger.info(f"🤖 Calling LM Studio: model={self.config.model}")
 
-            async with httpx.AsyncClient(timeout=self.config.timeout) as client:
-                response = await client.post(url, json=request)
-                response.raise_for_status()
+            started = time.monotonic()
+            response = await self.client.post(
+                url, json=request, timeout=self._request_timeout(self.config.model, max_tokens)
+            )
+            response.raise_for_status()
 
-                result = response.json()
-                generated_text = result["choices"][0]["message"]["content"]
+            result = response.json()
+            self._record_latency(
+                self.config.model, started, (result.get("usage") or {}).get("completion_tokens")
+            )
+            generated_text = result["choices"][0]["message"]["content"]
 
-                logger.info(f"✅ LM Studio response: {len(generated_text)} chars")
+            logger.info(f"✅ LM Studio response: {len(generated_text)} chars")
 
-                return generated_text
+            return generated_text
 
         except Exception as e:
             logger.error(f"❌ LM Studio error: {e}", exc_info=True)
@@ -516,6 +895,8 @@ class LocalLLMTool(BasePlugin):
         tool_choice: Optional[str] = None,
         temperature: Optional[float] = None,
         max_tokens: Optional[int] = None,
+        model: Optional[str] = None,
+        response_format: Any = None,
     ) -> Dict[str, Any]:
         """
         Generate using LM Studio with function calling support.
@@ -528,14 +909,17 @@ class LocalLLMTool(BasePlugin):
             tool_choice: Optional tool choice strategy
             temperature: Sampling temperature
             max_tokens: Maximum tokens
+            model: Model of this request (default: local_llm.model)
+            response_format: JSON schema (or "json") the output is constrained to
             
         Returns:
             Full message object with content and/or tool_calls
         """
         url = f"{self.config.base_url}/v1/chat/completions"
+        model = model or self.config.model
 
         request = {
-            "model": self.config.model,
+            "model": model,
             "messages": messages,
             "temperature": temperature or self.config.temperature,
             "max_tokens": max_tokens or self.config.max_tokens,
@@ -546,33 +930,43 @@ class LocalLLMTool(BasePlugin):
             request["tools"] = tools
         if tool_choice:
             request["tool_choice"] = tool_choice
+        if isinstance(response_format, dict):
+            request["response_format"] = {
+                "type": "json_schema",
+                "json_schema": {"name": "response", "strict": True, "schema": response_format},
+            }
 
         try:
             logger.info(
-                f"🤖 Calling LM Studio /v1/chat/completions: model={self.config.model}, "
+                f"🤖 Calling LM Studio /v1/chat/completions: model={model}, "
                 f"messages={len(messages)}"
                 + (f", tools={len(tools)}" if tools else "")
             )
 
-            async with httpx.AsyncClient(timeout=self.config.timeout) as client:
-                response = await client.post(url, json=request)
-                response.raise_for_status()
+            started = time.monotonic()
+            response = await self.client.post(
+                url, json=request, timeout=self._request_timeout(model, max_tokens)
+            )
+            response.raise_for_status()
 
-                result = response.json()
-                message = result["choices"][0]["message"]
-                
-                # Convert to dict if needed
-                if hasattr(message, "model_dump"):
-                    message = message.model_dump()
-                
-                has_tool_calls = bool(message.get("tool_calls"))
-                content_len = len(message.get("content", "") or "")
-                logger.info(
-                    f"✅ LM Studio response: content={content_len} chars"
-                    + (f", tool_calls={len(message.get('tool_calls', []))}" if has_tool_calls else "")
-                )
+            result = response.json()
+            self._record_latency(
+                model, started, (result.get("usage") or {}).get("completion_tokens")
+            )
+            message = result["choices"][0]["message"]
+            
+            # Convert to dict if needed
+            if hasattr(message, "model_dump"):
+                message = message.model_dump()
+            
+            has_tool_calls = bool(message.get("tool_calls"))
+            content_len = len(message.get("content", "") or "")
+            logger.info(
+                f"✅ LM Studio response: content={content_len} chars"
+                + (f", tool_calls={len(message.get('tool_calls', []))}" if has_tool_calls else "")
+            )
 
-                return message
+            return message
 
         except Exception as e:
             logger.error(f"❌ LM Studio error: {e}", exc_info=True)
@@ -603,27 +997,25 @@ class LocalLLMTool(BasePlugin):
         try:
             if self.config.runtime == "ollama":
                 # Check Ollama /api/tags endpoint
-                async with httpx.AsyncClient(timeout=30) as client:
-                    response = await client.get(f"{self.config.base_url}/api/tags")
-                    response.raise_for_status()
+                response = await self.client.get(f"{self.config.base_url}/api/tags", timeout=30)
+                response.raise_for_status()
 
-                    # Check if our model is available
-                    models = response.json().get("models", [])
-                    model_names = [m.get("name") for m in models]
+                # Check if our model is available
+                models = response.json().get("models", [])
+                model_names = [m.get("name") for m in models]
 
-                    if self.config.model not in model_names:
-                        logger.warning(
-                            f"Model {self.config.model} not found. Available: {model_names[:5]}"
-                        )
-                        return False
+                if self.config.model not in model_names:
+                    logger.warning(
+                        f"Model {self.config.model} not found. Available: {model_names[:5]}"
+                    )
+                    return False
 
-                    return True
+                return True
 
             else:
                 # For LM Studio/llamafile, try a simple health check
-                async with httpx.AsyncClient(timeout=30) as client:
-                    response = await client.get(f"{self.config.base_url}/health")
-                    return response.status_code == 200
+                response = await self.client.get(f"{self.config.base_url}/health", timeout=30)
+                return response.status_code == 200
 
         except Exception as e:
             logger.warning(f"Local LLM not available: {e}")
@@ -638,12 +1030,11 @@ class LocalLLMTool(BasePlugin):
         """
         try:
             if self.config.runtime == "ollama":
-                async with httpx.AsyncClient(timeout=30) as client:
-                    response = await client.get(f"{self.config.base_url}/api/tags")
-                    response.raise_for_status()
+                response = await self.client.get(f"{self.config.base_url}/api/tags", timeout=30)
+                response.raise_for_status()
 
-                    models = response.json().get("models", [])
-                    return [m.get("name") for m in models]
+                models = response.json().get("models", [])
+                return [m.get("name") for m in models]
 
             else:
                 # LM Studio/llamafile don't have model listing
@@ -731,6 +1122,7 @@ class LocalLLMTool(BasePlugin):
                     system_prompt=arguments.get("system_prompt"),
                     temperature=arguments.get("temperature"),
                     max_tokens=arguments.get("max_tokens"),
+                    priority=priority_of(context),
                 )
 
                 return {
@@ -759,6 +1151,7 @@ class LocalLLMTool(BasePlugin):
                     "runtime": self.config.runtime,
                     "base_url": self.config.base_url,
                     "current_model": self.config.model,
+                    "loaded_models": self.residency.snapshot() if self.config.runtime == "ollama" else {},
                     "available_models": models[:10],  # Limit output
                     "total_models": len(models),
                 }
@@ -18,7 +18,7 @@ ROOT = Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
-from core.simple_persistent_queue import SimplePersistentQueue
+from core.queue_backend import create_queue_backend, load_queue_config
 from core.kernel import Kernel
 from core.kernel_worker import KernelWorker
 
@@ -30,7 +30,9 @@ async def main():
     # Ensure data dir exists
     os.makedirs(".data", exist_ok=True)
 
-    queue = SimplePersistentQueue(db_path=".data/tasks.sqlite")
+    # Backend (sqlite/redis) is selected by task_queue in config/settings.yaml
+    queue_config = load_queue_config()
+    queue = create_queue_backend(queue_config)
 
     # Seed a simple task if queue is empty
     if queue.pending_count() == 0:
@@ -47,7 +49,9 @@ async def main():
     # Dashboard is automatically started by Kernel plugins (interface_webui)
     # No need to manually start it here
     
-    worker = KernelWorker(kernel=kernel, queue=queue)
+    worker = KernelWorker(
+        kernel=kernel, queue=queue, lease_seconds=queue_config.get("lease_seconds")
+    )
 
     worker_task = asyncio.create_task(worker.run())
 
@@ -22,7 +22,7 @@ ROOT = Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
-from core.simple_persistent_queue import SimplePersistentQueue
+from core.queue_backend import create_queue_backend, load_queue_config
 from core.kernel import Kernel
 from core.kernel_worker import KernelWorker
 
@@ -34,7 +34,9 @@ async def main():
     # Ensure data dir exists
     os.makedirs(".data", exist_ok=True)
 
-    queue = SimplePersistentQueue(db_path=".data/tasks.sqlite")
+    # Backend (sqlite/redis) is selected by task_queue in config/settings.yaml
+    queue_config = load_queue_config()
+    queue = create_queue_backend(queue_config)
 
     logger.info("🚀 Starting SOPHIA AMI Worker with Dashboard")
     logger.info(f"📊 Dashboard available at: http://127.0.0.1:8000/dashboard")
@@ -48,7 +50,9 @@ async def main():
     logger.info("🌐 WebUI will be available shortly...")
     
     # Start worker
-    worker = KernelWorker(kernel=kernel, queue=queue)
+    worker = KernelWorker(
+        kernel=kernel, queue=queue, lease_seconds=queue_config.get("lease_seconds")
+    )
     worker_task = asyncio.create_task(worker.run())
 
     try:
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Planner prompt size with and without tool retrieval (core/tool_retrieval.py).
+
+Loads the installed plugins, builds the planner's tool catalog and, for each
+benchmark input, renders the online planner prompt with every tool and with
+the retrieved subset (top_k + essential tools). Reports prompt tokens and
+tool recall: whether every tool method the plan needs is still listed.
+Recall is an upper bound on plan accuracy that needs no LLM; a plan can only
+use tools the prompt lists.
+
+The inputs are the offline benchmark's tool tasks (benchmark_offline_mode.py)
+and the planner prompt's examples, plus typical requests for the other tools.
+Cases whose expected tool is not installed are skipped.
+
+Run: python scripts/benchmark_tool_retrieval.py [--top-k 12]
+"""
+
+import argparse
+import logging
+import statistics
+import sys
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.plugin_manager import PluginManager
+from core.prompt_registry import PromptRegistry
+from plugins.base_plugin import PluginType
+from plugins.cognitive_planner import Planner
+
+logging.basicConfig(level=logging.CRITICAL)  # Plugins without their dependencies fail loudly
+
+# (input, [(tool_name, method_name), ...] the plan needs)
+BENCHMARK_CASES = [
+    ("Jaký je dnes datum a čas? Použij nástroj.", [("tool_datetime", "get_current_time")]),
+    ("Vypiš soubory v aktuálním adresáři.", [("tool_file_system", "list_directory")]),
+    ("Co je v souboru config.yaml?", [("tool_file_system", "read_file")]),
+    ("Jaké jsou tvé schopnosti?", [("cognitive_code_reader", "list_plugins")]),
+    ("What is the current date and time?", [("tool_datetime", "get_current_time")]),
+    ("List the files in the current directory", [("tool_file_system", "list_directory")]),
+    (
+        "Read the file config/settings.yaml and summarize it",
+        [("tool_file_system", "read_file"), ("tool_llm", "execute")],
+    ),
+    ("Write 'hello' into the file notes.txt", [("tool_file_system", "write_file")]),
+    ("Delete the file old_notes.txt", [("tool_file_system", "delete_file")]),
+    ("What is the git status of the repository?", [("tool_git", "get_status")]),
+    ("Show me the git diff of my changes", [("tool_git", "get_diff")]),
+    ("Commit the staged changes with message 'fix typo'", [("tool_git", "commit")]),
+    ("Search the web for the latest Python release", [("tool_tavily", "search")]),
+    ("Which plugins do you have?", [("cognitive_code_reader", "list_plugins")]),
+    ("Run the shell command 'ls -la'", [("tool_bash", "execute_command")]),
+    ("Start a background process running the dev server", [("core_process_manager", "start_background_process")]),
+    ("List the available OpenRouter models", [("tool_openrouter_api", "get_models")]),
+    ("Create a Jules session to fix the failing tests", [("tool_jules", "create_session")]),
+    ("Validate this Jules plan before running it", [("cognitive_jules_plan_validator", "validate_plan")]),
+]
+
+
+def count_tokens(text: str) -> int:
+    try:
+        import tiktoken
+
+        return len(tiktoken.get_encoding("cl100k_base").encode(text))
+    except Exception:
+        return len(text) // 4  # Rough estimate without tiktoken
+
+
+def load_plugins() -> dict:
+    manager = PluginManager()
+    plugins = {}
+    for plugin_type in PluginType:
+        for plugin in manager.get_plugins_by_type(plugin_type):
+            try:
+                plugin.get_tool_definitions()
+            except Exception:
+                continue  # Needs setup() to describe its tools
+            plugins[plugin.name] = plugin
+    return plugins
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--top-k", type=int, default=12)
+    args = parser.parse_args()
+
+    planner = Planner()
+    planner.setup({"all_plugins": load_plugins()})
+    index = planner._tool_catalog()
+    available = {(e.tool_name, e.method_name) for e in index.entries}
+    template = PromptRegistry().get("planner_prompt_template")
+    essential = ["tool_llm", "tool_local_llm"]
+
+    def prompt_for(entries, user_input):
+        tool_list = "\n".join(planner._tool_lines[e] for e in entries)
+        return template.render(tool_list=tool_list, user_input=user_input)
+
+    print(f"Tool catalog: {len(index)} methods of {len({e.tool_name for e in index.entries})} plugins")
+    print(f"{'input':<55} {'full':>6} {'subset':>7} {'tools':>6}  recall")
+    full_tokens, subset_tokens, hits, cases = [], [], 0, 0
+    for user_input, expected in BENCHMARK_CASES:
+        if not all(tool in available for tool in expected):
+            continue
+        cases += 1
+        selected = index.select(user_input, args.top_k, essential)
+        listed = {(e.tool_name, e.method_name) for e in selected}
+        found = all(tool in listed for tool in expected)
+        hits += found
+        full = count_tokens(prompt_for(index.entries, user_input))
+        subset = count_tokens(prompt_for(selected, user_input))
+        full_tokens.append(full)
+        subset_tokens.append(subset)
+        print(f"{user_input[:55]:<55} {full:>6} {subset:>7} {len(selected):>6}  {'yes' if found else 'NO'}")
+
+    if not cases:
+        print("No benchmark case has its tools installed.")
+        return
+    reduction = 1 - statistics.mean(subset_tokens) / statistics.mean(full_tokens)
+    print(
+        f"\n{cases} cases: mean prompt {statistics.mean(full_tokens):.0f} -> "
+        f"{statistics.mean(subset_tokens):.0f} tokens ({reduction:.0%} fewer), "
+        f"tool recall {hits}/{cases} ({hits / cases:.0%})"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -19,12 +19,12 @@ async def main():
     await kernel.initialize()
     try:
         await kernel.consciousness_loop(single_run_input=instruction)
-        q.mark_done(tid)
+        q.mark_done(tid, task['lease'])
         print(f'Task {tid} processed and marked done')
         return 0
     except Exception as e:
         print(f'Error processing task {tid}: {e}', file=sys.stderr)
-        q.mark_failed(tid, reason=str(e))
+        q.mark_failed(tid, reason=str(e), lease=task['lease'])
         return 2
 
 if __name__ == '__main__':
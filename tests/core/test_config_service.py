@@ -0,0 +1,79 @@
+import asyncio
+import os
+import threading
+
+import pytest
+
+from core.config_service import ConfigService
+
+
+def _write(path, text, mtime_shift=0):
+    path.write_text(text, encoding="utf-8")
+    if mtime_shift:
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + mtime_shift))
+
+
+def test_each_file_is_parsed_once(tmp_path):
+    _write(tmp_path / "settings.yaml", "llm:\n  model: m1\nplugins:\n  tool_a:\n    x: 1\n")
+    service = ConfigService(config_dir=tmp_path)
+
+    for _ in range(5):
+        assert service.settings.llm["model"] == "m1"
+        assert service.settings.plugin("tool_a") == {"x": 1}
+    assert service.settings.plugin("missing") == {}
+    assert service.model_strategy.task_strategies == []  # missing file
+    assert service.parse_count == 1
+
+
+def test_reload_swaps_snapshot_and_notifies_subscribers(tmp_path):
+    path = tmp_path / "settings.yaml"
+    _write(path, "llm:\n  model: m1\n")
+    service = ConfigService(config_dir=tmp_path)
+    seen = []
+    service.subscribe("settings", lambda name, data: seen.append(data["llm"]["model"]))
+    assert service.settings.llm["model"] == "m1"
+
+    assert service.reload() == []  # unchanged on disk
+
+    _write(path, "llm:\n  model: m2\n", mtime_shift=1_000_000_000)
+    assert service.reload() == ["settings"]
+    assert service.settings.llm["model"] == "m2"
+    assert seen == ["m2"]
+
+
+def test_invalid_yaml_keeps_previous_configuration(tmp_path):
+    path = tmp_path / "autonomy.yaml"
+    _write(path, "autonomy:\n  budget:\n    monthly_limit_usd: 30\n")
+    service = ConfigService(config_dir=tmp_path)
+    assert service.autonomy.budget["monthly_limit_usd"] == 30
+
+    _write(path, "autonomy: [unclosed\n", mtime_shift=1_000_000_000)
+    assert service.reload() == []
+    assert service.autonomy.budget["monthly_limit_usd"] == 30
+
+
+@pytest.mark.asyncio
+async def test_subscriber_from_a_loop_is_called_on_that_loop(tmp_path):
+    path = tmp_path / "settings.yaml"
+    _write(path, "llm:\n  model: m1\n")
+    service = ConfigService(config_dir=tmp_path)
+    service.get("settings")
+    called = asyncio.Event()
+    threads = []
+
+    def on_reload(name, data):
+        threads.append(threading.get_ident())
+        called.set()
+
+    unsubscribe = service.subscribe("settings", on_reload)
+    _write(path, "llm:\n  model: m2\n", mtime_shift=1_000_000_000)
+    await asyncio.to_thread(service.reload)  # As the watcher thread does
+    await asyncio.wait_for(called.wait(), timeout=1)
+    assert threads == [threading.get_ident()]
+
+    unsubscribe()
+    _write(path, "llm:\n  model: m3\n", mtime_shift=2_000_000_000)
+    await asyncio.to_thread(service.reload)
+    await asyncio.sleep(0)
+    assert len(threads) == 1
@@ -0,0 +1,84 @@
+import asyncio
+
+import pytest
+
+from core.hedging import HedgePolicy, hedged
+from core.timeouts import AdaptiveTimeouts
+
+
+def test_policy_reads_model_strategy():
+    policy = HedgePolicy.from_strategy(
+        {
+            "task_strategies": [{"task_type": "plan_generation", "model": "big", "hedge_model": "fast"}],
+            "hedging": {"enabled": True, "min_samples": 2, "initial_delay": 3, "default_hedge_model": "cheap"},
+        }
+    )
+    timeouts = AdaptiveTimeouts()
+
+    assert policy.enabled
+    assert policy.hedge_model_for("big") == "fast"
+    assert policy.hedge_model_for("other") == "cheap"
+    assert policy.hedge_model_for("cheap") is None
+    assert policy.delay_for("big", None) == 3.0
+    assert policy.delay_for("big", timeouts) == 3.0
+    timeouts.record("big", 1.0)
+    timeouts.record("big", 2.0)
+    assert 2.0 <= policy.delay_for("big", timeouts) <= 2.0 * 1.2  # Histogram bucket bound
+
+
+@pytest.mark.asyncio
+async def test_fast_primary_is_not_hedged():
+    backup_calls = []
+
+    async def primary():
+        return "primary"
+
+    async def backup():
+        backup_calls.append(1)
+        return "backup"
+
+    outcome = await hedged(primary, backup, delay=0.5)
+
+    assert (outcome.result, outcome.winner, outcome.hedged) == ("primary", "primary", False)
+    assert backup_calls == []
+
+
+@pytest.mark.asyncio
+async def test_slow_primary_loses_to_backup_and_is_cancelled():
+    cancelled = asyncio.Event()
+
+    async def primary():
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+        return "primary"
+
+    async def backup():
+        await asyncio.sleep(0.01)
+        return "backup"
+
+    outcome = await hedged(primary, backup, delay=0.02)
+
+    assert (outcome.result, outcome.winner, outcome.hedged) == ("backup", "backup", True)
+    await asyncio.wait_for(cancelled.wait(), timeout=1)
+
+
+@pytest.mark.asyncio
+async def test_failing_primary_hands_over_to_backup_at_once():
+    async def primary():
+        raise RuntimeError("503")
+
+    async def backup():
+        return "backup"
+
+    outcome = await hedged(primary, backup, delay=10)
+
+    assert outcome.winner == "backup"
+
+    async def failing_backup():
+        raise ValueError("also down")
+
+    with pytest.raises(RuntimeError):
+        await hedged(primary, failing_backup, delay=10)
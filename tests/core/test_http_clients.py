@@ -0,0 +1,36 @@
+import asyncio
+
+import pytest
+
+from core.http_clients import AsyncClientPool
+
+
+@pytest.mark.asyncio
+async def test_pool_reuses_one_client_per_backend():
+    pool = AsyncClientPool()
+
+    ollama = pool.get("http://localhost:11434")
+    assert pool.get("http://localhost:11434/") is ollama
+    assert pool.get("http://localhost:1234") is not ollama
+
+    await pool.aclose()
+    assert ollama.is_closed
+    assert pool.get("http://localhost:11434") is not ollama
+    await pool.aclose()
+
+
+@pytest.mark.asyncio
+async def test_pool_replaces_client_from_another_event_loop():
+    pool = AsyncClientPool()
+
+    async def get_client():
+        return pool.get("http://localhost:11434")
+
+    # A client first used by an event loop that has since finished
+    stale = await asyncio.to_thread(asyncio.run, get_client())
+    current = pool.get("http://localhost:11434")
+
+    assert current is not stale
+    assert pool.get("http://localhost:11434") is current
+    await pool.aclose()
+    assert current.is_closed
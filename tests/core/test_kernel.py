@@ -230,3 +230,142 @@ async def test_kernel_handles_multi_step_chained_plan():
 
     mock_lister.list_items.assert_called_once_with()
     mock_writer.write_items.assert_called_once_with(file="out.txt", content=plugin_list)
+
+
+@pytest.mark.asyncio
+async def test_process_single_input_stream_streams_direct_llm_answer():
+    """A single-step LLM plan is streamed token by token, then sent whole."""
+    kernel = Kernel()
+
+    async def plan_direct_answer(context):
+        context.payload["plan"] = [
+            {"tool_name": "tool_llm", "method_name": "execute", "arguments": {"prompt": "Hi"}}
+        ]
+        return context
+
+    mock_planner = MagicMock()
+    mock_planner.execute = AsyncMock(side_effect=plan_direct_answer)
+
+    received_prompts = []
+
+    async def stream(*, context, prompt=None):
+        received_prompts.append(prompt)
+        for delta in ["Hel", "lo", "!"]:
+            yield delta
+
+    mock_llm = MagicMock()
+    mock_llm.stream = stream
+    kernel.all_plugins_map = {"cognitive_planner": mock_planner, "tool_llm": mock_llm}
+
+    context = SharedContext(
+        session_id="test",
+        current_state="WEBUI_INPUT",
+        logger=logging.getLogger("test"),
+        user_input="Hi",
+        offline_mode=True,
+    )
+    frames = [frame async for frame in kernel.process_single_input_stream(context)]
+
+    assert frames[:2] == [
+        {"type": "phase", "phase": "PLANNING"},
+        {"type": "phase", "phase": "EXECUTING"},
+    ]
+    assert [f["delta"] for f in frames if f["type"] == "token"] == ["Hel", "lo", "!"]
+    assert frames[-1] == {"type": "response", "message": "Hello!"}
+    assert received_prompts == ["Hi"]
+    mock_llm.execute.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_single_input_plan_with_unresolved_reference_fails_before_execution():
+    kernel = Kernel()
+    mock_fs = MagicMock()
+    mock_fs.read_file.return_value = "content"
+    kernel.all_plugins_map = {"tool_fs": mock_fs}
+    plan = [
+        {"tool_name": "tool_fs", "method_name": "read_file", "arguments": {"path": "a.txt"}},
+        {"tool_name": "tool_fs", "method_name": "read_file", "arguments": {"path": "${step_3}"}},
+    ]
+    context = SharedContext(
+        session_id="test",
+        current_state="WEBUI_INPUT",
+        logger=logging.getLogger("test"),
+        user_input="Read the files",
+    )
+
+    result = await kernel._execute_single_input_plan(context, plan)
+
+    assert result["success"] is False
+    assert "step 2 references unknown step 3" in result["error"]
+    mock_fs.read_file.assert_not_called()
+
+
+def _routing_kernel(routed_model, speculative_model, plan, route_delay=0.1, plan_delay=0.1, offline=False):
+    """Kernel with a router and planner that take route_delay and plan_delay seconds."""
+    kernel = Kernel()
+    calls = []
+
+    async def route(context):
+        await asyncio.sleep(route_delay)
+        context.payload["model_config"] = {"model": routed_model}
+        context.offline_mode = offline
+        return context
+
+    async def make_plan(context):
+        calls.append(context.payload["model_config"]["model"])
+        await asyncio.sleep(plan_delay)
+        context.payload["plan"] = plan
+        return context
+
+    router = MagicMock()
+    router.execute = AsyncMock(side_effect=route)
+    router.speculative_model.return_value = speculative_model
+    planner = MagicMock()
+    planner.execute = AsyncMock(side_effect=make_plan)
+    kernel.all_plugins_map = {
+        "cognitive_task_router": router,
+        "cognitive_planner": planner,
+        "tool_datetime": MagicMock(),
+    }
+    context = SharedContext(
+        session_id="test", current_state="PLANNING", logger=logging.getLogger("test"), user_input="time?"
+    )
+    return kernel, context, calls
+
+
+@pytest.mark.asyncio
+async def test_planning_runs_concurrently_with_task_routing():
+    plan = [{"tool_name": "tool_datetime", "method_name": "get_current_time", "arguments": {}}]
+    kernel, context, calls = _routing_kernel("haiku", "haiku", plan)
+
+    started = asyncio.get_running_loop().time()
+    result = await kernel._plan_single_input(context)
+    elapsed = asyncio.get_running_loop().time() - started
+
+    assert result == plan
+    assert calls == ["haiku"]
+    assert context.payload["model_config"] == {"model": "haiku"}
+    assert elapsed < 0.18  # About max(router, planner), not the sum
+
+
+@pytest.mark.asyncio
+async def test_speculative_plan_is_kept_if_valid_and_redone_otherwise():
+    plan = [{"tool_name": "tool_datetime", "method_name": "get_current_time", "arguments": {}}]
+    kernel, context, calls = _routing_kernel("haiku", "sonnet", plan, plan_delay=0)
+    assert await kernel._plan_single_input(context) == plan
+    assert calls == ["sonnet"]  # Another model was chosen, but the finished plan validates
+    assert context.payload["model_config"] == {"model": "haiku"}
+
+    unknown = [{"tool_name": "tool_missing", "method_name": "run", "arguments": {}}]
+    kernel, context, calls = _routing_kernel("haiku", "sonnet", unknown, plan_delay=0)
+    await kernel._plan_single_input(context)
+    assert calls == ["sonnet", "haiku"]
+
+
+@pytest.mark.asyncio
+async def test_speculative_plan_is_redone_when_routing_switches_to_offline_mode():
+    plan = [{"tool_name": "tool_datetime", "method_name": "get_current_time", "arguments": {}}]
+    kernel, context, calls = _routing_kernel("local", "sonnet", plan, plan_delay=0, offline=True)
+    await kernel._plan_single_input(context)
+    assert calls == ["sonnet", "local"]  # The finished cloud plan validates but is not kept
+    assert context.offline_mode
@@ -0,0 +1,88 @@
+import time
+from types import SimpleNamespace
+
+from core.llm_cache import LLMResponseCache, canonical_key
+from core.telemetry import TelemetryHub
+
+
+def _request(**overrides):
+    request = {
+        "provider": "tool_llm",
+        "model": "test-model",
+        "messages": [{"role": "user", "content": "Classify: hello"}],
+        "tools": None,
+        "temperature": 0,
+    }
+    request.update(overrides)
+    return request
+
+
+def test_key_is_canonical_and_content_addressed():
+    a = {"model": "m", "messages": [{"role": "user", "content": "x"}], "temperature": 0}
+    b = {"temperature": 0, "messages": [{"content": "x", "role": "user"}], "model": "m"}
+    assert canonical_key(a) == canonical_key(b)
+    assert canonical_key(a) != canonical_key({**a, "model": "other"})
+
+
+def test_hits_survive_restart_and_expire(tmp_path):
+    db_path = tmp_path / "llm_cache.sqlite"
+    cache = LLMResponseCache(enabled=True, db_path=db_path, ttls={"planning": 0.2})
+
+    key, entry = cache.lookup(_request(), "PLANNING")
+    assert key is not None and entry is None
+    cache.put(key, "simple_chat", {"cost_usd": 0.01}, "PLANNING")
+
+    restarted = LLMResponseCache(enabled=True, db_path=db_path, ttls={"planning": 0.2})
+    _, entry = restarted.lookup(_request(), "PLANNING")
+    assert entry == {"llm_response": "simple_chat", "metadata": {"cost_usd": 0.01}}
+
+    time.sleep(0.25)
+    assert restarted.lookup(_request(), "PLANNING")[1] is None
+
+
+def test_tool_calls_round_trip_and_errors_are_not_cached():
+    cache = LLMResponseCache(enabled=True, db_path=None)
+    key = cache.key_for(_request(), "planning")
+    call = SimpleNamespace(
+        id="call_1",
+        type="function",
+        function=SimpleNamespace(name="create_plan", arguments='{"plan": "[]"}'),
+    )
+    assert cache.put(key, [call], operation="planning")
+    cached_call = cache.get(key, "planning")["llm_response"][0]
+    assert cached_call.function.name == "create_plan"
+    assert cached_call.function.arguments == '{"plan": "[]"}'
+
+    assert not cache.put(key, {"content": "Error: runtime down"}, operation="planning")
+
+
+def test_bypass_and_hit_rate_reported_to_telemetry():
+    telemetry = TelemetryHub()
+    cache = LLMResponseCache(enabled=True, db_path=None, max_entries=1, telemetry=telemetry)
+
+    assert cache.key_for(_request(temperature=0.7), "executing") is None
+    cache.allow_nonzero_temperature = True
+    assert cache.key_for(_request(temperature=0.7), "executing") is not None
+
+    first = cache.key_for(_request(), "planning")
+    cache.put(first, "a", operation="planning")
+    assert cache.get(first, "planning") is not None
+    second = cache.key_for(_request(model="other"), "planning")
+    cache.put(second, "b", operation="planning")
+    assert cache.get(first, "planning") is None  # evicted from the LRU, no store
+
+    stats = telemetry.get_snapshot().to_dict()["cache_stats"][0]
+    assert stats["name"] == "llm"
+    assert (stats["hits"], stats["misses"], stats["bypassed"]) == (1, 1, 1)
+    assert stats["hit_rate"] == 0.5
+
+
+def test_reusable_operations_are_cached_at_any_temperature():
+    cache = LLMResponseCache(enabled=True, db_path=None)
+
+    assert cache.key_for(_request(temperature=None), "classification") is not None
+    assert cache.key_for(_request(temperature=0.7), "planning") is not None
+    assert cache.key_for(_request(temperature=None), "executing") is None  # Provider default samples
+
+    cache.configure({"enabled": True, "reusable_operations": ["classification"]})
+    assert cache.key_for(_request(temperature=None), "planning") is None
@@ -0,0 +1,96 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from core.llm_scheduler import (
+    BACKGROUND,
+    INTERACTIVE,
+    PLANNING,
+    GenerationScheduler,
+    priority_of,
+)
+
+
+def test_priority_of_context():
+    def context(state="EXECUTING", **payload):
+        return SimpleNamespace(current_state=state, payload=payload)
+
+    assert priority_of(context(latency_critical=True)) == INTERACTIVE
+    assert priority_of(context("PLANNING")) == PLANNING
+    assert priority_of(context(cache_operation="classification")) == PLANNING
+    assert priority_of(context("EXTRACTING_TASKS")) == BACKGROUND
+    assert priority_of(context(latency_critical=True, llm_priority="background")) == BACKGROUND
+
+
+@pytest.mark.asyncio
+async def test_waiting_requests_are_served_by_priority():
+    scheduler = GenerationScheduler(max_concurrency=1, preempt=False)
+    order = []
+    release = asyncio.Event()
+
+    async def generation(name, wait=None):
+        if wait:
+            await wait.wait()
+        order.append(name)
+        return name
+
+    first = asyncio.create_task(scheduler.run("m", BACKGROUND, lambda: generation("first", release)))
+    await asyncio.sleep(0)
+    queued = [
+        asyncio.create_task(scheduler.run("m", priority, lambda n=name: generation(n)))
+        for name, priority in [("background", BACKGROUND), ("planning", PLANNING), ("user", INTERACTIVE)]
+    ]
+    await asyncio.sleep(0)
+    assert scheduler.running("m") == 1 and scheduler.queued("m") == 3
+
+    release.set()
+    await asyncio.gather(first, *queued)
+    assert order == ["first", "user", "planning", "background"]
+
+
+@pytest.mark.asyncio
+async def test_interactive_request_preempts_running_background_work():
+    scheduler = GenerationScheduler(max_concurrency=1)
+    attempts = []
+
+    async def background():
+        attempts.append("background")
+        await asyncio.sleep(0.05)
+        return "background done"
+
+    async def user():
+        return "user done"
+
+    background_task = asyncio.create_task(scheduler.run("m", BACKGROUND, background))
+    await asyncio.sleep(0.01)
+    assert await scheduler.run("m", INTERACTIVE, user) == "user done"
+
+    # The background generation was restarted after the user request
+    assert await background_task == "background done"
+    assert attempts == ["background", "background"]
+    assert scheduler.preempted == 1
+    assert scheduler.running("m") == 0
+
+
+@pytest.mark.asyncio
+async def test_per_model_concurrency_and_cancelled_waiters():
+    scheduler = GenerationScheduler(max_concurrency=1, model_concurrency={"small": 2})
+    gate = asyncio.Event()
+
+    async def generation():
+        await gate.wait()
+
+    small = [asyncio.create_task(scheduler.run("small", PLANNING, generation)) for _ in range(2)]
+    big = [asyncio.create_task(scheduler.run("big", PLANNING, generation)) for _ in range(2)]
+    await asyncio.sleep(0)
+    assert scheduler.running("small") == 2
+    assert scheduler.running("big") == 1 and scheduler.queued("big") == 1
+
+    big[1].cancel()
+    await asyncio.sleep(0)
+    assert scheduler.queued("big") == 0
+
+    gate.set()
+    await asyncio.gather(*small, big[0])
+    assert scheduler.running("small") == scheduler.running("big") == 0
@@ -0,0 +1,89 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from core.model_residency import ModelResidency, keep_alive_seconds
+
+GB = 1024**3
+
+
+class FakeOllama:
+    """Minimal /api/ps, /api/tags and /api/generate (load/unload) state."""
+
+    def __init__(self, sizes, loaded=()):
+        self.sizes = dict(sizes)
+        self.loaded = set(loaded)
+        self.generate_calls = []
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/api/ps":
+            models = [{"name": name, "size": self.sizes[name]} for name in sorted(self.loaded)]
+            return httpx.Response(200, json={"models": models})
+        if request.url.path == "/api/tags":
+            return httpx.Response(200, json={"models": [{"name": n, "size": s} for n, s in self.sizes.items()]})
+        body = json.loads(request.content)
+        self.generate_calls.append(body)
+        if body.get("keep_alive") == 0:
+            self.loaded.discard(body["model"])
+        else:
+            self.loaded.add(body["model"])
+        return httpx.Response(200, json={"done": True})
+
+
+def residency_for(ollama, **kwargs):
+    client = httpx.AsyncClient(transport=httpx.MockTransport(ollama.handler))
+    return ModelResidency("http://ollama", lambda: client, **kwargs)
+
+
+def test_keep_alive_seconds():
+    assert keep_alive_seconds("30m") == 1800
+    assert keep_alive_seconds("1h") == 3600
+    assert keep_alive_seconds(90) == 90
+    assert keep_alive_seconds(-1) == float("inf")
+    with pytest.raises(ValueError):
+        keep_alive_seconds("soon")
+
+
+@pytest.mark.asyncio
+async def test_warm_loads_once_with_the_models_keep_alive():
+    ollama = FakeOllama({"llama3.1:8b": 5 * GB})
+    residency = residency_for(ollama, keep_alive="30m", model_keep_alive={"qwen2.5:14b": "10m"})
+
+    await asyncio.gather(residency.warm("llama3.1:8b"), residency.warm("llama3.1:8b"))
+    await residency.warm("llama3.1:8b")
+
+    assert ollama.generate_calls == [{"model": "llama3.1:8b", "keep_alive": "30m"}]
+    assert residency.is_resident("llama3.1:8b")
+    assert residency.keep_alive_for("qwen2.5:14b") == "10m"
+
+
+@pytest.mark.asyncio
+async def test_loading_beyond_ram_budget_unloads_least_recently_used_idle_model():
+    ollama = FakeOllama({"llama3.1:8b": 5 * GB, "gemma2:2b": 2 * GB, "qwen2.5:14b": 9 * GB})
+    residency = residency_for(ollama, ram_budget_gb=12)
+
+    await residency.warm("gemma2:2b")
+    await residency.warm("llama3.1:8b")
+    async with residency.use("llama3.1:8b"):
+        await residency.warm("qwen2.5:14b")
+
+    # gemma was used least recently; llama is busy and must stay
+    assert {"model": "gemma2:2b", "keep_alive": 0} in ollama.generate_calls
+    assert ollama.loaded == {"llama3.1:8b", "qwen2.5:14b"}
+    assert set(residency.snapshot()) == {"llama3.1:8b", "qwen2.5:14b"}
+
+
+@pytest.mark.asyncio
+async def test_refresh_during_a_request_does_not_leave_the_model_in_use():
+    ollama = FakeOllama({"llama3.1:8b": 5 * GB, "gemma2:2b": 2 * GB})
+    residency = residency_for(ollama, ram_budget_gb=12)
+
+    await residency.warm("llama3.1:8b")
+    async with residency.use("llama3.1:8b"):
+        async with residency.use("gemma2:2b"):  # Makes room: re-reads /api/ps
+            await residency.refresh()
+
+    assert residency.snapshot()["llama3.1:8b"]["in_use"] == 0
+    assert residency.snapshot()["gemma2:2b"]["in_use"] == 0
@@ -0,0 +1,75 @@
+import asyncio
+
+import pytest
+
+from core.plan_graph import (
+    build_dependency_graph,
+    find_step_references,
+    first_failed_step,
+    run_plan_graph,
+)
+from core.plan_template import compile_plan
+
+
+def test_references_are_found_in_nested_arguments():
+    arguments = {
+        "text": "Summary of ${step_1.content} and ${step_3}",
+        "files": ["$result.step_2", {"path": "${step_4.path}"}],
+        "count": 3,
+    }
+    assert find_step_references(arguments) == {1, 2, 3, 4}
+
+
+def test_dependency_graph_with_barriers():
+    plan = [
+        {"tool_name": "fs", "method_name": "read_file", "arguments": {"path": "a"}},
+        {"tool_name": "fs", "method_name": "read_file", "arguments": {"path": "b"}},
+        {"tool_name": "llm", "method_name": "summarize", "arguments": {"text": "${step_2}"}},
+        {"tool_name": "llm", "method_name": "chat", "arguments": {"prompt": "${step_9}"}},
+    ]
+    graph = build_dependency_graph(compile_plan(plan).step_references, barrier_steps=[4])
+    assert graph == {1: set(), 2: set(), 3: {2}, 4: {1, 2, 3}}
+
+
+@pytest.mark.asyncio
+async def test_independent_steps_run_concurrently_within_cap():
+    graph = {1: set(), 2: set(), 3: set(), 4: {1, 2, 3}}
+    running = 0
+    peak = 0
+    order = []
+
+    async def run_step(number):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        order.append(number)
+        return True
+
+    outcomes = await run_plan_graph(graph, run_step, max_parallel=2)
+
+    assert peak == 2
+    assert order[-1] == 4
+    assert all(o.success for o in outcomes.values())
+
+
+@pytest.mark.asyncio
+async def test_cap_of_one_is_sequential_and_stops_on_failure():
+    graph = {1: set(), 2: set(), 3: set()}
+    order = []
+
+    async def run_step(number):
+        order.append(number)
+        return number != 2
+
+    outcomes = await run_plan_graph(graph, run_step, max_parallel=1)
+
+    assert order == [1, 2]
+    assert first_failed_step(outcomes) == 2
+    assert outcomes[3].skipped
+
+    order.clear()
+    outcomes = await run_plan_graph(graph, run_step, max_parallel=1, stop_on_failure=False)
+    assert order == [1, 2, 3]
+    assert outcomes[3].success
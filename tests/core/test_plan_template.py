@@ -0,0 +1,60 @@
+from types import SimpleNamespace
+
+from core.plan_template import compile_plan, compile_template
+
+
+def test_whole_reference_keeps_type_and_embedded_reference_is_text():
+    template = compile_template(
+        {
+            "files": "${step_1}",
+            "name": "${step_2.name}",
+            "message": "Found ${step_1} in $result.step_2",
+            "plain": "costs $5",
+        }
+    )
+    outputs = {1: ["a.py", "b.py"], 2: SimpleNamespace(name="report")}
+
+    resolved = template.resolve(outputs)
+
+    assert resolved["files"] == ["a.py", "b.py"]
+    assert resolved["name"] == "report"
+    assert resolved["message"].startswith("Found ['a.py', 'b.py'] in namespace(")
+    assert resolved["plain"] == "costs $5"
+
+
+def test_legacy_reference_ends_before_sentence_punctuation():
+    template = compile_template("Summarize $result.step_1. Keep $result.step_1.name as is.")
+
+    assert template.resolve({1: "the report"}) == (
+        "Summarize the report. Keep $result.step_1.name as is."
+    )
+
+
+def test_nested_structures_are_resolved_in_one_pass():
+    template = compile_template(
+        {"options": {"paths": ["${step_1.path}", "static"], "depth": "${step_2.depth}"}}
+    )
+
+    resolved = template.resolve({1: {"path": "/tmp/x"}, 2: {"depth": 3}})
+
+    assert resolved == {"options": {"paths": ["/tmp/x", "static"], "depth": 3}}
+    assert template.references == {1, 2}
+
+
+def test_missing_output_leaves_placeholder():
+    template = compile_template({"text": "${step_1.content}", "note": "see ${step_1}"})
+
+    assert template.resolve({}) == {"text": "${step_1.content}", "note": "see ${step_1}"}
+
+
+def test_unresolvable_references_are_reported_before_execution():
+    plan = [
+        {"tool_name": "fs", "method_name": "read_file", "arguments": {"path": "${step_2}"}},
+        {"tool_name": "fs", "method_name": "read_file", "arguments": {"path": "${step_7.path}"}},
+        {"tool_name": "llm", "method_name": "summarize", "arguments": {"text": "${step_1}"}},
+    ]
+
+    assert compile_plan(plan).unresolved_references() == [
+        "step 1 references later step 2",
+        "step 2 references unknown step 7",
+    ]
@@ -0,0 +1,47 @@
+import os
+
+import pytest
+
+from core.prompt_registry import PromptRegistry, PromptTemplate
+
+
+def _write(path, text, mtime_shift=0):
+    path.write_text(text, encoding="utf-8")
+    if mtime_shift:
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + mtime_shift))
+
+
+def test_render_matches_str_format():
+    text = 'Tools:\n{tool_list}\nRequest: "{user_input}" {count:>4} {name!r} {{literal}}'
+    template = PromptTemplate.inline(text)
+    kwargs = {"tool_list": "- a\n- b", "user_input": "hi", "count": 7, "name": "x"}
+
+    assert template.render(**kwargs) == text.format(**kwargs)
+    assert template.fields == ("tool_list", "user_input", "count", "name")
+
+
+def test_registry_loads_directory_once_and_resolves_names(tmp_path):
+    _write(tmp_path / "classify.txt", "Classify: {user_input}")
+    (tmp_path / "optimized").mkdir()
+    _write(tmp_path / "optimized" / "task_v1.txt", "v1")
+    registry = PromptRegistry(prompts_dir=tmp_path)
+
+    assert registry.names() == ["classify", "optimized/task_v1"]
+    assert registry.get("classify.txt") is registry.get("classify")
+    assert registry.render("classify", user_input="x") == "Classify: x"
+    assert registry.get("missing", default="fallback").text == "fallback"
+    with pytest.raises(KeyError):
+        registry.get("missing")
+
+
+def test_template_reloads_in_place_and_rehashes(tmp_path):
+    path = tmp_path / "dna.txt"
+    _write(path, "You are Sophia.")
+    template = PromptRegistry(prompts_dir=tmp_path, check_interval=0).get("dna")
+    first_hash = template.content_hash
+
+    _write(path, "You are Sophia, v2.", mtime_shift=1_000_000_000)
+
+    assert template.text == "You are Sophia, v2."
+    assert template.content_hash != first_hash
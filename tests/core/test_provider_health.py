@@ -0,0 +1,178 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from core.provider_health import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    AdaptiveRateLimiter,
+    CircuitBreaker,
+    ProviderHealth,
+    ProviderUnavailable,
+    provider_of,
+    retry_after_of,
+)
+from core.telemetry import TelemetryHub
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class RateLimitError(Exception):
+    status_code = 429
+
+    def __init__(self, retry_after):
+        super().__init__("rate limited")
+        self.response = SimpleNamespace(status_code=429, headers={"retry-after": retry_after})
+
+
+def test_provider_of_and_retry_after():
+    assert provider_of("openrouter/anthropic/claude-3.5-sonnet") == "openrouter"
+    assert provider_of("gpt-4o") == "default"
+    assert retry_after_of(RateLimitError("12")) == 12.0
+    assert retry_after_of(RateLimitError("Wed, 21 Oct 2015 07:28:10 GMT"), now=1445412480.0) == 10.0
+    assert retry_after_of(ValueError("no headers")) is None
+
+
+def test_limiter_backs_off_on_429_and_recovers():
+    clock = FakeClock()
+    limiter = AdaptiveRateLimiter(max_rate=4.0, min_rate=0.5, increase=1.0, clock=clock)
+
+    assert limiter.delay() == 0
+    assert limiter.delay() == pytest.approx(0.25)
+
+    limiter.on_rate_limited(retry_after=10)
+    assert limiter.rate == 2.0
+    # Blocked until Retry-After has passed
+    assert limiter.delay() == pytest.approx(10.0)
+
+    limiter.on_success()
+    limiter.on_success()
+    limiter.on_success()
+    assert limiter.rate == 4.0
+
+
+def test_circuit_opens_after_failures_and_half_opens_after_timeout():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30, clock=clock)
+
+    breaker.record_failure()
+    assert breaker.state == CLOSED and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+
+    clock.now += 30
+    assert breaker.allow()  # The one trial call
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow()
+
+    breaker.record_failure()
+    assert breaker.state == OPEN
+
+    clock.now += 30
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CLOSED and breaker.rejected == 2
+
+
+@pytest.mark.asyncio
+async def test_provider_health_fails_fast_and_reports_to_telemetry():
+    telemetry = TelemetryHub()
+    health = ProviderHealth(
+        {"circuit_breaker": {"failure_threshold": 2}, "rate_limit": {"max_rps": 1000}},
+        telemetry=telemetry,
+    )
+    calls = []
+
+    async def failing():
+        calls.append(1)
+        raise RateLimitError("0")
+
+    async def bad_request():
+        raise ValueError("invalid request")
+
+    with pytest.raises(ValueError):
+        await health.call("openrouter", bad_request)  # Not a provider failure
+    for _ in range(2):
+        with pytest.raises(RateLimitError):
+            await health.call("openrouter", failing)
+    with pytest.raises(ProviderUnavailable):
+        await health.call("openrouter", failing)
+
+    assert len(calls) == 2
+    assert not health.available("openrouter")
+    state = telemetry.get_snapshot().to_dict()["provider_health"]["openrouter"]
+    assert state["circuit"] == OPEN
+    assert state["rate_limited"] == 2
+    assert state["rejected"] == 1
+
+
+@pytest.mark.asyncio
+async def test_trial_that_errors_or_is_cancelled_does_not_block_the_provider():
+    health = ProviderHealth(
+        {"circuit_breaker": {"failure_threshold": 1, "reset_timeout": 0}, "rate_limit": {"max_rps": 1000}}
+    )
+
+    async def failing():
+        raise RateLimitError("0")
+
+    async def bad_request():
+        raise ValueError("invalid request")
+
+    async def ok():
+        return "ok"
+
+    with pytest.raises(RateLimitError):
+        await health.call("openrouter", failing)
+    with pytest.raises(ValueError):
+        await health.call("openrouter", bad_request)  # The trial reached the provider
+    assert health.guard("openrouter").breaker.state == CLOSED
+
+    with pytest.raises(RateLimitError):
+        await health.call("openrouter", failing)
+    trial = asyncio.ensure_future(health.call("openrouter", asyncio.Event().wait))
+    await asyncio.sleep(0)
+    trial.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await trial
+    assert await health.call("openrouter", ok) == "ok"
+    assert health.guard("openrouter").breaker.state == CLOSED
+
+
+@pytest.mark.asyncio
+async def test_call_from_before_the_circuit_opened_does_not_release_the_trial():
+    clock = FakeClock()
+    health = ProviderHealth({"rate_limit": {"max_rps": 1000}})
+    breaker = health.guard("openrouter").breaker
+    breaker._clock = clock
+
+    async def failing():
+        raise TimeoutError()
+
+    stale = asyncio.ensure_future(health.call("openrouter", asyncio.Event().wait))
+    await asyncio.sleep(0)
+    for _ in range(breaker.failure_threshold):
+        with pytest.raises(TimeoutError):
+            await health.call("openrouter", failing)
+    clock.now += breaker.reset_timeout
+
+    trial = asyncio.ensure_future(health.call("openrouter", asyncio.Event().wait))
+    await asyncio.sleep(0)
+    assert breaker.state == HALF_OPEN
+    stale.cancel()  # e.g. a hedge loser admitted while the circuit was closed
+    with pytest.raises(asyncio.CancelledError):
+        await stale
+
+    with pytest.raises(ProviderUnavailable):
+        await health.call("openrouter", failing)  # The trial is still out
+    trial.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await trial
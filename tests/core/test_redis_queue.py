@@ -0,0 +1,297 @@
+import socketserver
+import threading
+
+import pytest
+
+from core.queue_backend import create_queue_backend
+from core.redis_queue import _CLAIM_SCRIPT, _ENQUEUE_SCRIPT, _FINISH_SCRIPT, RedisQueue
+
+
+class _FakeRedisState:
+    """
+    In-memory data for the stand-in server (only the commands RedisQueue uses).
+    There is no Lua interpreter: EVAL runs a Python transcription of the
+    queue's scripts, command for command.
+    """
+
+    def __init__(self):
+        self.strings = {}
+        self.hashes = {}
+        self.zsets = {}
+        self.sets = {}
+        self.lock = threading.Lock()
+        self.received = []  # commands sent by clients (not those run by scripts)
+        self.scripts = {
+            _ENQUEUE_SCRIPT: self._enqueue,
+            _CLAIM_SCRIPT: self._claim,
+            _FINISH_SCRIPT: self._finish,
+        }
+
+    def _enqueue(self, keys, argv):
+        seq, pending = keys
+        prefix, created_at, priority, sort_key, payload = argv
+        task_id = self.handle("INCR", [seq])
+        self.handle(
+            "HSET",
+            [
+                prefix + str(task_id),
+                "created_at",
+                created_at,
+                "priority",
+                priority,
+                "sort_key",
+                sort_key,
+                "status",
+                "pending",
+                "payload",
+                payload,
+            ],
+        )
+        self.handle("ZADD", [pending, sort_key, str(task_id)])
+        return task_id
+
+    def _claim(self, keys, argv):
+        pending, leases, running = keys
+        prefix, now, lease_expiry, token = argv
+        expired = self.handle("ZRANGEBYSCORE", [leases, "-inf", now])
+        for task_id in expired:
+            task = prefix + task_id
+            self.handle("ZREM", [leases, task_id])
+            self.handle("SREM", [running, task_id])
+            self.handle("HDEL", [task, "lease"])
+            self.handle("HSET", [task, "status", "pending"])
+            self.handle("ZADD", [pending, self.handle("HGET", [task, "sort_key"]) or "0", task_id])
+        popped = self.handle("ZPOPMIN", [pending])
+        if not popped:
+            return [len(expired)]
+        task_id = popped[0]
+        task = prefix + task_id
+        if lease_expiry != "":
+            self.handle("ZADD", [leases, lease_expiry, task_id])
+        self.handle("SADD", [running, task_id])
+        self.handle("HSET", [task, "status", "running", "lease", token])
+        return [len(expired), task_id, self.handle("HGET", [task, "payload"])]
+
+    def _finish(self, keys, argv):
+        task, leases, pending, running, status_set = keys
+        task_id, status, token = argv
+        if token != "" and self.handle("HGET", [task, "lease"]) != token:
+            return 0
+        self.handle("ZREM", [leases, task_id])
+        self.handle("ZREM", [pending, task_id])
+        self.handle("SREM", [running, task_id])
+        self.handle("SADD", [status_set, task_id])
+        self.handle("HDEL", [task, "lease"])
+        self.handle("HSET", [task, "status", status])
+        return 1
+
+    def handle(self, cmd, args):
+        if cmd == "EVAL":
+            numkeys = int(args[1])
+            return self.scripts[args[0]](args[2 : 2 + numkeys], args[2 + numkeys :])
+        if cmd == "PING":
+            return "+PONG"
+        if cmd == "SELECT":
+            return "+OK"
+        if cmd == "INCR":
+            self.strings[args[0]] = int(self.strings.get(args[0], 0)) + 1
+            return self.strings[args[0]]
+        if cmd == "HSET":
+            h = self.hashes.setdefault(args[0], {})
+            added = 0
+            for field, value in zip(args[1::2], args[2::2]):
+                added += field not in h
+                h[field] = value
+            return added
+        if cmd == "HGET":
+            return self.hashes.get(args[0], {}).get(args[1])
+        if cmd == "HDEL":
+            return int(self.hashes.get(args[0], {}).pop(args[1], None) is not None)
+        if cmd == "ZADD":
+            z = self.zsets.setdefault(args[0], {})
+            added = args[2] not in z
+            z[args[2]] = float(args[1])
+            return int(added)
+        if cmd == "ZREM":
+            return int(self.zsets.get(args[0], {}).pop(args[1], None) is not None)
+        if cmd == "ZCARD":
+            return len(self.zsets.get(args[0], {}))
+        if cmd == "ZPOPMIN":
+            z = self.zsets.get(args[0], {})
+            if not z:
+                return []
+            member = min(z, key=lambda m: (z[m], m))
+            score = z.pop(member)
+            return [member, repr(score)]
+        if cmd == "ZRANGEBYSCORE":
+            z = self.zsets.get(args[0], {})
+            low = float(args[1])
+            high = float(args[2])
+            return [m for m, s in sorted(z.items(), key=lambda i: i[1]) if low <= s <= high]
+        if cmd == "SADD":
+            s = self.sets.setdefault(args[0], set())
+            added = args[1] not in s
+            s.add(args[1])
+            return int(added)
+        if cmd == "SREM":
+            s = self.sets.get(args[0], set())
+            removed = args[1] in s
+            s.discard(args[1])
+            return int(removed)
+        if cmd == "SCARD":
+            return len(self.sets.get(args[0], set()))
+        return f"-ERR unknown command '{cmd}'"
+
+
+def _encode(reply):
+    if isinstance(reply, str) and reply[:1] in ("+", "-"):
+        return (reply + "\r\n").encode()
+    if reply is None:
+        return b"$-1\r\n"
+    if isinstance(reply, int):
+        return b":%d\r\n" % reply
+    if isinstance(reply, list):
+        return b"*%d\r\n" % len(reply) + b"".join(_encode(r) for r in reply)
+    data = str(reply).encode()
+    return b"$%d\r\n%s\r\n" % (len(data), data)
+
+
+class _RespHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            count = int(line[1:-2])
+            args = []
+            for _ in range(count):
+                length = int(self.rfile.readline()[1:-2])
+                args.append(self.rfile.read(length + 2)[:-2].decode())
+            with self.server.state.lock:
+                self.server.state.received.append(args[0].upper())
+                reply = self.server.state.handle(args[0].upper(), args[1:])
+            self.wfile.write(_encode(reply))
+
+
+@pytest.fixture
+def redis_server():
+    """Local redis-server stand-in speaking RESP2 on an ephemeral port."""
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), _RespHandler)
+    server.daemon_threads = True
+    server.state = _FakeRedisState()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def redis_url(redis_server):
+    return f"redis://127.0.0.1:{redis_server.server_address[1]}/0"
+
+
+def test_enqueue_claim_and_mark_done(redis_url):
+    q = RedisQueue(url=redis_url, aging_bands=None)
+
+    low = q.enqueue({"instruction": "maintenance"}, priority=200)
+    high = q.enqueue({"instruction": "user request"}, priority=1)
+    assert q.pending_count() == 2
+
+    item = q.dequeue_and_lock()
+    assert item == {"id": high, "payload": {"instruction": "user request"}, "lease": item["lease"]}
+    assert q.count("running") == 1
+
+    assert q.mark_done(high, item["lease"])
+    assert q.count("done") == 1
+    assert q.dequeue_and_lock()["id"] == low
+    assert q.dequeue_and_lock() is None
+    q.close()
+
+
+def test_enqueue_is_one_script_and_all_keys_share_the_hash_tag(redis_server, redis_url):
+    q = RedisQueue(url=redis_url, aging_bands=None)
+    state = redis_server.state
+
+    tid = q.enqueue({"instruction": "x"})
+    assert state.received == ["EVAL"]
+    assert state.hashes[f"{{sophia:tasks}}:task:{tid}"]["status"] == "pending"
+
+    item = q.dequeue_and_lock(lease_seconds=30)
+    q.mark_done(tid, item["lease"])
+    keys = [*state.strings, *state.hashes, *state.zsets, *state.sets]
+    assert keys and all(key.startswith("{sophia:tasks}:") for key in keys)
+    q.close()
+
+
+def test_mark_failed_records_reason(redis_url):
+    q = RedisQueue(url=redis_url, aging_bands=None)
+    tid = q.enqueue({"instruction": "fails"})
+    q.dequeue_and_lock()
+
+    q.mark_failed(tid, "boom")
+
+    assert q.count("failed") == 1
+    assert q.count("running") == 0
+    assert '"boom"' in q._conn.execute("HGET", q._key("task", tid), "payload")
+    q.close()
+
+
+def test_expired_lease_is_claimed_again_by_another_worker(redis_url, monkeypatch):
+    import core.redis_queue as rq
+
+    clock = {"now": 1_000_000.0}
+    monkeypatch.setattr(rq.time, "time", lambda: clock["now"])
+
+    worker_a = RedisQueue(url=redis_url, aging_bands=None)
+    worker_b = RedisQueue(url=redis_url, aging_bands=None)
+    tid = worker_a.enqueue({"instruction": "long task"})
+
+    assert worker_a.dequeue_and_lock(lease_seconds=30)["id"] == tid
+    assert worker_b.dequeue_and_lock(lease_seconds=30) is None
+
+    clock["now"] += 31
+    assert worker_b.dequeue_and_lock(lease_seconds=30)["id"] == tid
+    worker_a.close()
+    worker_b.close()
+
+
+def test_worker_that_lost_its_lease_cannot_finish_the_task(redis_url, monkeypatch):
+    import core.redis_queue as rq
+
+    clock = {"now": 1_000_000.0}
+    monkeypatch.setattr(rq.time, "time", lambda: clock["now"])
+
+    worker_a = RedisQueue(url=redis_url, aging_bands=None)
+    worker_b = RedisQueue(url=redis_url, aging_bands=None)
+    tid = worker_a.enqueue({"instruction": "slow task"})
+    stale = worker_a.dequeue_and_lock(lease_seconds=30)
+
+    clock["now"] += 31
+    current = worker_b.dequeue_and_lock(lease_seconds=30)
+    assert current["id"] == tid
+
+    assert not worker_a.mark_failed(tid, "timed out", lease=stale["lease"])
+    assert worker_a.count("failed") == 0
+    assert worker_a.count("running") == 1
+
+    assert worker_b.mark_done(tid, lease=current["lease"])
+    assert worker_b.count("done") == 1
+    assert worker_b.count("running") == 0
+    worker_a.close()
+    worker_b.close()
+
+
+def test_factory_selects_backend(redis_url, tmp_path):
+    redis_backend = create_queue_backend({"backend": "redis", "redis": {"url": redis_url}})
+    assert isinstance(redis_backend, RedisQueue)
+    redis_backend.close()
+
+    sqlite_backend = create_queue_backend(
+        {"backend": "sqlite", "sqlite": {"db_path": str(tmp_path / "q.sqlite")}}
+    )
+    assert sqlite_backend.enqueue({"instruction": "x"}) == 1
+    sqlite_backend.close()
+
+    with pytest.raises(ValueError):
+        create_queue_backend({"backend": "kafka"})
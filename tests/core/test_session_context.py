@@ -0,0 +1,35 @@
+from core.session_context import SessionContextCache
+
+SYSTEM = {"role": "system", "content": "sys"}
+
+
+def user(text):
+    return {"role": "user", "content": text}
+
+
+def test_continuation_requires_the_exact_previous_conversation():
+    cache = SessionContextCache()
+    first = [SYSTEM, user("a")]
+    cache.store("s", "m", first, "answer", [1, 2, 3])
+    follow_up = first + [{"role": "assistant", "content": "answer"}, user("b")]
+
+    assert cache.continuation("s", "other-model", follow_up) is None
+    assert cache.continuation("s", "m", follow_up) == ([1, 2, 3], [user("b")])
+
+    edited = [SYSTEM, user("changed"), {"role": "assistant", "content": "answer"}, user("b")]
+    assert cache.continuation("s", "m", edited) is None
+    assert len(cache) == 0  # The stale state is dropped
+
+
+def test_least_recently_used_sessions_are_evicted_and_full_contexts_dropped():
+    cache = SessionContextCache(max_sessions=2, max_tokens=10)
+    for session in ("a", "b"):
+        cache.store(session, "m", [user(session)], "x", [1])
+    cache.continuation("a", "m", [user("a"), {"role": "assistant", "content": "x"}, user("more")])
+    cache.store("c", "m", [user("c")], "x", [1])
+    cache.store("d", "m", [user("d")], "x", list(range(10)))
+
+    assert cache.evictions == 1
+    assert cache.continuation("b", "m", [user("b"), {"role": "assistant", "content": "x"}, user("?")]) is None
+    assert cache.continuation("d", "m", [user("d"), {"role": "assistant", "content": "x"}, user("?")]) is None
+    assert len(cache) == 2  # a and c
@@ -19,3 +19,110 @@ def test_enqueue_and_dequeue_and_mark_done(tmp_path):
     q.mark_done(tid)
     # No pending tasks now
     assert q.pending_count() == 0
+
+
+def test_strict_priority_order_without_aging(tmp_path):
+    q = SimplePersistentQueue(db_path=str(tmp_path / "q.sqlite"), aging_bands=None)
+
+    low = q.enqueue({"instruction": "maintenance"}, priority=200)
+    high = q.enqueue({"instruction": "user request"}, priority=1)
+
+    assert q.dequeue_and_lock()["id"] == high
+    assert q.dequeue_and_lock()["id"] == low
+
+
+def test_priority_aging_prevents_starvation(tmp_path, monkeypatch):
+    import core.simple_persistent_queue as spq
+
+    clock = {"now": 1_000_000.0}
+    monkeypatch.setattr(spq.time, "time", lambda: clock["now"])
+
+    # 1 point/minute for user tasks, 2 points/minute for everything else
+    q = SimplePersistentQueue(
+        db_path=str(tmp_path / "q.sqlite"), aging_bands=[(10, 1.0), (None, 2.0)]
+    )
+
+    maintenance = q.enqueue({"instruction": "maintenance"}, priority=100)
+
+    # A fresh user task still wins while maintenance has waited only a little
+    clock["now"] += 10 * 60
+    user_early = q.enqueue({"instruction": "user 1"}, priority=5)
+    assert q.dequeue_and_lock()["id"] == user_early
+
+    # After 50 minutes maintenance has aged past newly arriving user tasks
+    clock["now"] += 45 * 60
+    q.enqueue({"instruction": "user 2"}, priority=5)
+    assert q.dequeue_and_lock()["id"] == maintenance
+
+
+def test_legacy_rows_are_backfilled_with_sort_key(tmp_path):
+    import sqlite3
+
+    dbp = tmp_path / "q.sqlite"
+    conn = sqlite3.connect(str(dbp))
+    conn.execute(
+        "CREATE TABLE tasks (id INTEGER PRIMARY KEY AUTOINCREMENT, created_at TEXT, "
+        "priority INTEGER DEFAULT 100, status TEXT DEFAULT 'pending', payload TEXT)"
+    )
+    conn.execute(
+        "INSERT INTO tasks (created_at, priority, status, payload) "
+        "VALUES ('2025-01-01T00:00:00', 50, 'pending', '{\"instruction\": \"old\"}')"
+    )
+    conn.commit()
+    conn.close()
+
+    q = SimplePersistentQueue(db_path=str(dbp), aging_bands=[(None, 1.0)])
+    item = q.dequeue_and_lock()
+    assert item is not None
+    assert item["payload"]["instruction"] == "old"
+
+
+def test_expired_lease_returns_task_to_queue(tmp_path, monkeypatch):
+    import core.simple_persistent_queue as spq
+
+    clock = {"now": 1_000_000.0}
+    monkeypatch.setattr(spq.time, "time", lambda: clock["now"])
+
+    q = SimplePersistentQueue(db_path=str(tmp_path / "q.sqlite"), aging_bands=None)
+    tid = q.enqueue({"instruction": "long task"})
+
+    assert q.dequeue_and_lock(lease_seconds=30)["id"] == tid
+    assert q.dequeue_and_lock(lease_seconds=30) is None
+    assert q.count("running") == 1
+
+    clock["now"] += 31
+    assert q.dequeue_and_lock(lease_seconds=30)["id"] == tid
+
+
+def test_stale_lease_cannot_finish_a_reclaimed_task(tmp_path, monkeypatch):
+    import core.simple_persistent_queue as spq
+
+    clock = {"now": 1_000_000.0}
+    monkeypatch.setattr(spq.time, "time", lambda: clock["now"])
+
+    q = SimplePersistentQueue(db_path=str(tmp_path / "q.sqlite"), aging_bands=None)
+    tid = q.enqueue({"instruction": "slow task"})
+    stale = q.dequeue_and_lock(lease_seconds=30)
+
+    clock["now"] += 31
+    current = q.dequeue_and_lock(lease_seconds=30)
+    assert current["id"] == tid
+
+    assert not q.mark_done(tid, lease=stale["lease"])
+    assert q.count("running") == 1
+
+    assert q.mark_failed(tid, "boom", lease=current["lease"])
+    assert q.count("failed") == 1
+
+
+def test_sort_key_increases_with_priority_across_aging_bands(tmp_path):
+    from core.queue_backend import DEFAULT_AGING_BANDS
+
+    q = SimplePersistentQueue(db_path=str(tmp_path / "q.sqlite"), aging_bands=DEFAULT_AGING_BANDS)
+
+    for priority in [0, 9, 10, 11, 50, 99, 100, 101, 150, 199, 200, 201]:
+        assert q._sort_key(priority, 0.0) < q._sort_key(priority + 1, 0.0)
+    # Piecewise: 10 min in the first band, 90 points at 2/min, then 4/min
+    assert q._sort_key(10, 0.0) == 600.0
+    assert q._sort_key(100, 0.0) == 600.0 + 2700.0
+    assert q._sort_key(200, 0.0) == 3300.0 + 1500.0
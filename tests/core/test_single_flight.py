@@ -0,0 +1,77 @@
+import asyncio
+
+import pytest
+
+from core.single_flight import SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_calls_share_one_execution():
+    flight = SingleFlight()
+    calls = []
+
+    async def classify(label):
+        calls.append(label)
+        await asyncio.sleep(0.05)
+        return label.upper()
+
+    results = await asyncio.gather(
+        flight.do("a", lambda: classify("a")),
+        flight.do("a", lambda: classify("a")),
+        flight.do("b", lambda: classify("b")),
+    )
+
+    assert calls == ["a", "b"]
+    assert results == [("A", False), ("A", True), ("B", False)]
+    assert flight.coalesced == 1
+    assert not flight.in_flight("a")
+
+    # Finished calls are not reused
+    assert await flight.do("a", lambda: classify("a")) == ("A", False)
+
+
+@pytest.mark.asyncio
+async def test_errors_reach_every_waiter():
+    flight = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("upstream down")
+
+    results = await asyncio.gather(
+        flight.do("k", fail), flight.do("k", fail), return_exceptions=True
+    )
+    assert [str(r) for r in results] == ["upstream down", "upstream down"]
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_does_not_cancel_shared_call():
+    flight = SingleFlight()
+    started = asyncio.Event()
+    cancelled = asyncio.Event()
+
+    async def generate():
+        started.set()
+        try:
+            await asyncio.sleep(0.05)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+        return "text"
+
+    leader = asyncio.create_task(flight.do("k", generate))
+    await started.wait()
+    follower = asyncio.create_task(flight.do("k", generate))
+    await asyncio.sleep(0)
+    leader.cancel()
+
+    assert await follower == ("text", True)
+    assert not cancelled.is_set()
+
+    # With nobody left waiting, the call itself is cancelled
+    started.clear()
+    only = asyncio.create_task(flight.do("k", generate))
+    await started.wait()
+    only.cancel()
+    await asyncio.sleep(0.01)
+    assert cancelled.is_set()
@@ -0,0 +1,39 @@
+from core.task_classifier import TaskClassifier, features
+
+EXAMPLES = [
+    ("summarize this article for me", "text_summarization"),
+    ("give me a short summary of the report", "text_summarization"),
+    ("can you summarize the meeting notes", "text_summarization"),
+    ("what time is it", "simple_query"),
+    ("what is the capital of france", "simple_query"),
+    ("who wrote hamlet", "simple_query"),
+    ("create a plan to refactor the memory module", "plan_generation"),
+    ("plan the steps to deploy the new release", "plan_generation"),
+    ("make a step by step plan for the migration", "plan_generation"),
+]
+
+
+def test_features_are_normalised():
+    vector = features("Summarize the report")
+    assert abs(sum(v * v for v in vector.values()) - 1.0) < 1e-9
+    assert features("") == {}
+
+
+def test_predicts_the_closest_task_type():
+    classifier = TaskClassifier(min_confidence=0.5, min_examples=len(EXAMPLES))
+    classifier.fit(EXAMPLES)
+
+    assert classifier.predict("please summarize this report").task_type == "text_summarization"
+    assert classifier.predict("what is the capital of spain").task_type == "simple_query"
+    assert classifier.predict("write a plan for the deploy steps").task_type == "plan_generation"
+
+
+def test_defers_to_the_caller_when_unsure():
+    classifier = TaskClassifier(min_confidence=0.5, min_examples=len(EXAMPLES) + 1)
+    classifier.fit(EXAMPLES)
+    assert classifier.predict("summarize this") is None  # Too few examples
+
+    classifier.min_examples = 1
+    assert classifier.predict("summarize this", allowed=["text_summarization"]) is None  # One label
+    classifier.min_confidence = 0.99
+    assert classifier.predict("hello there") is None  # Not confident
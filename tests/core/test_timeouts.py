@@ -0,0 +1,100 @@
+import threading
+
+import pytest
+
+from core.latency import LatencyHistogram
+from core.timeouts import AdaptiveTimeouts
+
+
+class FakeStore:
+    def __init__(self):
+        self.saved = {}
+        self.saves = 0
+
+    def load_latency_stats(self):
+        return dict(self.saved)
+
+    def save_latency_stats(self, stats):
+        self.saves += 1
+        self.save_thread = threading.get_ident()
+        self.saved.update(stats)
+
+
+def test_histogram_quantiles_are_close_upper_bounds():
+    histogram = LatencyHistogram(decay=1.0)
+    for seconds in range(1, 101):
+        histogram.add(seconds / 10)  # 0.1 .. 10 s
+
+    p50 = histogram.quantile(0.5)
+    p99 = histogram.quantile(0.99)
+    assert 5.0 <= p50 <= 5.0 * LatencyHistogram.GROWTH
+    assert 9.9 <= p99 <= 9.9 * LatencyHistogram.GROWTH
+
+    restored = LatencyHistogram.from_dict(histogram.to_dict(), decay=1.0)
+    assert restored.samples == 100
+    assert restored.quantile(0.99) == p99
+
+
+def test_default_until_learned_then_multiple_of_p99():
+    timeouts = AdaptiveTimeouts(multiplier=3.0, min_samples=5, min_timeout=1.0)
+
+    for _ in range(4):
+        timeouts.record("fast-model", 2.0, output_tokens=100)
+    assert timeouts.timeout_for("fast-model", default=60) == 60
+    timeouts.record("fast-model", 2.0, output_tokens=100)
+
+    learned = timeouts.timeout_for("fast-model", default=60)
+    assert 6.0 <= learned <= 6.0 * LatencyHistogram.GROWTH
+    # A longer expected answer scales the timeout up, a shorter one does not shrink it
+    assert timeouts.timeout_for("fast-model", 60, expected_tokens=400) == pytest.approx(4 * learned)
+    assert timeouts.timeout_for("fast-model", 60, expected_tokens=10) == learned
+    # Clamped to max_timeout
+    timeouts.max_timeout = 10.0
+    assert timeouts.timeout_for("fast-model", 60, expected_tokens=10_000) == 10.0
+
+    timeouts.enabled = False
+    assert timeouts.timeout_for("fast-model", default=60) == 60
+
+
+def test_pipeline_timeout_does_not_drop_below_its_floor():
+    timeouts = AdaptiveTimeouts(multiplier=3.0, min_samples=5, min_timeout=5.0)
+    for _ in range(5):
+        timeouts.record("pipeline:webui_input", 1.0)
+
+    assert timeouts.timeout_for("pipeline:webui_input", 120.0) == 5.0
+    assert timeouts.timeout_for("pipeline:webui_input", 120.0, floor=120.0) == 120.0
+    for _ in range(50):
+        timeouts.record("pipeline:webui_input", 100.0)
+    assert timeouts.timeout_for("pipeline:webui_input", 120.0, floor=120.0) > 120.0
+
+
+def test_statistics_persist_through_the_store():
+    store = FakeStore()
+    timeouts = AdaptiveTimeouts(min_samples=3, persist_every=3)
+    timeouts.attach_store(store)
+    for _ in range(3):
+        timeouts.record("llama3.1:8b", 40.0, output_tokens=500)
+
+    assert store.saves == 1
+    restarted = AdaptiveTimeouts(min_samples=3)
+    restarted.attach_store(store)
+    assert restarted.timeout_for("llama3.1:8b", default=120) == timeouts.timeout_for(
+        "llama3.1:8b", default=120
+    )
+    assert restarted.timeout_for("llama3.1:8b", default=120) > 120
+
+
+@pytest.mark.asyncio
+async def test_samples_recorded_on_the_event_loop_are_saved_off_the_loop():
+    store = FakeStore()
+    timeouts = AdaptiveTimeouts(persist_every=2)
+    timeouts.attach_store(store)
+
+    timeouts.record("gpt-4o", 2.0)
+    timeouts.record("gpt-4o", 2.0)
+    assert store.saves == 0
+    await timeouts._background_save
+
+    assert store.saves == 1
+    assert store.save_thread != threading.get_ident()
+    assert "gpt-4o" in store.saved
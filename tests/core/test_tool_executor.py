@@ -0,0 +1,121 @@
+import asyncio
+import os
+import threading
+import time
+
+import pytest
+
+from core.tool_executor import ToolExecutionTimeout, ToolExecutor
+from core.tool_registry import ToolMethod
+
+
+def _tool_method(tool_name, func, cpu_bound=False):
+    return ToolMethod(
+        tool_name=tool_name,
+        method_name=func.__name__,
+        method=func,
+        accepts_context=False,
+        is_async=asyncio.iscoroutinefunction(func),
+        cpu_bound=cpu_bound,
+    )
+
+
+def _spin(seconds):
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        pass
+    return os.getpid()
+
+
+class _MathTool:
+    cpu_bound = True
+    spin = staticmethod(_spin)
+
+    def __init__(self):
+        self.lock = threading.Lock()  # plugin state that cannot be pickled
+
+    def locked_spin(self, seconds):
+        with self.lock:
+            return _spin(seconds)
+
+
+@pytest.mark.asyncio
+async def test_sync_method_runs_off_the_event_loop():
+    loop_thread = threading.get_ident()
+
+    def slow_read(path):
+        time.sleep(0.2)
+        return (path, threading.get_ident())
+
+    executor = ToolExecutor(max_workers=2)
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    ticking = asyncio.create_task(ticker())
+    path, worker_thread = await executor.call(_tool_method("tool_fs", slow_read), path="a.txt")
+    ticking.cancel()
+    executor.shutdown()
+
+    assert path == "a.txt"
+    assert worker_thread != loop_thread
+    assert ticks >= 5  # the loop kept running while the tool blocked
+
+
+@pytest.mark.asyncio
+async def test_per_tool_timeout():
+    def hang():
+        time.sleep(0.5)
+
+    executor = ToolExecutor(default_timeout=10, tool_timeouts={"tool_slow": 0.05})
+    with pytest.raises(ToolExecutionTimeout):
+        await executor.call(_tool_method("tool_slow", hang))
+    executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_default_timeout_applies_to_sync_calls_only():
+    async def stream_answer():
+        await asyncio.sleep(0.1)
+        return "done"
+
+    executor = ToolExecutor(default_timeout=0.05)
+    assert await executor.call(_tool_method("tool_llm", stream_answer)) == "done"
+    with pytest.raises(ToolExecutionTimeout):
+        await executor.call(_tool_method("tool_slow", lambda: time.sleep(0.2)))
+
+    executor.tool_timeouts["tool_llm"] = 0.05
+    with pytest.raises(ToolExecutionTimeout):
+        await executor.call(_tool_method("tool_llm", stream_answer))
+    executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_cpu_bound_staticmethod_runs_in_process_pool_with_timeout():
+    tool = _MathTool()
+    executor = ToolExecutor(process_workers=1, default_timeout=None)
+
+    method = _tool_method("tool_math", tool.spin, cpu_bound=True)
+
+    assert await executor.call(method, seconds=0) != os.getpid()
+    assert executor._process_pool is not None
+
+    executor.tool_timeouts["tool_math"] = 0.1
+    with pytest.raises(ToolExecutionTimeout):
+        await executor.call(method, seconds=1.0)
+    executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_cpu_bound_bound_method_falls_back_to_threads():
+    tool = _MathTool()
+    executor = ToolExecutor(process_workers=1)
+
+    method = _tool_method("tool_math", tool.locked_spin, cpu_bound=True)
+    assert await executor.call(method, seconds=0) == os.getpid()
+    assert executor._process_pool is None
+    executor.shutdown()
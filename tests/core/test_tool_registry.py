@@ -0,0 +1,71 @@
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from pydantic import ValidationError
+
+from core.tool_registry import ToolRegistry
+
+
+def _make_tool(name="mock_tool"):
+    tool = MagicMock()
+    tool.name = name
+    tool.do_something = AsyncMock(return_value="done")
+    tool.get_tool_definitions.return_value = [
+        {
+            "function": {
+                "name": "do_something",
+                "parameters": {
+                    "type": "object",
+                    "properties": {
+                        "path": {"type": "string"},
+                        "count": {"type": "integer", "default": 1},
+                    },
+                    "required": ["path"],
+                },
+            }
+        }
+    ]
+    return tool
+
+
+def test_registry_compiles_validators_once():
+    tool = _make_tool()
+    registry = ToolRegistry()
+    registry.build([tool])
+
+    model = registry.get_validation_model("mock_tool", "do_something")
+    assert model(path="a.txt").model_dump() == {"path": "a.txt", "count": 1}
+    with pytest.raises(ValidationError):
+        model()
+
+    # Same plugin instances -> no rebuild, no further get_tool_definitions calls
+    assert registry.refresh([tool]) is False
+    assert tool.get_tool_definitions.call_count == 1
+    assert registry.build_count == 1
+
+
+def test_registry_rebuilds_when_plugins_change():
+    registry = ToolRegistry()
+    registry.build([_make_tool()])
+
+    assert registry.refresh([_make_tool(), _make_tool("other_tool")]) is True
+    assert registry.build_count == 2
+    assert registry.get_validation_model("other_tool", "do_something") is not None
+
+    registry.invalidate()
+    assert registry.refresh([]) is True
+
+
+def test_method_lookup_is_cached_with_call_characteristics():
+    tool = _make_tool()
+    registry = ToolRegistry()
+    registry.build([tool])
+
+    entry = registry.get_method("mock_tool", "do_something")
+    assert entry is not None
+    assert entry.is_async is True
+    assert entry.accepts_context is False
+    assert entry.validation_model is registry.get_validation_model("mock_tool", "do_something")
+    assert registry.get_method("mock_tool", "do_something") is entry
+
+    assert registry.get_method("missing_tool", "do_something") is None
@@ -0,0 +1,30 @@
+from core.tool_retrieval import ToolEntry, ToolIndex, terms
+
+CATALOG = [
+    ToolEntry("tool_file_system", "list_directory", "List files in a directory"),
+    ToolEntry("tool_file_system", "read_file", "Read the content of a file"),
+    ToolEntry("tool_git", "get_status", "Show the git status of the repository"),
+    ToolEntry("tool_git", "commit", "Commit staged changes"),
+    ToolEntry("tool_tavily", "search", "Search the web for current information"),
+    ToolEntry("tool_llm", "execute", "Ask the language model"),
+]
+
+
+def test_terms_split_identifiers_and_add_stems():
+    assert terms("getCurrentTime list_directory") == ["get", "current", "time", "list", "directory", "curre", "direc"]
+
+
+def test_select_ranks_relevant_tools_and_keeps_catalog_order():
+    index = ToolIndex(CATALOG)
+
+    selected = index.select("what is the git status of this repository?", top_k=1)
+    assert [e.method_name for e in selected] == ["get_status"]
+
+    selected = index.select("search the web for news", top_k=2, essential=["tool_llm"])
+    assert [e.method_name for e in selected] == ["search", "execute"]
+
+
+def test_select_skips_tools_that_do_not_match():
+    index = ToolIndex(CATALOG)
+    assert [e.method_name for e in index.select("read the file", top_k=3)] == ["list_directory", "read_file"]
+    assert index.select("xyzzy", top_k=3) == CATALOG  # Nothing to filter on
@@ -242,3 +242,91 @@ async def test_planner_handles_malformed_json_in_arguments(planner):
         }
     ]
     assert result_context.payload["plan"] == expected_plan
+
+
+@pytest.mark.asyncio
+async def test_offline_planner_constrains_local_output_to_plan_schema():
+    """Local planning asks for PLAN_SCHEMA-constrained output instead of a function call."""
+    from plugins.cognitive_planner import PLAN_SCHEMA
+
+    plan = [{"tool_name": "tool_datetime", "method_name": "get_current_time", "arguments": {}}]
+    local_llm = AsyncMock()
+    local_llm.name = "tool_local_llm"
+    local_llm.get_tool_definitions = MagicMock(return_value=[])
+    local_llm.execute.return_value = SharedContext(
+        "offline", "PLANNING", logging.getLogger("test"), payload={"llm_response": json.dumps(plan)}
+    )
+    p = Planner()
+    p.setup({"all_plugins": {"tool_local_llm": local_llm}, "offline_mode": True})
+    p.prompt_template = "Test Prompt with tools: {tool_list}"
+    context = SharedContext("offline", "PLANNING", logging.getLogger("test"), "what time is it")
+    context.offline_mode = True
+
+    result = await p.execute(context)
+
+    planning_context = local_llm.execute.call_args.kwargs["context"]
+    assert planning_context.payload["response_format"] == PLAN_SCHEMA
+    assert "tools" not in planning_context.payload
+    assert result.payload["plan"] == plan
+    assert result.payload["planner_attempts"] == 1
+
+
+@pytest.mark.asyncio
+async def test_planner_lists_only_relevant_tools_online(planner):
+    """Beyond top_k tool methods, the prompt lists the relevant ones plus essential tools."""
+    files = MagicMock()
+    files.name = "tool_file_system"
+    files.get_tool_definitions.return_value = [
+        {"function": {"name": "read_file", "description": "Read the content of a file."}},
+        {"function": {"name": "write_file", "description": "Write content to a file."}},
+    ]
+    git = MagicMock()
+    git.name = "tool_git"
+    git.get_tool_definitions.return_value = [
+        {"function": {"name": "get_status", "description": "Show the git status of the repository."}},
+        {"function": {"name": "commit", "description": "Commit staged changes."}},
+    ]
+    planner.plugins.update({"tool_file_system": files, "tool_git": git})
+    planner.llm_tool.name = "tool_llm"
+    planner.llm_tool.get_tool_definitions.return_value = [
+        {"function": {"name": "execute", "description": "Ask the LLM."}}
+    ]
+    planner.tool_top_k = 1
+    planner.llm_tool.execute.return_value = SharedContext(
+        "test", "PLANNING", logging.getLogger("test"), payload={"llm_response": "[]"}
+    )
+
+    await planner.execute(SharedContext("test", "PLANNING", logging.getLogger("test"), "read the file notes.txt"))
+
+    planning_context = planner.llm_tool.execute.call_args.kwargs["context"]
+    prompt = planning_context.payload["tools"][0]["function"]["description"]
+    assert "method_name: 'read_file'" in prompt
+    assert "method_name: 'execute'" in prompt  # Essential
+    assert "tool_git" not in prompt
+
+
+@pytest.mark.asyncio
+async def test_planner_renders_tool_catalog_once_per_plugin_set(planner):
+    """Tool definitions are read once, and again only when the plugins change."""
+    planner.llm_tool.get_tool_definitions.return_value = [
+        {"function": {"name": "execute", "description": "Ask the LLM."}}
+    ]
+    planner.llm_tool.execute.return_value = SharedContext(
+        "test", "PLANNING", logging.getLogger("test"), payload={"llm_response": "[]"}
+    )
+
+    for _ in range(2):
+        await planner.execute(SharedContext("test", "PLANNING", logging.getLogger("test"), "hello"))
+    assert planner.llm_tool.get_tool_definitions.call_count == 1
+
+    files = MagicMock()
+    files.name = "tool_file_system"
+    files.get_tool_definitions.return_value = [
+        {"function": {"name": "read_file", "description": "Read the content of a file."}}
+    ]
+    planner.plugins["tool_file_system"] = files
+    await planner.execute(SharedContext("test", "PLANNING", logging.getLogger("test"), "hello"))
+
+    assert planner.llm_tool.get_tool_definitions.call_count == 2
+    planning_context = planner.llm_tool.execute.call_args.kwargs["context"]
+    assert "method_name: 'read_file'" in planning_context.payload["tools"][0]["function"]["description"]
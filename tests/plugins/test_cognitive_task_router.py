@@ -125,3 +125,88 @@ async def test_routing_fallback_on_llm_error(mock_file, router):
         extra={"plugin_name": router.name},
     ) # noqa: E501
     # fmt: on
+
+@pytest.mark.asyncio
+async def test_confident_local_classification_skips_the_llm(router):
+    """A trained local classifier routes without asking the LLM."""
+    router.classifier.min_examples = 4
+    router.classifier.fit(
+        [
+            ("summarize this article for me", "text_summarization"),
+            ("give me a short summary of the report", "text_summarization"),
+            ("what time is it", "simple_query"),
+            ("what is the capital of france", "simple_query"),
+        ]
+    )
+    router._classifier_loaded = True
+    context = create_test_context("please summarize the article")
+
+    updated_context = await router.execute(context=context)
+
+    router.mock_llm_tool.execute.assert_not_called()
+    assert updated_context.payload["model_config"]["model"] == "openrouter/mistralai/mistral-small"
+
+
+@pytest.mark.asyncio
+@patch("builtins.open", new_callable=mock_open, read_data="Test prompt")
+async def test_llm_classifications_are_logged_for_the_local_classifier(mock_file, router):
+    """Valid LLM classifications train the classifier and are saved to memory."""
+    memory = MagicMock()
+    memory.load_task_classifications.return_value = []
+    memory.get_cloud_tokens.return_value = 0
+    router.plugins["memory_sqlite"] = memory
+    llm_response_context = create_test_context("LLM response")
+    llm_response_context.payload["llm_response"] = "simple_query"
+    router.mock_llm_tool.execute.return_value = llm_response_context
+
+    await router.execute(context=create_test_context("what time is it"))
+
+    memory.save_task_classification.assert_called_once_with(
+        "what time is it", "simple_query", "openrouter/anthropic/claude-3-haiku"
+    )
+    assert router.classifier.examples == 1
+
+def test_speculative_model_predicts_without_an_llm(router):
+    """Untrained, the default strategy's model is predicted; trained, the classified one."""
+    context = create_test_context("please summarize the article")
+    assert router.speculative_model(context) == "openrouter/anthropic/claude-3.5-sonnet"
+
+    router.classifier.min_examples = 4
+    router.classifier.fit(
+        [
+            ("summarize this article for me", "text_summarization"),
+            ("give me a short summary of the report", "text_summarization"),
+            ("what time is it", "simple_query"),
+            ("what is the capital of france", "simple_query"),
+        ]
+    )
+    router._classifier_loaded = True
+    assert router.speculative_model(context) == "openrouter/mistralai/mistral-small"
+    router.mock_llm_tool.execute.assert_not_called()
+
+
+def test_speculative_model_is_none_when_routing_would_go_local(router, monkeypatch):
+    context = create_test_context("please summarize the article")
+    memory = MagicMock()
+    memory.get_cloud_tokens.return_value = 0
+    router.plugins["memory_sqlite"] = memory
+    assert router.speculative_model(context) is not None
+
+    memory.get_cloud_tokens.side_effect = lambda period: 200_000_000 if len(period) == 7 else 0
+    assert router.speculative_model(context) is None  # Monthly budget over 80%
+
+    memory.get_cloud_tokens.side_effect = lambda period: 0 if len(period) == 7 else 200_000_000
+    assert router.speculative_model(context) is None  # Daily overspend
+
+    memory.get_cloud_tokens.side_effect = None
+    monkeypatch.setenv("SOPHIA_FORCE_LOCAL_ONLY", "true")
+    assert router.speculative_model(context) is None
+
+
+def test_repeated_setup_does_not_duplicate_config_subscriptions(router):
+    router.setup({"all_plugins": router.plugins, "config_service": router.config_service})
+    router.setup({"all_plugins": router.plugins, "config_service": router.config_service})
+
+    subscribers = router.config_service._subscribers
+    assert len(subscribers["model_strategy"]) == 1
+    assert len(subscribers["autonomy"]) == 1
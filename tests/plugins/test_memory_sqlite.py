@@ -1,6 +1,7 @@
 import pytest
 from plugins.memory_sqlite import SQLiteMemory
 from core.context import SharedContext
+from core.operation_metadata import OperationMetadata
 import logging
 import os
 
@@ -29,3 +30,47 @@ async def test_sqlite_memory_execute_and_get_history():
 
     # Cleanup
     os.remove(db_file)
+
+def test_sqlite_memory_task_classifications_round_trip(tmp_path):
+    memory_plugin = SQLiteMemory()
+    memory_plugin.setup({"db_path": str(tmp_path / "memory.db")})
+
+    memory_plugin.save_task_classification("what time is it", "simple_query", "haiku")
+    memory_plugin.save_task_classification("summarize this", "text_summarization")
+
+    assert memory_plugin.load_task_classifications() == [
+        ("what time is it", "simple_query"),
+        ("summarize this", "text_summarization"),
+    ]
+    assert memory_plugin.load_task_classifications(limit=1) == [("summarize this", "text_summarization")]
+
+def test_sqlite_memory_maintains_cloud_spend_totals(tmp_path):
+    memory_plugin = SQLiteMemory()
+    memory_plugin.setup({"db_path": str(tmp_path / "memory.db")})
+
+    def save(timestamp, offline_mode, prompt_tokens, completion_tokens):
+        memory_plugin.save_operation(
+            OperationMetadata(
+                timestamp=timestamp,
+                model_used="model",
+                model_type="local" if offline_mode else "cloud",
+                operation_type="planning",
+                offline_mode=offline_mode,
+                prompt_tokens=prompt_tokens,
+                completion_tokens=completion_tokens,
+            )
+        )
+
+    save("2026-10-18T10:00:00", False, 100, 50)
+    save("2026-10-19T09:00:00", False, 10, None)
+    save("2026-10-19T09:30:00", True, 1000, 1000)  # Local: free
+    save("2026-09-30T23:59:00", False, 7, 0)
+
+    assert memory_plugin.get_cloud_tokens("2026-10") == 160
+    assert memory_plugin.get_cloud_tokens("2026-10-19") == 10
+    assert memory_plugin.get_cloud_tokens("2026-09") == 7
+    assert memory_plugin.get_cloud_tokens("2026-08") == 0
+
+    assert memory_plugin.rebuild_spend_totals() == 5
+    assert memory_plugin.get_cloud_tokens("2026-10") == 160
+    assert memory_plugin.get_cloud_tokens("2026-10-18") == 150
@@ -81,3 +81,176 @@ async def test_llm_tool_execute_with_config(temp_config_file):
             timeout=60,
         )
         assert result_context.payload["llm_response"] == "Hi there!"
+
+
+@pytest.mark.asyncio
+async def test_llm_tool_stream_yields_deltas():
+    llm_tool = LLMTool()
+    llm_tool.logger = logging.getLogger("test")
+    context = SharedContext(
+        session_id="test",
+        current_state="THINKING",
+        user_input="Hello",
+        logger=logging.getLogger("test"),
+    )
+
+    def chunk(text):
+        c = MagicMock()
+        c.choices = [MagicMock()]
+        c.choices[0].delta.content = text
+        return c
+
+    async def fake_stream():
+        for text in ["Hi", None, " there", "!"]:
+            yield chunk(text)
+
+    built = MagicMock()
+    built.usage.prompt_tokens = 5
+    built.usage.completion_tokens = 3
+    built.usage.total_tokens = 8
+
+    with patch(
+        "litellm.acompletion", new_callable=AsyncMock, return_value=fake_stream()
+    ) as mock_acompletion, patch(
+        "litellm.stream_chunk_builder", return_value=built
+    ), patch("litellm.completion_cost", return_value=0.0):
+        deltas = [delta async for delta in llm_tool.stream(context=context)]
+
+    assert deltas == ["Hi", " there", "!"]
+    assert mock_acompletion.call_args.kwargs["stream"] is True
+    assert context.payload["llm_response"] == "Hi there!"
+    assert context.payload["llm_response_metadata"]["total_tokens"] == 8
+
+
+@pytest.mark.asyncio
+async def test_llm_tool_serves_repeated_requests_from_cache():
+    from core.llm_cache import LLMResponseCache
+
+    llm_tool = LLMTool()
+    llm_tool.logger = logging.getLogger("test")
+    llm_tool.llm_cache = LLMResponseCache(enabled=True, db_path=None)
+
+    mock_response = MagicMock()
+    mock_response.choices[0].message.content = "simple_chat"
+    mock_response.choices[0].message.tool_calls = None
+    mock_response.usage.prompt_tokens = 10
+    mock_response.usage.completion_tokens = 2
+    mock_response.usage.total_tokens = 12
+
+    def new_context():
+        return SharedContext(
+            session_id="test",
+            current_state="PLANNING",
+            user_input="Classify: hello",
+            logger=logging.getLogger("test"),
+        )
+
+    with patch(
+        "litellm.acompletion", new_callable=AsyncMock, return_value=mock_response
+    ) as mock_acompletion, patch("litellm.completion_cost", return_value=0.001):
+        first = await llm_tool.execute(context=new_context())
+        second = await llm_tool.execute(context=new_context())
+
+    mock_acompletion.assert_called_once()
+    assert "temperature" not in mock_acompletion.call_args.kwargs  # Planning is cached at the provider default
+    assert first.payload["llm_response"] == second.payload["llm_response"] == "simple_chat"
+    assert second.payload["llm_response_metadata"]["cached"] is True
+    assert second.payload["llm_response_metadata"]["cost_usd"] == 0.0
+
+
+@pytest.mark.asyncio
+async def test_llm_tool_falls_back_while_provider_circuit_is_open():
+    llm_tool = LLMTool()
+    llm_tool.logger = logging.getLogger("test")
+    llm_tool.model = "openrouter/primary"
+    llm_tool.fallback_models = ["ollama/backup"]
+    llm_tool.provider_health.configure({"circuit_breaker": {"failure_threshold": 1}})
+
+    class ServiceUnavailableError(Exception):
+        status_code = 503
+
+    backup_response = MagicMock()
+    backup_response.choices[0].message.content = "from backup"
+    backup_response.choices[0].message.tool_calls = None
+    backup_response.usage.prompt_tokens = 3
+    backup_response.usage.completion_tokens = 2
+    backup_response.usage.total_tokens = 5
+
+    async def acompletion(**kwargs):
+        if kwargs["model"] == "openrouter/primary":
+            raise ServiceUnavailableError("upstream down")
+        return backup_response
+
+    def new_context():
+        return SharedContext(
+            session_id="test",
+            current_state="THINKING",
+            user_input="Hello",
+            logger=logging.getLogger("test"),
+        )
+
+    with patch("litellm.acompletion", side_effect=acompletion) as mock_acompletion, patch(
+        "litellm.completion_cost", return_value=0.0
+    ):
+        first = await llm_tool.execute(context=new_context())
+        second = await llm_tool.execute(context=new_context())
+
+    # The open circuit skips the primary on the second request
+    assert [call.kwargs["model"] for call in mock_acompletion.call_args_list] == [
+        "openrouter/primary",
+        "ollama/backup",
+        "ollama/backup",
+    ]
+    assert first.payload["llm_response"] == second.payload["llm_response"] == "from backup"
+    assert second.payload["llm_response_metadata"]["fallback_from"] == "openrouter/primary"
+    assert llm_tool.provider_health.snapshot()["openrouter"]["circuit"] == "open"
+
+
+@pytest.mark.asyncio
+async def test_llm_tool_hedges_latency_critical_calls():
+    import asyncio
+
+    from core.hedging import HedgePolicy
+    from core.telemetry import TelemetryHub
+
+    llm_tool = LLMTool()
+    llm_tool.logger = logging.getLogger("test")
+    llm_tool.model = "openrouter/slow"
+    llm_tool.telemetry = TelemetryHub()
+    llm_tool.hedging = HedgePolicy(enabled=True, initial_delay=0.02, default_hedge_model="openrouter/fast")
+
+    def response(content):
+        mock_response = MagicMock()
+        mock_response.choices[0].message.content = content
+        mock_response.choices[0].message.tool_calls = None
+        mock_response.usage.prompt_tokens = 8
+        mock_response.usage.completion_tokens = 2
+        mock_response.usage.total_tokens = 10
+        return mock_response
+
+    async def acompletion(**kwargs):
+        if kwargs["model"] == "openrouter/slow":
+            await asyncio.sleep(5)
+            return response("slow answer")
+        return response("fast answer")
+
+    context = SharedContext(
+        session_id="test",
+        current_state="PLANNING",
+        user_input="Plan this",
+        logger=logging.getLogger("test"),
+        payload={"latency_critical": True},
+    )
+
+    with patch("litellm.acompletion", side_effect=acompletion), patch(
+        "litellm.completion_cost", return_value=0.01
+    ):
+        result = await llm_tool.execute(context=context)
+
+    assert result.payload["llm_response"] == "fast answer"
+    assert result.payload["llm_response_metadata"]["hedged_from"] == "openrouter/slow"
+    stats = llm_tool.telemetry.get_snapshot().to_dict()["hedge_stats"][0]
+    assert stats["model"] == "openrouter/slow"
+    assert stats["hedge_rate"] == 1.0
+    assert stats["backup_win_rate"] == 1.0
+    assert stats["extra_cost_usd"] == pytest.approx(0.008)
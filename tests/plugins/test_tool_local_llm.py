@@ -4,6 +4,8 @@ Unit tests for LocalLLMTool plugin.
 Tests local LLM integration with Ollama, LM Studio, and llamafile.
 """
 
+import asyncio
+import json
 import pytest
 from unittest.mock import AsyncMock, MagicMock, patch
 import httpx
@@ -174,6 +176,150 @@ class TestOllamaIntegration:
         assert "gemma2:2b" in models
         assert "llama3:8b" in models
 
+    @pytest.mark.asyncio
+    async def test_stream_ollama_yields_ndjson_deltas(self, local_llm, mock_context):
+        """Test streaming parses Ollama's line-delimited chat chunks."""
+        body = (
+            b'{"message": {"content": "Hel"}, "done": false}\n'
+            b'{"message": {"content": "lo"}, "done": false}\n'
+            b'{"message": {"content": ""}, "done": true}\n'
+        )
+        requests_seen = []
+
+        def handler(request):
+            requests_seen.append(request)
+            return httpx.Response(200, content=body)
+
+        # No conversation state for this history yet, so it goes to /api/chat in full
+        mock_context.history = [{"role": "user", "content": "hi"}, {"role": "assistant", "content": "hey"}]
+        local_llm.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        deltas = [delta async for delta in local_llm.stream(context=mock_context)]
+
+        assert deltas == ["Hel", "lo"]
+        assert mock_context.payload["llm_response"] == "Hello"
+        assert requests_seen[0].url.path == "/api/chat"
+        assert json.loads(requests_seen[0].content)["stream"] is True
+
+    @pytest.mark.asyncio
+    async def test_concurrent_identical_requests_share_one_generation(self, local_llm, mock_context):
+        """Test identical in-flight requests are coalesced into one Ollama call."""
+        mock_response = MagicMock()
+        mock_response.json.return_value = {"message": {"content": "simple_chat"}}
+        mock_response.raise_for_status = MagicMock()
+
+        async def slow_post(*args, **kwargs):
+            await asyncio.sleep(0.05)
+            return mock_response
+
+        other_context = SharedContext(
+            session_id="other_session",
+            current_state="processing",
+            logger=mock_context.logger,
+            user_input="test input",
+        )
+        post = AsyncMock(side_effect=slow_post)
+        with patch.object(local_llm.client, "post", new=post):
+            first, second = await asyncio.gather(
+                local_llm.execute(mock_context), local_llm.execute(other_context)
+            )
+
+        post.assert_called_once()
+        assert first.payload["llm_response"] == second.payload["llm_response"] == "simple_chat"
+
+    @pytest.mark.asyncio
+    async def test_model_override_applies_only_to_its_own_request(self, local_llm, mock_context):
+        """Test a per-request local_model does not leak into concurrent requests."""
+        models_seen = []
+
+        async def handler(request):
+            model = json.loads(request.content)["model"]
+            models_seen.append(model)
+            await asyncio.sleep(0.01)
+            return httpx.Response(200, json={"message": {"content": model}})
+
+        local_llm.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        escalated = SharedContext(
+            session_id="other_session",
+            current_state="processing",
+            logger=mock_context.logger,
+            user_input="test input",
+            payload={"model_config": {"local_model": "qwen2.5:14b"}},
+        )
+        default, override = await asyncio.gather(
+            local_llm.execute(mock_context), local_llm.execute(escalated)
+        )
+
+        assert sorted(models_seen) == ["gemma2:2b", "qwen2.5:14b"]
+        assert default.payload["llm_response"] == "gemma2:2b"
+        assert override.payload["llm_response"] == "qwen2.5:14b"
+
+    def test_response_format_schema_becomes_ollama_format(self, local_llm):
+        """Test a structured-output schema is passed to Ollama as the format constraint."""
+        schema = {"type": "array", "items": {"type": "object"}}
+        messages = [{"role": "user", "content": "plan this"}]
+
+        assert local_llm._build_ollama_request(messages, response_format=schema)["format"] == schema
+        assert "format" not in local_llm._build_ollama_request(messages)
+
+    @pytest.mark.asyncio
+    async def test_session_turns_continue_from_returned_context(self, local_llm, mock_context):
+        """Test a follow-up turn sends only the new message plus the previous context."""
+        bodies = []
+
+        def handler(request):
+            bodies.append((request.url.path, json.loads(request.content)))
+            turn = len(bodies)
+            return httpx.Response(200, json={"response": f"answer {turn}", "context": [turn] * 3})
+
+        local_llm.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        mock_context.user_input = "first"
+        mock_context.history = [{"role": "user", "content": "first"}]
+        await local_llm.execute(mock_context)
+        mock_context.history += [
+            {"role": "assistant", "content": mock_context.payload["llm_response"]},
+            {"role": "user", "content": "second"},
+        ]
+        mock_context.user_input = "second"
+        await local_llm.execute(mock_context)
+
+        (first_path, first), (second_path, second) = bodies
+        assert first_path == second_path == "/api/generate"
+        assert first["prompt"] == "first" and "context" not in first
+        assert second["prompt"] == "second" and second["context"] == [1, 1, 1]
+        assert "system" not in second
+        assert mock_context.payload["llm_response"] == "answer 2"
+
+    @pytest.mark.asyncio
+    async def test_structured_call_does_not_replace_the_chat_session_state(self, local_llm, mock_context):
+        """Test a planner call with its own system prompt keeps the session's chat state."""
+        bodies = []
+
+        def handler(request):
+            bodies.append(json.loads(request.content))
+            turn = len(bodies)
+            return httpx.Response(200, json={"response": f"answer {turn}", "context": [turn] * 3})
+
+        local_llm.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        mock_context.user_input = "first"
+        mock_context.history = [{"role": "user", "content": "first"}]
+        await local_llm.execute(mock_context)
+
+        await local_llm._generate_ollama(
+            messages=[{"role": "system", "content": "You plan."}, {"role": "user", "content": "plan it"}],
+            session_id=mock_context.session_id,
+            response_format="json",
+        )
+
+        mock_context.history += [
+            {"role": "assistant", "content": "answer 1"},
+            {"role": "user", "content": "second"},
+        ]
+        mock_context.user_input = "second"
+        await local_llm.execute(mock_context)
+
+        assert bodies[1]["system"] == "You plan." and "context" not in bodies[1]
+        assert bodies[2]["prompt"] == "second" and bodies[2]["context"] == [1, 1, 1]
+
 
 class TestLMStudioIntegration:
     """Test LM Studio runtime integration."""